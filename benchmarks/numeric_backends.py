@@ -0,0 +1,45 @@
+"""Compare simulation speed of the numeric backends
+
+Usage: python -m benchmarks.numeric_backends [repeats]
+"""
+
+import sys
+import timeit
+from decimal import Decimal
+
+from rgsim import numeric, simulator
+from rgsim.entities import building, upgrade
+
+
+def arithmetic(backend: numeric.Backend) -> None:
+    value = backend.convert(Decimal('1.05e155'))
+    rate = backend.convert(Decimal('1.07'))
+    total = backend.convert(0)
+    for _i in range(1000):
+        total = total + value * rate
+        value = value / rate
+
+
+def simulation(backend: numeric.Backend) -> None:
+    state = simulator.GameState(numeric=backend)
+    for building_state in building.all():
+        state.purchase_building(building_state.id_, Decimal(50))
+    for u in upgrade.all():
+        state.purchase_upgrade(u)
+        state.advance_time(Decimal(1))
+
+
+def main() -> None:
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f'{"benchmark":<12}{"backend":<10}{"seconds":>10}{"vs decimal":>12}')
+    for benchmark in (arithmetic, simulation):
+        reference = None
+        for backend in numeric.all():
+            seconds = min(timeit.repeat(lambda: benchmark(backend), number=1, repeat=repeats))
+            reference = reference or seconds
+            print(f'{benchmark.__name__:<12}{backend.name:<10}{seconds:>10.5f}'
+                  f'{reference / seconds:>11.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Incremental tracking of which upgrades can be bought
+
+An AvailabilityIndex listens to a GameState's events and re-evaluates an upgrade's `available`
+and `unlocked` conditions only when something in its `depends_on` changes: buying a building
+re-evaluates the upgrades that depend on that building, and so on. Upgrades that do not declare
+their dependencies are re-evaluated after every event. Upgrades that are unlocked, available and
+not yet purchased are kept sorted by cost, so the upgrades affordable right now are a prefix
+found by binary search, however often gold changes.
+
+Changes made without events (e.g. editing building counts directly) are not seen; call refresh
+after making them. A batch rolling back sends an event, and the index starts over.
+"""
+
+from __future__ import annotations
+
+import bisect
+from decimal import Decimal
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+from . import events, numeric, simulator
+from .entities import upgrade as upgrade_
+
+
+class AvailabilityIndex:
+    def __init__(self, state: simulator.GameState) -> None:
+        self.state = state
+        self.evaluations = 0
+        self._unlocked: Set[upgrade_.UpgradeId] = set()
+        self._available: Set[upgrade_.UpgradeId] = set()
+        self._dependents: Dict[Hashable, Set[upgrade_.UpgradeId]] = {}
+        # Upgrades with undeclared dependencies
+        self._undeclared: Set[upgrade_.UpgradeId] = set()
+        # (cost, id value) of every upgrade that can be bought given enough gold, sorted
+        self._candidates: List[Tuple[Decimal, int]] = []
+
+        self.refresh()
+        state.listeners.append(self._on_event)
+
+    def refresh(self) -> None:
+        """Re-evaluate every upgrade of the state"""
+        self._unlocked.clear()
+        self._available.clear()
+        self._dependents.clear()
+        self._undeclared.clear()
+        self._candidates.clear()
+
+        for id_, upgrade_state in self.state.upgrades.items():
+            self._track(id_, upgrade_state.upgrade)
+            self._evaluate(id_)
+
+    def detach(self) -> None:
+        self.state.listeners.remove(self._on_event)
+
+    def is_unlocked(self, id_: upgrade_.UpgradeId) -> bool:
+        return id_ in self._unlocked
+
+    def is_available(self, id_: upgrade_.UpgradeId) -> bool:
+        return id_ in self._available
+
+    def candidates(self) -> List[upgrade_.Upgrade]:
+        """Upgrades that could be bought with enough gold, cheapest first"""
+        return self._upgrades(self._candidates)
+
+    def ready(self) -> List[upgrade_.Upgrade]:
+        """Upgrades that can be bought with the gold held now, cheapest first"""
+        gold = numeric.DECIMAL.convert(self.state.gold)
+        end = bisect.bisect_right(self._candidates, (gold, float('inf')))
+        return self._upgrades(self._candidates[:end])
+
+    def _track(self, id_: upgrade_.UpgradeId, upgrade: upgrade_.Upgrade) -> None:
+        if upgrade.depends_on is None:
+            self._undeclared.add(id_)
+            return
+        for dependency in upgrade.depends_on:
+            self._dependents.setdefault(dependency, set()).add(id_)
+
+    def _upgrades(self, keys: Iterable[Tuple[Decimal, int]]) -> List[upgrade_.Upgrade]:
+        return [self.state.upgrades[upgrade_.UpgradeId(value)].upgrade for _cost, value in keys]
+
+    def _evaluate(self, id_: upgrade_.UpgradeId) -> None:
+        self.evaluations += 1
+        upgrade_state = self.state.upgrades.get(id_)
+        key = None
+        if upgrade_state is not None:
+            key = (upgrade_state.upgrade.cost, id_.value)
+            self._remove_candidate(key)
+
+        self._unlocked.discard(id_)
+        self._available.discard(id_)
+        if upgrade_state is None:
+            return
+
+        upgrade = upgrade_state.upgrade
+        if upgrade.unlocked(self.state):
+            self._unlocked.add(id_)
+        if upgrade.available(self.state):
+            self._available.add(id_)
+        if id_ in self._unlocked and id_ in self._available and not upgrade_state.purchased:
+            bisect.insort(self._candidates, key)
+
+    def _remove_candidate(self, key: Tuple[Decimal, int]) -> None:
+        index = bisect.bisect_left(self._candidates, key)
+        if index < len(self._candidates) and self._candidates[index] == key:
+            del self._candidates[index]
+
+    def _on_event(self, event: events.Event) -> None:
+        if isinstance(event, (events.ChangeScope, events.Rollback)):
+            # The upgrades the state tracks change with its scope, and anything may have changed
+            # back in a rollback; rare enough to start over
+            self.refresh()
+            return
+
+        changed = set(self._undeclared)
+        if isinstance(event, events.PurchaseBuilding):
+            changed |= self._dependents.get(upgrade_.building_dependency(event.building_id), set())
+        elif isinstance(event, (events.PurchaseUpgrade, events.UnpurchaseUpgrade)):
+            changed.add(event.upgrade_id)
+            changed |= self._dependents.get(upgrade_.upgrade_dependency(event.upgrade_id), set())
+            if event.upgrade_id in self.state.upgrades:
+                # An upgrade bought from outside the state's scope is tracked from now on
+                self._track(event.upgrade_id, self.state.upgrades[event.upgrade_id].upgrade)
+
+        for id_ in changed:
+            self._evaluate(id_)
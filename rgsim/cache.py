@@ -0,0 +1,219 @@
+"""Persistent content-addressed cache of decoded saves
+
+A save string is base64 of zlib-compressed, XOR-ciphered record tables. Deciphering it and
+unpacking every record is the bulk of the cost of loading a save, so the cache stores the
+deciphered tables, in a file named after a hash of the save string: a header with the byte length
+of each section, then the sections as they are in the save, each a fixed-width big-endian record
+table (see Serializer.sections). Repeat loads hash the string and memory-map that file; the
+records of each section are a numpy array over the mapping (dtypes from ingest.record_dtype), with
+nothing deciphered or unpacked with struct.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+from . import ingest, serializer, simulator
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Bump when the cached representation changes so stale entries are never read
+_FORMAT_VERSION = 3
+_SUFFIX = f'.v{_FORMAT_VERSION}.rgs'
+
+_MAGIC = b'RGSC'
+# Magic, format version and the byte length of each section of serializer.LAYOUT
+_HEADER = struct.Struct(f'<4sI{len(serializer.LAYOUT)}I')
+
+
+def default_directory() -> str:
+    """$RGSIM_CACHE_DIR, or an rgsim/saves directory under the user's cache directory"""
+    override = os.environ.get('RGSIM_CACHE_DIR')
+    if override:
+        return override
+
+    base = os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA') \
+        or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'rgsim', 'saves')
+
+
+@dataclass(frozen=True)
+class Entry:
+    # Raw bytes of each section (see Serializer.sections)
+    sections: Dict[str, bytes]
+    # Records of each section, one element for single-record sections, mapped from the entry
+    tables: Dict[str, np.ndarray]
+
+    def save_data(self) -> serializer.SaveData:
+        """Every record of the save, converted from the tables"""
+        decoded = {}
+        for section in serializer.LAYOUT:
+            records = [section.record_type(*row) for row in self.tables[section.name].tolist()]
+            decoded[section.name] = records if section.many else records[0]
+        return serializer.SaveData.from_sections(decoded)
+
+
+def encode_entry(sections: Dict[str, bytes]) -> bytes:
+    lengths = [len(sections[section.name]) for section in serializer.LAYOUT]
+    return _HEADER.pack(_MAGIC, _FORMAT_VERSION, *lengths) \
+        + b''.join(sections[section.name] for section in serializer.LAYOUT)
+
+
+def decode_entry(data: memoryview) -> Optional[Entry]:
+    """The entry in data, or None if it is not a whole entry of this format"""
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, *lengths = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != _FORMAT_VERSION or _HEADER.size + sum(lengths) != len(data):
+        return None
+
+    sections, tables = {}, {}
+    offset = _HEADER.size
+    for section, length in zip(serializer.LAYOUT, lengths):
+        dtype = ingest.record_dtype(section.record_type)
+        if section.many:
+            if length < 2:
+                return None
+            count, start = int.from_bytes(data[offset:offset + 2], 'big'), offset + 2
+        else:
+            count, start = 1, offset
+        if start + count * dtype.itemsize != offset + length:
+            return None
+        sections[section.name] = bytes(data[offset:offset + length])
+        tables[section.name] = np.frombuffer(data, dtype, count, start)
+        offset += length
+
+    return Entry(sections, tables)
+
+
+class SaveCache:
+    """Size-bounded cache of decoded saves, evicting least recently used entries
+
+    Recency is tracked with file modification times and sizes are read from the directory itself
+    whenever an entry is added, so several processes can share a directory and the bound holds
+    for all of them together (give or take entries added concurrently).
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory if directory is not None else default_directory()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(save_data: str) -> str:
+        return hashlib.blake2b(save_data.encode('utf-8'), digest_size=20).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def entry(self, save_data: str) -> Entry:
+        """The sections and record tables of a save, from the cache if present"""
+        path = self.path(SaveCache.key(save_data))
+        entry = _load(path)
+
+        if entry is None:
+            self.misses += 1
+            data = encode_entry(serializer.Serializer(save_data).sections())
+            self._put(path, data)
+            return decode_entry(memoryview(data))  # type: ignore[return-value]
+
+        self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def sections(self, save_data: str) -> Dict[str, bytes]:
+        return self.entry(save_data).sections
+
+    def tables(self, save_data: str) -> Dict[str, np.ndarray]:
+        return self.entry(save_data).tables
+
+    def parse(self, save_data: str) -> serializer.SaveData:
+        return self.entry(save_data).save_data()
+
+    def deserialize(self, save_data: str) -> simulator.GameState:
+        return serializer.Serializer.hydrate(self.parse(save_data))
+
+    def clear(self) -> None:
+        with self._lock:
+            for name in self._entries():
+                _remove(os.path.join(self.directory, name))
+
+    def size(self) -> int:
+        with self._lock:
+            return sum(self._entries().values())
+
+    def _entries(self) -> Dict[str, int]:
+        """Size of every entry in the directory, including those other processes added"""
+        sizes = {}
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(_SUFFIX):
+                try:
+                    sizes[entry.name] = entry.stat().st_size
+                except FileNotFoundError:
+                    pass  # Evicted by another process meanwhile
+        return sizes
+
+    def _put(self, path: str, data: bytes) -> None:
+        # Write then rename so concurrent readers never load a partially written entry
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(data)
+        os.replace(temporary, path)
+
+        with self._lock:
+            self._evict(self._entries())
+
+    def _evict(self, entries: Dict[str, int]) -> None:
+        total = sum(entries.values())
+        if total <= self.max_bytes:
+            return
+
+        def last_used(name: str) -> float:
+            try:
+                return os.stat(os.path.join(self.directory, name)).st_mtime
+            except FileNotFoundError:
+                return 0
+
+        for name in sorted(entries, key=last_used):
+            if total <= self.max_bytes:
+                break
+            _remove(os.path.join(self.directory, name))
+            total -= entries.pop(name)
+
+
+def _load(path: str) -> Optional[Entry]:
+    """The entry at path, memory-mapped, or None if it is missing or unreadable"""
+    try:
+        with open(path, 'rb') as file:
+            # The mapping outlives the file object; the tables keep it alive
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        # ValueError: an empty file cannot be mapped
+        return None
+    # A truncated or unreadable entry is simply rebuilt
+    return decode_entry(memoryview(mapped))
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        pass  # Still mapped by a reader, where the platform forbids removing it (Windows)
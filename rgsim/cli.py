@@ -0,0 +1,117 @@
+"""Command line entry point"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import os
+import sys
+from typing import List, Optional, Tuple
+
+
+def _gui(_args: argparse.Namespace) -> int:
+    from .gui import app  # pylint: disable=import-outside-toplevel
+
+    app.main()
+    return 0
+
+
+def _batch(args: argparse.Namespace) -> int:
+    from . import ingest  # pylint: disable=import-outside-toplevel
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    manifest_path = os.path.join(args.out_dir, 'manifest.jsonl')
+    skip: Tuple[str, ...] = ()
+    if args.resume:
+        ingest.truncate_partial_line(manifest_path)
+        skip = ingest.completed(manifest_path)
+
+    failures = 0
+    with open(manifest_path, 'a' if args.resume else 'w', encoding='utf-8') as manifest:
+        for result in ingest.ingest(args.save_dir, args.out_dir, args.workers, skip=skip):
+            manifest.write(json.dumps(dataclasses.asdict(result)) + '\n')
+            manifest.flush()
+            if result.error is not None:
+                failures += 1
+                print(f'{result.path}: {result.error}', file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+def _sweep(args: argparse.Namespace) -> int:
+    from . import sweep  # pylint: disable=import-outside-toplevel
+
+    with open(args.spec, encoding='utf-8') as file:
+        scenarios = sweep.from_spec(json.load(file))
+
+    done = sweep.completed(args.out_dir, scenarios) if os.path.isdir(args.out_dir) else 0
+    for results in sweep.run(
+            scenarios, args.out_dir, args.workers, args.chunk_size, args.format):
+        done += len(results)
+        print(f'{done}/{len(scenarios)} scenarios', file=sys.stderr)
+
+    return 0
+
+
+def _tournament(args: argparse.Namespace) -> int:
+    # pylint: disable=import-outside-toplevel
+    from . import ingest, serializer, tournament
+
+    state = serializer.Serializer.deserialize(ingest.read_save_string(args.save))
+    result = tournament.run(
+        state, tournament.default_strategies(state.alignment), args.min_horizon,
+        args.max_horizon, args.eta, args.workers
+    )
+    for rank, outcome in enumerate(result.ranking(), 1):
+        print(
+            f'{rank:>3} {outcome.strategy.name:<24} {outcome.earned:>12.4g} gold in '
+            f'{outcome.horizon:g}s, {outcome.purchases} purchases'
+        )
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='rgsim', description='Realm Grinder Simulator')
+    subcommands = parser.add_subparsers(dest='command')
+
+    gui = subcommands.add_parser('gui', help='Run the simulator GUI (default)')
+    gui.set_defaults(handler=_gui)
+
+    batch = subcommands.add_parser(
+        'batch', help='Ingest a directory of saves into columnar .npy files'
+    )
+    batch.add_argument('save_dir', help='Directory searched recursively for .sol/.txt saves')
+    batch.add_argument('out_dir', help='Output directory, one partition per save')
+    batch.add_argument('--workers', type=int, default=None, help='Worker processes')
+    batch.add_argument(
+        '--resume', action='store_true', help='Skip saves already ingested per the manifest'
+    )
+    batch.set_defaults(handler=_batch)
+
+    sweep = subcommands.add_parser(
+        'sweep', help='Evaluate a grid or sample of scenarios, resuming where it left off'
+    )
+    sweep.add_argument('spec', help='JSON sweep specification (see rgsim.sweep.from_spec)')
+    sweep.add_argument('out_dir', help='Directory for results and progress')
+    sweep.add_argument('--workers', type=int, default=None, help='Worker processes')
+    sweep.add_argument('--chunk-size', type=int, default=256, help='Scenarios per task')
+    sweep.add_argument('--format', choices=('jsonl', 'npz'), default='jsonl', help='Result format')
+    sweep.set_defaults(handler=_sweep)
+
+    tournament = subcommands.add_parser(
+        'tournament', help='Rank purchasing strategies from a save by successive halving'
+    )
+    tournament.add_argument('save', help='.sol or .txt save to start from')
+    tournament.add_argument(
+        '--min-horizon', type=float, default=600, help='Seconds played in the first round'
+    )
+    tournament.add_argument(
+        '--max-horizon', type=float, default=86400, help='Seconds played in the last round'
+    )
+    tournament.add_argument('--eta', type=int, default=2, help='Horizon growth per round')
+    tournament.add_argument('--workers', type=int, default=None, help='Worker processes')
+    tournament.set_defaults(handler=_tournament)
+
+    args = parser.parse_args(argv)
+    return getattr(args, 'handler', _gui)(args)
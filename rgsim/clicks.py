@@ -0,0 +1,105 @@
+"""Clicking profiles and click income
+
+A profile says how fast the realm is clicked: a base number of clicks per second, raised by the
+modifiers of a target (CLICKS_PER_SECOND while playing, OFFLINE_CLICKS_PER_SECOND while away), and
+optionally clicked only for part of every period, e.g. a player checking in for ten minutes an
+hour. The number of clicks over any interval is worked out in closed form, so advancing time by
+days costs the same as advancing it by a second.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .entities import modifier
+
+
+@dataclass(frozen=True)
+class ClickProfile:
+    name: str
+    # Clicks per second while clicking, before the target's modifiers
+    clicks_per_second: Decimal = Decimal(0)
+    # Modifiers to the clicks per second; None for a profile that never clicks
+    target: Optional[modifier.Target] = modifier.Target.CLICKS_PER_SECOND
+    # Clicking for the first `active` seconds of every `period`; None clicks all the time
+    period: Optional[Decimal] = None
+    active: Decimal = Decimal(0)
+
+    def __post_init__(self) -> None:
+        if self.period is not None and not 0 <= self.active <= self.period:
+            raise ValueError(f'{self.name}: active time must be within the period')
+
+    def active_seconds(self, start: Any, end: Any, convert: Callable[[Any], Any] = Decimal) -> Any:
+        """Seconds spent clicking between elapsed times start and end
+
+        convert turns the profile's numbers into the type of start and end (see numeric).
+        """
+        if self.period is None:
+            return end - start
+        return self._active_until(end, convert) - self._active_until(start, convert)
+
+    def seconds_to_earn(
+            self, start: Any, amount: Any, rate: Any, click_rate: Any,
+            convert: Callable[[Any], Any] = Decimal) -> Optional[Any]:
+        """Seconds from elapsed time start until amount is earned, or None if it never is
+
+        Earning rate per second, plus click_rate per second spent clicking; the inverse of
+        rate * seconds + click_rate * active_seconds(start, start + seconds).
+        """
+        zero = convert(0)
+        if amount <= 0:
+            return zero
+        if self.period is None:
+            total = rate + click_rate
+            return amount / total if total > 0 else None
+
+        period, active = convert(self.period), convert(self.active)
+        per_period = rate * period + click_rate * active
+        if per_period <= 0:
+            return None
+
+        # Any whole number of periods earns the same from any start; skip all but the last...
+        whole = max(math.ceil(float(amount / per_period)) - 1, 0)
+        while whole and whole * per_period >= amount:
+            whole -= 1
+        time = start + convert(whole) * period
+        amount -= convert(whole) * per_period
+        # ...then walk the at most three clicking and idle pieces left
+        while True:
+            into = time - convert(math.floor(float(time) / float(self.period))) * period
+            if into < active:
+                end, piece_rate = time + active - into, rate + click_rate
+            else:
+                end, piece_rate = time + period - into, rate
+            earned = piece_rate * (end - time)
+            if piece_rate > 0 and earned >= amount:
+                return time + amount / piece_rate - start
+            amount -= earned
+            time = end
+
+    def _active_until(self, time: Any, convert: Callable[[Any], Any]) -> Any:
+        # Whole periods, plus the active part of the last partial period. Rounding in the float
+        # division can only put time a hair either side of a period boundary, where this is
+        # continuous anyway.
+        periods = convert(math.floor(float(time) / float(self.period)))
+        into_period = time - periods * convert(self.period)
+        return periods * convert(self.active) + min(into_period, convert(self.active))
+
+
+NONE = ClickProfile('none', target=None)
+AUTOCLICKER = ClickProfile('autoclicker', Decimal(20))
+HUMAN = ClickProfile('human', Decimal(6), period=Decimal(3600), active=Decimal(600))
+OFFLINE = ClickProfile('offline', target=modifier.Target.OFFLINE_CLICKS_PER_SECOND)
+
+_PROFILES: Dict[str, ClickProfile] = {p.name: p for p in (NONE, AUTOCLICKER, HUMAN, OFFLINE)}
+
+
+def get(name: str) -> ClickProfile:
+    return _PROFILES[name]
+
+
+def all() -> Iterable[ClickProfile]:
+    return _PROFILES.values()
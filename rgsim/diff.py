@@ -0,0 +1,121 @@
+"""Compare game states and saves"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, TYPE_CHECKING
+
+from . import serializer, simulator
+
+if TYPE_CHECKING:
+    from . import cache
+    from .entities import alignment, building, faction, upgrade
+
+
+
+@dataclass(frozen=True)
+class StateDiff:
+    """Changes between two game states (after - before), omitting anything unchanged"""
+    resources: Dict[str, Decimal] = field(default_factory=dict)
+    buildings: Dict[building.BuildingId, Decimal] = field(default_factory=dict)
+    purchased: FrozenSet[upgrade.UpgradeId] = frozenset()
+    unpurchased: FrozenSet[upgrade.UpgradeId] = frozenset()
+    # The new faction and alignment, if they changed
+    faction: Optional[faction.FactionId] = None
+    alignment: Optional[alignment.AlignmentId] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.resources or self.buildings or self.purchased or self.unpurchased) \
+            or self.faction is not None or self.alignment is not None
+
+
+def states(before: simulator.GameState, after: simulator.GameState) -> StateDiff:
+    """Diff two game states"""
+    resources = {}
+    for name in simulator.RESOURCES:
+        delta = getattr(after, name) - getattr(before, name)
+        if delta:
+            resources[name] = delta
+
+    buildings = {}
+    for building_id, building_state in after.buildings.items():
+        delta = building_state.owned - before.buildings[building_id].owned
+        if delta:
+            buildings[building_id] = delta
+
+    purchased_before = {id_ for id_, u in before.upgrades.items() if u.purchased}
+    purchased_after = {id_ for id_, u in after.upgrades.items() if u.purchased}
+
+    return StateDiff(
+        resources,
+        buildings,
+        frozenset(purchased_after - purchased_before),
+        frozenset(purchased_before - purchased_after),
+        after.faction if after.faction != before.faction else None,
+        after.alignment if after.alignment != before.alignment else None,
+    )
+
+
+def saves(before: str, after: str, save_cache: Optional[cache.SaveCache] = None) -> StateDiff:
+    """Diff two save strings without hydrating either into a GameState"""
+    def split(save_data: str) -> Dict[str, bytes]:
+        if save_cache is not None:
+            return save_cache.sections(save_data)
+        return serializer.Serializer(save_data).sections()
+
+    return sections(split(before), split(after))
+
+
+def sections(before: Mapping[str, bytes], after: Mapping[str, bytes]) -> StateDiff:
+    """Diff two saves split by Serializer.sections, decoding only the sections that differ
+
+    Consecutive autosaves usually differ in a handful of sections, so most of both saves is only
+    ever compared byte for byte.
+    """
+    layout = {section.name: section for section in serializer.LAYOUT}
+
+    def changed(name: str) -> bool:
+        return before[name] != after[name]
+
+    def decode(name: str) -> Any:
+        return (
+            serializer.Serializer.decode_section(layout[name], before[name]),
+            serializer.Serializer.decode_section(layout[name], after[name]),
+        )
+
+    resources: Dict[str, Decimal] = {}
+    scope: List[Any] = [None, None]
+    if changed('current_game') or changed('trophies'):
+        current_game_before, current_game_after = decode('current_game')
+        trophies_before, trophies_after = decode('trophies')
+        old = serializer.Serializer.resources(current_game_before, trophies_before)
+        new = serializer.Serializer.resources(current_game_after, trophies_after)
+        resources = {name: new[name] - old[name] for name in new if new[name] != old[name]}
+        old_scope = serializer.Serializer.scope(current_game_before)
+        new_scope = serializer.Serializer.scope(current_game_after)
+        scope = [new if new != old else None for old, new in zip(old_scope, new_scope)]
+
+    buildings: Dict[building.BuildingId, Decimal] = {}
+    if changed('buildings'):
+        old_counts, new_counts = map(serializer.Serializer.building_counts, decode('buildings'))
+        for building_id in old_counts.keys() | new_counts.keys():
+            zero = Decimal(0)
+            delta = new_counts.get(building_id, zero) - old_counts.get(building_id, zero)
+            if delta:
+                buildings[building_id] = delta
+
+    purchased_before = purchased_after = frozenset()
+    if changed('upgrades'):
+        purchased_before, purchased_after = (
+            frozenset(serializer.Serializer.purchased_upgrades(records))
+            for records in decode('upgrades')
+        )
+
+    return StateDiff(
+        resources,
+        buildings,
+        purchased_after - purchased_before,
+        purchased_before - purchased_after,
+        *scope,
+    )
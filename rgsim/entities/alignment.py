@@ -22,7 +22,7 @@ class AlignmentType(Enum):
     SECONDARY = 2
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class Alignment(entity.Entity):
     id_: AlignmentId
     type_: AlignmentType
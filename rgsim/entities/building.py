@@ -1,4 +1,7 @@
-"""Building definitions and functionality"""
+"""Building definitions and functionality
+
+Buildings are defined in entities.json (see table).
+"""
 
 from __future__ import annotations
 
@@ -7,7 +10,7 @@ from decimal import Decimal
 from enum import Enum, unique
 from typing import Dict, Iterable, Optional
 
-from . import alignment, entity
+from . import alignment, entity, table
 
 
 @unique
@@ -40,7 +43,7 @@ class BuildingId(Enum):
     HALL_OF_LEGENDS = 10
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class Building(entity.Entity):
     id_: BuildingId
     tier: Decimal
@@ -57,6 +60,10 @@ class Building(entity.Entity):
 
         return self.id_.name.replace('_', ' ').title()
 
+    def buildable(self, alignment_id: alignment.AlignmentId) -> bool:
+        """True if the building can be built in a run of alignment_id"""
+        return self.alignment.id_ in (alignment.AlignmentId.NONE, alignment_id)
+
 
 def _register(building: Building) -> Building:
     if building.id_ in _BUILDINGS:
@@ -76,81 +83,43 @@ def all() -> Iterable[Building]:
 
 _BUILDINGS: Dict[BuildingId, Building] = {}
 
-FARM = _register(Building(
-    BuildingId.FARM, Decimal(1), alignment.NONE, Decimal(2), Decimal(10)
-))
-INN = _register(Building(
-    BuildingId.INN, Decimal(2), alignment.NONE, Decimal(6), Decimal(125)
-))
-BLACKSMITH = _register(Building(
-    BuildingId.BLACKSMITH, Decimal(3), alignment.NONE, Decimal(20), Decimal(600)
-))
-DEEP_MINE = _register(Building(
-    BuildingId.DEEP_MINE, Decimal(4), alignment.NEUTRAL, Decimal(65), Decimal(1800)
-))
-STONE_PILLARS = _register(Building(
-    BuildingId.STONE_PILLARS, Decimal(5), alignment.NEUTRAL, Decimal(200), Decimal(5600)
-))
-ALCHEMIST_LAB = _register(Building(
-    BuildingId.ALCHEMIST_LAB, Decimal(6), alignment.NEUTRAL, Decimal(650), Decimal(38000)
-))
-MONASTERY = _register(Building(
-    BuildingId.MONASTERY, Decimal(7), alignment.NEUTRAL, Decimal(2000), Decimal(442000)
-))
-LABYRINTH = _register(Building(
-    BuildingId.LABYRINTH, Decimal(8), alignment.NEUTRAL, Decimal(8500), Decimal(7.3e6)
-))
-IRON_STRONGHOLD = _register(Building(
-    BuildingId.IRON_STRONGHOLD, Decimal(9), alignment.NEUTRAL, Decimal(1e5), Decimal(145e6)
-))
-ANCIENT_PYRAMID = _register(Building(
-    BuildingId.ANCIENT_PYRAMID, Decimal(10), alignment.NEUTRAL, Decimal(1.2e6), Decimal(3.2e9)
-))
-WARRIOR_BARRACKS = _register(Building(
-    BuildingId.WARRIOR_BARRACKS, Decimal(4), alignment.GOOD, Decimal(65), Decimal(1800)
-))
-KNIGHTS_JOUST = _register(Building(
-    BuildingId.KNIGHTS_JOUST, Decimal(5), alignment.GOOD, Decimal(200), Decimal(5600),
-    _name_override='Knight\'s Joust'
-))
-WIZARD_TOWER = _register(Building(
-    BuildingId.WIZARD_TOWER, Decimal(6), alignment.GOOD, Decimal(650), Decimal(38000)
-))
-CATHEDRAL = _register(Building(
-    BuildingId.CATHEDRAL, Decimal(7), alignment.GOOD, Decimal(2000), Decimal(442000)
-))
-CITADEL = _register(Building(
-    BuildingId.CITADEL, Decimal(8), alignment.GOOD, Decimal(8500), Decimal(7.3e6)
-))
-ROYAL_CASTLE = _register(Building(
-    BuildingId.ROYAL_CASTLE, Decimal(9), alignment.GOOD, Decimal(100000), Decimal(145e6)
-))
-HEAVENS_GATE = _register(Building(
-    BuildingId.HEAVENS_GATE, Decimal(10), alignment.GOOD, Decimal(1.2e6), Decimal(3.2e9),
-    _name_override='Heaven\'s Gate'
-))
-SLAVE_PEN = _register(Building(
-    BuildingId.SLAVE_PEN, Decimal(4), alignment.EVIL, Decimal(65), Decimal(1800)
-))
-ORCISH_ARENA = _register(Building(
-    BuildingId.ORCISH_ARENA, Decimal(5), alignment.EVIL, Decimal(200), Decimal(5600)
-))
-WITCH_CONCLAVE = _register(Building(
-    BuildingId.WITCH_CONCLAVE, Decimal(6), alignment.EVIL, Decimal(650), Decimal(38000)
-))
-DARK_TEMPLE = _register(Building(
-    BuildingId.DARK_TEMPLE, Decimal(7), alignment.EVIL, Decimal(2000), Decimal(442000)
-))
-NECROPOLIS = _register(Building(
-    BuildingId.NECROPOLIS, Decimal(8), alignment.EVIL, Decimal(8500), Decimal(7.3e6)
-))
-EVIL_FORTRESS = _register(Building(
-    BuildingId.EVIL_FORTRESS, Decimal(9), alignment.EVIL, Decimal(100000), Decimal(145e6)
-))
-HELL_PORTAL = _register(Building(
-    BuildingId.HELL_PORTAL, Decimal(10), alignment.EVIL, Decimal(1.2e6), Decimal(3.2e9)
-))
-HALL_OF_LEGENDS = _register(Building(
-    BuildingId.HALL_OF_LEGENDS, Decimal(11), alignment.NONE, Decimal(250000), Decimal(2e11),
-    _name_override='Hall of Legends'
-))
+# Defined from entities.json by _load; declared here so type checkers know them
+FARM: Building
+INN: Building
+BLACKSMITH: Building
+DEEP_MINE: Building
+STONE_PILLARS: Building
+ALCHEMIST_LAB: Building
+MONASTERY: Building
+LABYRINTH: Building
+IRON_STRONGHOLD: Building
+ANCIENT_PYRAMID: Building
+WARRIOR_BARRACKS: Building
+KNIGHTS_JOUST: Building
+WIZARD_TOWER: Building
+CATHEDRAL: Building
+CITADEL: Building
+ROYAL_CASTLE: Building
+HEAVENS_GATE: Building
+SLAVE_PEN: Building
+ORCISH_ARENA: Building
+WITCH_CONCLAVE: Building
+DARK_TEMPLE: Building
+NECROPOLIS: Building
+EVIL_FORTRESS: Building
+HELL_PORTAL: Building
+HALL_OF_LEGENDS: Building
+
+
+def _load() -> None:
+    for entry in table.load()['buildings']:
+        building = _register(Building(
+            BuildingId[entry['id']], Decimal(entry['tier']),
+            alignment.get(alignment.AlignmentId[entry['alignment']]),
+            Decimal(entry['production']), Decimal(entry['price']), entry.get('name')
+        ))
+        # Exposed as a module attribute named after its id, e.g. building.FARM
+        globals()[building.id_.name] = building
+
+
+_load()
@@ -3,24 +3,38 @@
 from __future__ import annotations
 
 from abc import abstractmethod, ABC
-from dataclasses import dataclass, field
-from typing import ClassVar
+from enum import Enum
+from typing import Dict, Type
 
 
-@dataclass(frozen=True)
-class _Entity:
-    uid: int = field(init=False)
+def dense_index(id_: Enum) -> int:
+    """Position of id_ in its enum, so the ids of a type number 0 to len(enum) - 1
 
+    Unlike the values (e.g. FactionId.NONE is -1, UpgradeId values run into the hundreds of
+    thousands) these fit array indices, and being fixed by the enum's definition they do not
+    depend on import order or differ between processes.
+    """
+    try:
+        return _POSITIONS[type(id_)][id_]
+    except KeyError:
+        positions = _POSITIONS[type(id_)] = {member: i for i, member in enumerate(type(id_))}
+        return positions[id_]
 
-class Entity(_Entity, ABC):
-    """Base class for all game entities"""
-    _next_uid: ClassVar[int] = 0
 
-    uid: int = field(init=False)
+_POSITIONS: Dict[Type[Enum], Dict[Enum, int]] = {}
 
-    def __post_init__(self) -> None:
-        object.__setattr__(self, 'uid', Entity._next_uid)
-        Entity._next_uid += 1
+
+class Entity(ABC):
+    """Base class for all game entities
+
+    Entities are defined once each and compared by identity; subclasses are declared with
+    @dataclass(frozen=True, eq=False).
+    """
+
+    @property
+    def index(self) -> int:
+        """Dense index of this entity among those of its type (see dense_index)"""
+        return dense_index(self.id_)  # type: ignore[attr-defined]
 
     @property
     @abstractmethod
@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from enum import Enum, unique
 from typing import Dict, Iterable
 
-from . import alignment, entity
+from . import alignment, entity, table
 
 
 @unique
@@ -36,7 +36,7 @@ class FactionType(Enum):
     ELITE = 3
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class Faction(entity.Entity):
     id_: FactionId
     type_: FactionType
@@ -77,26 +77,33 @@ def get(id_: FactionId) -> Faction:
 
 _FACTIONS: Dict[FactionId, Faction] = {}
 
-NONE = _register(Faction(FactionId.NONE, FactionType.NONE, alignment.NONE))
-
-# Base Factions
-FAIRY = _register(Faction(FactionId.FAIRY, FactionType.BASE, alignment.GOOD))
-ELF = _register(Faction(FactionId.ELF, FactionType.BASE, alignment.GOOD))
-ANGEL = _register(Faction(FactionId.ANGEL, FactionType.BASE, alignment.GOOD))
-GOBLIN = _register(Faction(FactionId.GOBLIN, FactionType.BASE, alignment.EVIL))
-UNDEAD = _register(Faction(FactionId.UNDEAD, FactionType.BASE, alignment.EVIL))
-DEMON = _register(Faction(FactionId.DEMON, FactionType.BASE, alignment.EVIL))
-TITAN = _register(Faction(FactionId.TITAN, FactionType.BASE, alignment.NEUTRAL))
-DRUID = _register(Faction(FactionId.DRUID, FactionType.BASE, alignment.NEUTRAL))
-FACELESS = _register(Faction(FactionId.FACELESS, FactionType.BASE, alignment.NEUTRAL))
-MERCENARY = _register(Faction(FactionId.MERCENARY, FactionType.BASE, alignment.NONE))
-
-# Prestige Factions
-DWARF = _register(Faction(FactionId.DWARF, FactionType.PRESTIGE, alignment.GOOD))
-DROW = _register(Faction(FactionId.DROW, FactionType.PRESTIGE, alignment.EVIL))
-DRAGON = _register(Faction(FactionId.DRAGON, FactionType.PRESTIGE, alignment.NEUTRAL))
-
-# Elite Factions
-ARCHON = _register(Faction(FactionId.ARCHON, FactionType.ELITE, alignment.ORDER))
-DJINN = _register(Faction(FactionId.DJINN, FactionType.ELITE, alignment.CHAOS))
-MAKERS = _register(Faction(FactionId.MAKERS, FactionType.ELITE, alignment.BALANCE))
+# Defined from entities.json by _load; declared here so type checkers know them
+NONE: Faction
+FAIRY: Faction
+ELF: Faction
+ANGEL: Faction
+GOBLIN: Faction
+UNDEAD: Faction
+DEMON: Faction
+TITAN: Faction
+DRUID: Faction
+FACELESS: Faction
+DWARF: Faction
+DROW: Faction
+MERCENARY: Faction
+DRAGON: Faction
+ARCHON: Faction
+DJINN: Faction
+MAKERS: Faction
+
+
+def _load() -> None:
+    for entry in table.load()['factions']:
+        faction = _register(Faction(
+            FactionId[entry['id']], FactionType[entry['type']],
+            alignment.get(alignment.AlignmentId[entry['alignment']])
+        ))
+        globals()[faction.id_.name] = faction
+
+
+_load()
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import functools
 from enum import Enum, auto, unique
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from decimal import Decimal
-from typing import Any, Dict, Optional, Union, TYPE_CHECKING
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union, TYPE_CHECKING
 
 from . import entity
 
@@ -31,19 +32,93 @@ class Target(Enum):
     OFFLINE_CLICKS_PER_SECOND = auto()
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class Modifier(entity.Entity):
     strategy: Strategy
     target: Target
     amount: callback.Amount
     applies_to: callback.Filter = lambda _state, _target: True
     owner: Optional[entity.Entity] = None
+    # See slot()
+    slot: int = field(init=False, repr=False)
+    # Dense index in the Registry of the owner's type, None until registered there (copies made
+    # with dataclasses.replace are not registered)
+    index: Optional[int] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, 'slot', slot(self.strategy, self.target))
 
     @property
     def name(self) -> str:
         raise NotImplementedError
 
 
+class Registry:
+    """Modifiers of one type of owner, e.g. every upgrade's effects, numbered from 0
+
+    Effects are numbered by owner, in the order of the owners' ids (see entity.dense_index), then
+    by position among the owner's effects. counts gives the number of effects of every owner that
+    may register, so the numbering does not depend on which owners are defined first and is the
+    same in every process.
+    """
+
+    def __init__(self, counts: Mapping[Enum, int]) -> None:
+        self._counts = dict(counts)
+        self._offsets: Dict[Enum, int] = {}
+        total = 0
+        for owner_id in sorted(counts, key=entity.dense_index):
+            self._offsets[owner_id] = total
+            total += counts[owner_id]
+        self._modifiers: List[Optional[Modifier]] = [None] * total
+
+    def register(self, mod: Modifier) -> Modifier:
+        if mod.index is not None:
+            raise ValueError(f'Modifier is already registered with index {mod.index}')
+
+        owner_id = getattr(mod.owner, 'id_', None)
+        effects = getattr(mod.owner, 'effects', ())
+        if owner_id not in self._offsets or len(effects) != self._counts[owner_id]:
+            raise ValueError(f'No numbering for the effects of {mod.owner!r}')
+
+        position = next(i for i, effect in enumerate(effects) if effect is mod)
+        index = self._offsets[owner_id] + position
+        object.__setattr__(mod, 'index', index)
+        self._modifiers[index] = mod
+        return mod
+
+    def get(self, index: int) -> Modifier:
+        mod = self._modifiers[index]
+        if mod is None:
+            raise IndexError(f'No modifier registered with index {index}')
+        return mod
+
+    def __len__(self) -> int:
+        return len(self._modifiers)
+
+
+# Modifiers are grouped by strategy and target into SLOTS flat slots, numbered by slot()
+SLOTS = len(Strategy) * len(Target)
+
+# (additive slot, multiplicative slot) of each target, keyed by the target's value: Enum members
+# hash in Python, by name, and slots are looked up on every apply_modifiers
+_TARGET_SLOTS = {
+    target._value_: tuple(
+        entity.dense_index(strategy) * len(Target) + entity.dense_index(target)
+        for strategy in Strategy
+    )
+    for target in Target
+}
+
+
+def slot(strategy: Strategy, target: Target) -> int:
+    return _TARGET_SLOTS[target._value_][entity.dense_index(strategy)]
+
+
+def slots(target: Target) -> Tuple[int, int]:
+    """(additive slot, multiplicative slot) of target"""
+    return _TARGET_SLOTS[target._value_]  # type: ignore[return-value]
+
+
 def additive(
         target: Target, amount: callback.Amount,
         applies_to: callback.Filter = None, id_: Optional[str] = None) -> Modifier:
@@ -67,8 +142,40 @@ def multiplicative(
 
 
 def fixed(value: Union[Decimal, float]) -> callback.Amount:
-    """Define an amount callback that always returns a fixed value"""
-    def _(_state: simulator.GameState, _target: Any) -> Decimal:
-        return Decimal(value)
+    """Define an amount callback that always returns a fixed value
+
+    Equal values share one callback, so every fixed(2) multiplier refers to the same object.
+    """
+    return _fixed(Decimal(value))
+
+
+@functools.lru_cache(maxsize=None)
+def _fixed(amount: Decimal) -> callback.Amount:
+    # amount in each numeric backend's representation, keyed by the backend's type
+    converted: Dict[type, Any] = {Decimal: amount}
+
+    def _(state: simulator.GameState, _target: Any) -> Any:
+        numeric = state.numeric
+        try:
+            return converted[numeric.type_]
+        except KeyError:
+            value = converted[numeric.type_] = numeric.convert(amount)
+            return value
+
+    return _
+
+
+def production_fraction(fraction: Union[Decimal, float]) -> callback.Amount:
+    """Define an amount callback that is a fraction of the state's total production"""
+    # Fractions are written as decimals (0.01): take a float's repr rather than its binary value
+    if isinstance(fraction, float):
+        fraction = Decimal(repr(fraction))
+    return _production_fraction(Decimal(fraction))
+
+
+@functools.lru_cache(maxsize=None)
+def _production_fraction(fraction: Decimal) -> callback.Amount:
+    def _(state: simulator.GameState, _target: Any) -> Decimal:
+        return state.numeric.convert(fraction) * state.total_production()
 
     return _
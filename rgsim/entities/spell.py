@@ -0,0 +1,107 @@
+"""Spell definitions
+
+A spell costs mana to cast. Its effects are modifiers registered with the game state while it is
+active, for its duration after casting; a spell may also have an instant effect applied once when
+cast (e.g. Tax Collection).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from decimal import Decimal
+from enum import Enum, unique
+from typing import Callable, Dict, Iterable, Optional, TYPE_CHECKING
+
+from . import building, entity, modifier
+from .. import filters
+
+if TYPE_CHECKING:
+    from .. import simulator
+
+
+@unique
+class SpellId(Enum):
+    """Id for spell (as stored in Spell records of a save)
+
+    The game numbers the neutral spells first (Tax Collection, Call to Arms, Holy Light, Blood
+    Frenzy, Gem Grinder), then one spell per faction in FactionId order.
+    """
+    TAX_COLLECTION = 0
+    CALL_TO_ARMS = 1
+    FAIRY_CHANTING = 5
+
+
+@dataclass(frozen=True, eq=False)
+class Spell(entity.Entity):
+    id_: SpellId
+    cost: Decimal
+    # Seconds the effects stay active for; 0 for spells with only an instant effect
+    duration: Decimal = Decimal(0)
+    effects: Iterable[modifier.Modifier] = field(default_factory=tuple)
+    on_cast: Optional[Callable[[simulator.GameState], None]] = None
+    _name_override: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        if self._name_override is not None:
+            return self._name_override
+
+        return self.id_.name.replace('_', ' ').title()
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, 'effects', tuple(replace(m, owner=self) for m in self.effects))
+
+
+def _register(spell: Spell) -> Spell:
+    if spell.id_ in _SPELLS:
+        raise ValueError(f'Duplicate spell registration: {spell.name}')
+
+    _SPELLS[spell.id_] = spell
+    return spell
+
+
+def get(id_: SpellId) -> Spell:
+    return _SPELLS[id_]
+
+
+def all() -> Iterable[Spell]:
+    return _SPELLS.values()
+
+
+_SPELLS: Dict[SpellId, Spell] = {}
+
+
+def _collect_taxes(state: simulator.GameState) -> None:
+    state.gold += state.total_production() * state.numeric.convert(30)
+
+
+TAX_COLLECTION = _register(Spell(
+    SpellId.TAX_COLLECTION, Decimal(400), on_cast=_collect_taxes
+))
+CALL_TO_ARMS = _register(Spell(
+    SpellId.CALL_TO_ARMS, Decimal(800), Decimal(30),
+    effects=(
+        modifier.Modifier(
+            modifier.Strategy.MULTIPLICATIVE,
+            modifier.Target.BUILDING_PRODUCTION,
+            modifier.fixed(2.5)
+        ),
+    )
+))
+FAIRY_CHANTING = _register(Spell(
+    SpellId.FAIRY_CHANTING, Decimal(900), Decimal(20),
+    effects=(
+        modifier.Modifier(
+            modifier.Strategy.MULTIPLICATIVE,
+            modifier.Target.BUILDING_PRODUCTION,
+            modifier.fixed(5),
+            filters.building(building.FARM, building.INN, building.BLACKSMITH)
+        ),
+    )
+))
+
+# Effects of every spell, numbered once every spell is defined
+EFFECTS = modifier.Registry({s.id_: len(tuple(s.effects)) for s in _SPELLS.values()})
+for _spell in _SPELLS.values():
+    for _effect in _spell.effects:
+        EFFECTS.register(_effect)
@@ -0,0 +1,82 @@
+"""Declarative entity definitions, read from entities.json
+
+The JSON file is the source of truth for buildings, factions and upgrades. Parsing it is the
+expensive part of loading it, so the parsed table is also kept compiled with marshal under
+__pycache__ next to it, stamped with the source's modification time and size like a .pyc file.
+Later imports load the whole table from there in one step, and recompile it whenever the JSON
+changes.
+"""
+
+from __future__ import annotations
+
+import marshal
+import os
+from typing import Any, Dict, Optional
+
+SOURCE = os.path.join(os.path.dirname(__file__), 'entities.json')
+
+# Bump when the layout of the compiled file changes
+_FORMAT = 1
+
+_table: Optional[Dict[str, Any]] = None
+
+
+def cache_path(source: str = SOURCE) -> str:
+    directory, name = os.path.split(source)
+    return os.path.join(directory, '__pycache__', f'{name}.{_FORMAT}.marshal')
+
+
+def _stamp(source: str) -> Any:
+    stat = os.stat(source)
+    return (_FORMAT, stat.st_mtime_ns, stat.st_size)
+
+
+def _read_compiled(source: str, stamp: Any) -> Optional[Dict[str, Any]]:
+    try:
+        with open(cache_path(source), 'rb') as file:
+            compiled_stamp, table = marshal.load(file)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return table if compiled_stamp == stamp else None
+
+
+def _write_compiled(source: str, stamp: Any, table: Dict[str, Any]) -> None:
+    path = cache_path(source)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temporary, 'wb') as file:
+            marshal.dump((stamp, table), file)
+        os.replace(temporary, path)
+    except OSError:
+        # A read-only install just parses the JSON every time
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+
+def compile(source: str = SOURCE) -> Dict[str, Any]:  # pylint: disable=redefined-builtin
+    """Parse source, refreshing its compiled copy"""
+    import json  # pylint: disable=import-outside-toplevel
+
+    stamp = _stamp(source)
+    with open(source, encoding='utf-8') as file:
+        table = json.load(file)
+    _write_compiled(source, stamp, table)
+    return table
+
+
+def read(source: str = SOURCE) -> Dict[str, Any]:
+    """The table defined by source, from its compiled copy when that is up to date"""
+    table = _read_compiled(source, _stamp(source))
+    return table if table is not None else compile(source)
+
+
+def load() -> Dict[str, Any]:
+    """The entity table, read once per process"""
+    global _table  # pylint: disable=global-statement
+
+    if _table is None:
+        _table = read()
+    return _table
@@ -3,13 +3,17 @@ from __future__ import annotations
 from enum import unique, Enum
 from dataclasses import dataclass, field, replace
 from decimal import Decimal
-from typing import Callable, Dict, Iterable, Optional, TYPE_CHECKING
+from typing import (
+    AbstractSet, Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, NamedTuple, Optional,
+    Set, Tuple, TYPE_CHECKING
+)
 
-from . import alignment, building, entity, modifier
+from . import alignment, building, entity, modifier, table
+from . import faction as faction_
 from .. import filters
 
 if TYPE_CHECKING:
-    from .. import simulator
+    from .. import callback, simulator
 
 
 @unique
@@ -61,13 +65,22 @@ class UpgradeId(Enum):
     POULTRY_FEED = 501019
 
 
-@dataclass(frozen=True)
+def always(_state: simulator.GameState) -> bool:
+    """Condition that always holds, and depends on nothing"""
+    return True
+
+
+@dataclass(frozen=True, eq=False)
 class Upgrade(entity.Entity):
     id_: UpgradeId
     cost: Decimal
     effects: Iterable[modifier.Modifier] = field(default_factory=tuple)
-    available: Callable[[simulator.GameState], bool] = lambda _: True
-    unlocked: Callable[[simulator.GameState], bool] = lambda _: True
+    available: Callable[[simulator.GameState], bool] = always
+    unlocked: Callable[[simulator.GameState], bool] = always
+    # Everything available and unlocked read from the state (see the *_dependency helpers), so
+    # they need re-evaluating only when one of these changes. None, the default unless both are
+    # always, means undeclared: they are re-evaluated after every change.
+    depends_on: Optional[FrozenSet[Hashable]] = None
     _name_override: Optional[str] = None
 
     @property
@@ -78,8 +91,86 @@ class Upgrade(entity.Entity):
         return self.id_.name.replace('_', ' ').title()
 
     def __post_init__(self) -> None:
-        super().__post_init__()
-        object.__setattr__(self, 'effects', (replace(m, owner=self) for m in self.effects))
+        object.__setattr__(self, 'effects', tuple(replace(m, owner=self) for m in self.effects))
+        if self.depends_on is None and self.available is always and self.unlocked is always:
+            object.__setattr__(self, 'depends_on', frozenset())
+
+
+def building_dependency(id_: building.BuildingId) -> Hashable:
+    """Dependency on the owned count of a building"""
+    return ('building', id_)
+
+
+def upgrade_dependency(id_: UpgradeId) -> Hashable:
+    """Dependency on whether an upgrade is purchased"""
+    return ('upgrade', id_)
+
+
+def owns(building_id: building.BuildingId, count: int) -> Callable[[simulator.GameState], bool]:
+    """Condition that at least count of a building are owned"""
+    def _(state: simulator.GameState) -> bool:
+        return state.buildings[building_id].owned >= count
+
+    return _
+
+
+def purchased(upgrade_id: UpgradeId) -> Callable[[simulator.GameState], bool]:
+    """Condition that an upgrade is purchased"""
+    def _(state: simulator.GameState) -> bool:
+        return upgrade_id in state.upgrades and state.upgrades[upgrade_id].purchased
+
+    return _
+
+
+def all_of(
+        *conditions: Callable[[simulator.GameState], bool]
+) -> Callable[[simulator.GameState], bool]:
+    """Condition that every one of conditions holds"""
+    def _(state: simulator.GameState) -> bool:
+        # Not the builtin all, which this module's all() shadows
+        for condition in conditions:
+            if not condition(state):
+                return False
+        return True
+
+    return _
+
+
+class Scope(NamedTuple):
+    """Faction and alignment under which a group of upgrades is reachable; None matches any"""
+    faction: Optional[faction_.FactionId] = None
+    alignment: Optional[alignment.AlignmentId] = None
+
+    def matches(
+            self, faction_id: faction_.FactionId,
+            alignment_ids: AbstractSet[alignment.AlignmentId]) -> bool:
+        return (self.faction is None or self.faction == faction_id) \
+            and (self.alignment is None or self.alignment in alignment_ids)
+
+
+UNIVERSAL = Scope()
+
+
+def _group(scope: Scope) -> Callable[[Callable[[], None]], Callable[[], None]]:
+    """Declare a function defining a group of upgrades, run the first time one is needed"""
+    def register(loader: Callable[[], None]) -> Callable[[], None]:
+        _GROUPS.append((scope, loader))
+        return loader
+
+    return register
+
+
+def _load(index: int) -> None:
+    global _loading  # pylint: disable=global-statement
+
+    if index in _LOADED:
+        return
+    _LOADED.add(index)
+    _loading, loader = _GROUPS[index]
+    try:
+        loader()
+    finally:
+        _loading = UNIVERSAL
 
 
 def _register(u: Upgrade) -> Upgrade:
@@ -88,470 +179,217 @@ def _register(u: Upgrade) -> Upgrade:
         raise ValueError(err_str)
 
     _ALL_UPGRADES[u.id_] = u
+    _SCOPES[u.id_] = _loading
+    for effect in u.effects:
+        EFFECTS.register(effect)
+    # Exposed as a module attribute named after its id, like the other entity modules
+    globals()[u.id_.name] = u
     return u
 
 
 def get(id_: UpgradeId) -> Upgrade:
+    """Upgrade with id, defining groups of upgrades until it is found"""
+    if id_ not in _ALL_UPGRADES:
+        for index in range(len(_GROUPS)):
+            _load(index)
+            if id_ in _ALL_UPGRADES:
+                break
     return _ALL_UPGRADES[id_]
 
 
 def all() -> Iterable[Upgrade]:
+    for index in range(len(_GROUPS)):
+        _load(index)
     return list(_ALL_UPGRADES.values())
 
 
+def scope(id_: UpgradeId) -> Scope:
+    get(id_)
+    return _SCOPES[id_]
+
+
+def reachable(
+        faction_id: faction_.FactionId = faction_.FactionId.NONE,
+        alignment_id: alignment.AlignmentId = alignment.AlignmentId.NONE) -> List[Upgrade]:
+    """Upgrades that can apply under a faction and alignment, defining only their groups
+
+    The faction's own alignment counts as well as alignment_id.
+    """
+    alignment_ids = {alignment_id, faction_.get(faction_id).alignment.id_}
+    for index, (group_scope, _loader) in enumerate(_GROUPS):
+        if group_scope.matches(faction_id, alignment_ids):
+            _load(index)
+    return [
+        u for u in _ALL_UPGRADES.values() if _SCOPES[u.id_].matches(faction_id, alignment_ids)
+    ]
+
+
+def __getattr__(name: str) -> Upgrade:
+    if name in UpgradeId.__members__:
+        return get(UpgradeId[name])
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
 _ALL_UPGRADES: Dict[UpgradeId, Upgrade] = {}
+# Effects of every upgrade, numbered up front from entities.json
+EFFECTS = modifier.Registry({
+    UpgradeId[entry['id']]: len(entry.get('effects', ()))
+    for group in table.load()['upgrade_groups'] for entry in group['upgrades']
+})
+_SCOPES: Dict[UpgradeId, Scope] = {}
+_GROUPS: List[Tuple[Scope, Callable[[], None]]] = []
+_LOADED: Set[int] = set()
+_loading = UNIVERSAL
 
-GRINDING_DEDICATION: Upgrade = _register(Upgrade(
-    UpgradeId.GRINDING_DEDICATION, Decimal(1e21),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(2),
-            filters.alignment(alignment.NEUTRAL)
-        ),
-    )
-))
-
-#region Deeds
-PROOF_OF_EVIL_DEED: Upgrade = _register(Upgrade(UpgradeId.PROOF_OF_EVIL_DEED, Decimal(25000)))
-PROOF_OF_GOOD_DEED: Upgrade = _register(Upgrade(UpgradeId.PROOF_OF_GOOD_DEED, Decimal(25000)))
-PROOF_OF_NEUTRALITY: Upgrade = _register(Upgrade(UpgradeId.PROOF_OF_NEUTRALITY, Decimal(1e16)))
-PROOF_OF_BALANCE: Upgrade = _register(Upgrade(UpgradeId.PROOF_OF_BALANCE, Decimal(1e15)))
-PROOF_OF_CHAOS: Upgrade = _register(Upgrade(UpgradeId.PROOF_OF_CHAOS, Decimal(1e15)))
-PROOF_OF_ORDER: Upgrade = _register(Upgrade(UpgradeId.PROOF_OF_ORDER, Decimal(1e15)))
-#endregion
-
-#region Clicking
-STURDY_TREASURE: Upgrade = _register(Upgrade(
-    UpgradeId.STURDY_TREASURE, Decimal(500),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.CLICK_REWARD,
-            modifier.fixed(4)
-        ),
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.OFFLINE_CLICKS_PER_SECOND,
-            modifier.fixed(1)
-        ),
-    )
-))
-DURABLE_TREASURE: Upgrade = _register(Upgrade(
-    UpgradeId.DURABLE_TREASURE, Decimal(5000),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.CLICK_REWARD,
-            modifier.fixed(45)
-        ),
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.OFFLINE_CLICKS_PER_SECOND,
-            modifier.fixed(1)
-        ),
-    )
-))
-REINFORCED_TREASURE: Upgrade = _register(Upgrade(
-    UpgradeId.REINFORCED_TREASURE, Decimal(5e6),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.CLICK_REWARD,
-            modifier.fixed(4950)
-        ),
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.OFFLINE_CLICKS_PER_SECOND,
-            modifier.fixed(1)
-        ),
-    )
-))
-RESILIENT_TREASURE: Upgrade = _register(Upgrade(
-    UpgradeId.RESILIENT_TREASURE, Decimal(5e9),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.CLICK_REWARD,
-            modifier.fixed(500000)
-        ),
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.OFFLINE_CLICKS_PER_SECOND,
-            modifier.fixed(1)
-        ),
-    )
-))
-UNBREAKABLE_TREASURE: Upgrade = _register(Upgrade(
-    UpgradeId.UNBREAKABLE_TREASURE, Decimal(5e13),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.CLICK_REWARD,
-            modifier.fixed(5e7)
-        ),
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.OFFLINE_CLICKS_PER_SECOND,
-            modifier.fixed(1)
-        ),
-    )
-))
-ETERNAL_TREASURE: Upgrade = _register(Upgrade(
-    UpgradeId.ETERNAL_TREASURE, Decimal(5e16),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.CLICK_REWARD,
-            modifier.fixed(5e10)
-        ),
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.OFFLINE_CLICKS_PER_SECOND,
-            modifier.fixed(1)
-        ),
-    )
-))
-FILLED_TREASURE: Upgrade = _register(Upgrade(
-    UpgradeId.FILLED_TREASURE, Decimal(10000),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.CLICK_REWARD,
-            modifier.fixed(1.25)
-        ),
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(1.25)
-        ),
-    )
-))
-RICH_TREASURE: Upgrade = _register(Upgrade(
-    UpgradeId.RICH_TREASURE, Decimal(5e7),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.CLICK_REWARD,
-            modifier.fixed(1.25)
-        ),
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(1.25)
-        ),
-    )
-))
-WEALTHY_TREASURE: Upgrade = _register(Upgrade(
-    UpgradeId.WEALTHY_TREASURE, Decimal(1e11),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.CLICK_REWARD,
-            modifier.fixed(1.25)
-        ),
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(1.25)
-        ),
-    )
-))
-OPULENT_TREASURE: Upgrade = _register(Upgrade(
-    UpgradeId.OPULENT_TREASURE, Decimal(5e12),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.CLICK_REWARD,
-            modifier.fixed(1.25)
-        ),
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(1.25)
-        ),
-    )
-))
-OVERFLOWING_TREASURE: Upgrade = _register(Upgrade(
-    UpgradeId.OVERFLOWING_TREASURE, Decimal(5e15),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.CLICK_REWARD,
-            modifier.fixed(1.25)
-        ),
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(1.25)
-        ),
-    )
-))
-PRECIOUS_TREASURE: Upgrade = _register(Upgrade(
-    UpgradeId.PRECIOUS_TREASURE, Decimal(50000),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.CLICK_REWARD,
-            lambda state, _target: 0.01 * state.total_production()
-        ),
-    )
-))
-ORNATE_TREASURE: Upgrade = _register(Upgrade(
-    UpgradeId.ORNATE_TREASURE, Decimal(5e7),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.CLICK_REWARD,
-            lambda state, _target: 0.01 * state.total_production()
-        ),
-    )
-))
-ADORNED_TREASURE: Upgrade = _register(Upgrade(UpgradeId.ADORNED_TREASURE, Decimal(5e10),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.CLICK_REWARD,
-            lambda state, _target: 0.01 * state.total_production()
-        ),
-    )
-))
-EMBELLISHED_TREASURE: Upgrade = _register(Upgrade(UpgradeId.EMBELLISHED_TREASURE, Decimal(5e13),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.CLICK_REWARD,
-            lambda state, _target: 0.01 * state.total_production()
-        ),
-    )
-))
-RESPLENDENT_TREASURE: Upgrade = _register(Upgrade(UpgradeId.RESPLENDENT_TREASURE, Decimal(5e15),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.CLICK_REWARD,
-            lambda state, _target: 0.01 * state.total_production()
-        ),
-    )
-))
-#endregion
-#region Farms
-CROP_ROTATION: Upgrade = _register(Upgrade(UpgradeId.CROP_ROTATION, Decimal(200),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(2),
-            filters.building(building.FARM)
-        ),
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.ASSISTANTS,
-            modifier.fixed(1)
-        ),
-    )
-))
-IRRIGATION: Upgrade = _register(Upgrade(UpgradeId.IRRIGATION, Decimal(6580),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(3),
-            filters.building(building.FARM)
-        ),
-        modifier.Modifier(
-            modifier.Strategy.ADDITIVE,
-            modifier.Target.ASSISTANTS,
-            modifier.fixed(1)
-        ),
-    )
-))
-PROFESSIONAL_FARMERS: Upgrade = _register(Upgrade(
-    UpgradeId.PROFESSIONAL_FARMERS, Decimal(1.07e7),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(4),
-            filters.building(building.FARM)
-        ),
-    )
-))
-PERFECT_SEEDS: Upgrade = _register(Upgrade(
-    UpgradeId.PERFECT_SEEDS, Decimal(5.09e11),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(5),
-            filters.building(building.FARM)
-        ),
-    )
-))
-VERTICAL_FARMS: Upgrade = _register(Upgrade(
-    UpgradeId.VERTICAL_FARMS, Decimal(6.895e14),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(6),
-            filters.building(building.FARM)
-        ),
-    )
-))
-FARMING_TOOLS: Upgrade = _register(Upgrade(
-    UpgradeId.FARMING_TOOLS, Decimal(9.716e20),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(5),
-            filters.building(building.FARM)
-        ),
-    )
-))
-ANIMAL_HERDING: Upgrade = _register(Upgrade(
-    UpgradeId.ANIMAL_HERDING, Decimal(1.331e27),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(4),
-            filters.building(building.FARM)
-        ),
-    )
-))
-HEAVY_PLOW: Upgrade = _register(Upgrade(
-    UpgradeId.HEAVY_PLOW, Decimal(1.787e33),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(3),
-            filters.building(building.FARM)
-        ),
-    )
-))
-GOLDEN_SPOON: Upgrade = _register(Upgrade(
-    UpgradeId.GOLDEN_SPOON, Decimal(2.36e39),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(2),
-            filters.building(building.FARM)
-        ),
-    )
-))
-INCREASED_FERTILE_AREA: Upgrade = _register(Upgrade(
-    UpgradeId.INCREASED_FERTILE_AREA, Decimal(3.08e45),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(3),
-            filters.building(building.FARM)
-        ),
-    )
-))
-MAGICALLY_MODIFIED_ORGANISMS: Upgrade = _register(Upgrade(
-    UpgradeId.MAGICALLY_MODIFIED_ORGANISMS, Decimal(3.978e51),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(4),
-            filters.building(building.FARM)
-        ),
-    )
-))
-SUPERIOR_FERTILIZER: Upgrade = _register(Upgrade(
-    UpgradeId.SUPERIOR_FERTILIZER, Decimal(5.096e57),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(5),
-            filters.building(building.FARM)
-        ),
-    )
-))
-SENTIENT_VEGETABLES: Upgrade = _register(Upgrade(
-    UpgradeId.SENTIENT_VEGETABLES, Decimal(6.483e63),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(6),
-            filters.building(building.FARM)
-        ),
-    )
-))
-CORN_MULTIPLICATION: Upgrade = _register(Upgrade(
-    UpgradeId.CORN_MULTIPLICATION, Decimal(8.199e69),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(5),
-            filters.building(building.FARM)
-        ),
-    )
-))
-FRUIT_ARMY: Upgrade = _register(Upgrade(
-    UpgradeId.FRUIT_ARMY, Decimal(1.118e79),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(4),
-            filters.building(building.FARM)
-        ),
-    )
-))
-MIXED_MANURE: Upgrade = _register(Upgrade(
-    UpgradeId.MIXED_MANURE, Decimal(1.782e94),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(5),
-            filters.building(building.FARM)
-        ),
-    )
-))
-SIDE_ORCHARDS: Upgrade = _register(Upgrade(
-    UpgradeId.SIDE_ORCHARDS, Decimal(2.829e109),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(6),
-            filters.building(building.FARM)
-        ),
-    )
-))
-CATTLE_DOMAIN: Upgrade = _register(Upgrade(
-    UpgradeId.CATTLE_DOMAIN, Decimal(4.477e124),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(5),
-            filters.building(building.FARM)
-        ),
+# Defined from entities.json by get when first used (see __getattr__); declared here so type
+# checkers know them
+GRINDING_DEDICATION: Upgrade
+PROOF_OF_EVIL_DEED: Upgrade
+PROOF_OF_GOOD_DEED: Upgrade
+PROOF_OF_NEUTRALITY: Upgrade
+PROOF_OF_BALANCE: Upgrade
+PROOF_OF_CHAOS: Upgrade
+PROOF_OF_ORDER: Upgrade
+STURDY_TREASURE: Upgrade
+DURABLE_TREASURE: Upgrade
+REINFORCED_TREASURE: Upgrade
+RESILIENT_TREASURE: Upgrade
+UNBREAKABLE_TREASURE: Upgrade
+ETERNAL_TREASURE: Upgrade
+FILLED_TREASURE: Upgrade
+RICH_TREASURE: Upgrade
+WEALTHY_TREASURE: Upgrade
+OPULENT_TREASURE: Upgrade
+OVERFLOWING_TREASURE: Upgrade
+PRECIOUS_TREASURE: Upgrade
+ORNATE_TREASURE: Upgrade
+ADORNED_TREASURE: Upgrade
+EMBELLISHED_TREASURE: Upgrade
+RESPLENDENT_TREASURE: Upgrade
+ABSENT_RULER: Upgrade
+MISSING_RULER: Upgrade
+NONEXISTENT_RULER: Upgrade
+CROP_ROTATION: Upgrade
+IRRIGATION: Upgrade
+PROFESSIONAL_FARMERS: Upgrade
+PERFECT_SEEDS: Upgrade
+VERTICAL_FARMS: Upgrade
+FARMING_TOOLS: Upgrade
+ANIMAL_HERDING: Upgrade
+HEAVY_PLOW: Upgrade
+GOLDEN_SPOON: Upgrade
+INCREASED_FERTILE_AREA: Upgrade
+MAGICALLY_MODIFIED_ORGANISMS: Upgrade
+SUPERIOR_FERTILIZER: Upgrade
+SENTIENT_VEGETABLES: Upgrade
+CORN_MULTIPLICATION: Upgrade
+FRUIT_ARMY: Upgrade
+MIXED_MANURE: Upgrade
+SIDE_ORCHARDS: Upgrade
+CATTLE_DOMAIN: Upgrade
+POULTRY_FEED: Upgrade
+
+
+def _amount(spec: Dict[str, Any]) -> callback.Amount:
+    if 'fixed' in spec:
+        return modifier.fixed(spec['fixed'])
+    if 'production_fraction' in spec:
+        return modifier.production_fraction(spec['production_fraction'])
+    raise ValueError(f'Unknown amount {spec!r}')
+
+
+def _filter(spec: Dict[str, Any]) -> callback.Filter:
+    """Filter callback for spec, shared between every effect with an equal spec"""
+    if len(spec) != 1 or not spec.keys() <= {'buildings', 'alignments'}:
+        raise ValueError(f'Unknown filter {spec!r}')
+    (kind, names), = spec.items()
+    key = (kind, tuple(names))
+
+    if key not in _FILTERS:
+        if kind == 'buildings':
+            _FILTERS[key] = filters.building(*(building.get(building.BuildingId[n]) for n in names))
+        else:
+            _FILTERS[key] = filters.alignment(
+                *(alignment.get(alignment.AlignmentId[n]) for n in names)
+            )
+    return _FILTERS[key]
+
+
+def _effect(spec: Dict[str, Any]) -> modifier.Modifier:
+    kwargs = {'applies_to': _filter(spec['filter'])} if 'filter' in spec else {}
+    return modifier.Modifier(
+        modifier.Strategy[spec['strategy']], modifier.Target[spec['target']],
+        _amount(spec['amount']), **kwargs
     )
-))
-POULTRY_FEED: Upgrade = _register(Upgrade(
-    UpgradeId.POULTRY_FEED, Decimal(1.05e155),
-    effects=(
-        modifier.Modifier(
-            modifier.Strategy.MULTIPLICATIVE,
-            modifier.Target.BUILDING_PRODUCTION,
-            modifier.fixed(4),
-            filters.building(building.FARM)
-        ),
+
+
+def _condition(
+        specs: List[Dict[str, Any]]
+) -> Tuple[Callable[[simulator.GameState], bool], FrozenSet[Hashable]]:
+    """Condition that every spec holds, and the dependencies it reads
+
+    A spec is {"owns": {"building": <BuildingId name>, "count": <n>}} or
+    {"upgrade": <UpgradeId name>}, which holds once that upgrade is purchased.
+    """
+    conditions = []
+    dependencies = set()
+    for spec in specs:
+        if spec.keys() == {'owns'}:
+            building_id = building.BuildingId[spec['owns']['building']]
+            conditions.append(owns(building_id, spec['owns']['count']))
+            dependencies.add(building_dependency(building_id))
+        elif spec.keys() == {'upgrade'}:
+            upgrade_id = UpgradeId[spec['upgrade']]
+            conditions.append(purchased(upgrade_id))
+            dependencies.add(upgrade_dependency(upgrade_id))
+        else:
+            raise ValueError(f'Unknown condition {spec!r}')
+
+    condition = conditions[0] if len(conditions) == 1 else all_of(*conditions)
+    return condition, frozenset(dependencies)
+
+
+def _upgrade(entry: Dict[str, Any]) -> Upgrade:
+    """Upgrade for an entry of entities.json
+
+    Its available and unlocked conditions are lists of condition specs (see _condition), and
+    its dependencies are those of both.
+    """
+    conditions = {}
+    dependencies: Set[Hashable] = set()
+    for key in ('available', 'unlocked'):
+        if key in entry:
+            conditions[key], depends_on = _condition(entry[key])
+            dependencies |= depends_on
+
+    return Upgrade(
+        UpgradeId[entry['id']], Decimal(entry['cost']),
+        effects=tuple(_effect(e) for e in entry.get('effects', ())),
+        depends_on=frozenset(dependencies) if conditions else None,
+        _name_override=entry.get('name'), **conditions
     )
-))
-#endregion
+
+
+def _table_group(entries: List[Dict[str, Any]]) -> Callable[[], None]:
+    def loader() -> None:
+        for entry in entries:
+            _register(_upgrade(entry))
+
+    return loader
+
+
+def _declare_groups() -> None:
+    """Declare a group for each group of entities.json; its upgrades are built when needed"""
+    for group in table.load()['upgrade_groups']:
+        faction_id = group.get('faction')
+        alignment_id = group.get('alignment')
+        group_scope = Scope(
+            faction_.FactionId[faction_id] if faction_id is not None else None,
+            alignment.AlignmentId[alignment_id] if alignment_id is not None else None,
+        )
+        _group(group_scope)(_table_group(group['upgrades']))
+
+
+_FILTERS: Dict[Hashable, callback.Filter] = {}
+
+_declare_groups()
@@ -0,0 +1,258 @@
+"""Event log of game state changes with checkpoints for fast rewind
+
+Every mutating GameState method emits an Event to the state's listeners once it has been applied.
+An EventLog records them, taking a compact Checkpoint every `checkpoint_interval` events, so the
+state after any event can be rebuilt by restoring the nearest earlier checkpoint and replaying at
+most `checkpoint_interval` events (or the events of one batch, which are checkpointed together).
+"""
+
+from __future__ import annotations
+
+import bisect
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from . import clicks, numeric, simulator
+from .entities import alignment, building, faction, modifier, spell, upgrade
+
+
+@dataclass(frozen=True)
+class Event:
+    def apply(self, state: simulator.GameState) -> None:
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class PurchaseBuilding(Event):
+    building_id: building.BuildingId
+    quantity: Decimal
+
+    def apply(self, state: simulator.GameState) -> None:
+        state.purchase_building(self.building_id, self.quantity)
+
+
+@dataclass(frozen=True)
+class PurchaseUpgrade(Event):
+    upgrade_id: upgrade.UpgradeId
+    spend_gold: bool = False
+
+    def apply(self, state: simulator.GameState) -> None:
+        state.purchase_upgrade(upgrade.get(self.upgrade_id), self.spend_gold)
+
+
+@dataclass(frozen=True)
+class UnpurchaseUpgrade(Event):
+    upgrade_id: upgrade.UpgradeId
+    credit_gold: bool = False
+
+    def apply(self, state: simulator.GameState) -> None:
+        state.unpurchase_upgrade(upgrade.get(self.upgrade_id), self.credit_gold)
+
+
+@dataclass(frozen=True)
+class CastSpell(Event):
+    spell_id: spell.SpellId
+
+    def apply(self, state: simulator.GameState) -> None:
+        state.cast_spell(spell.get(self.spell_id))
+
+
+@dataclass(frozen=True)
+class ExpireSpell(Event):
+    spell_id: spell.SpellId
+
+    def apply(self, state: simulator.GameState) -> None:
+        state.expire_spell(spell.get(self.spell_id))
+
+
+@dataclass(frozen=True)
+class RegisterModifier(Event):
+    modifier: modifier.Modifier
+
+    def apply(self, state: simulator.GameState) -> None:
+        state.register_modifier(self.modifier)
+
+
+@dataclass(frozen=True)
+class DeregisterModifier(Event):
+    modifier: modifier.Modifier
+
+    def apply(self, state: simulator.GameState) -> None:
+        state.deregister_modifier(self.modifier)
+
+
+@dataclass(frozen=True)
+class AdvanceTime(Event):
+    seconds: Decimal
+
+    def apply(self, state: simulator.GameState) -> None:
+        state.advance_time(self.seconds)
+
+
+@dataclass(frozen=True)
+class ChangeScope(Event):
+    """The state's faction and/or alignment changed"""
+    faction: faction.FactionId
+    alignment: alignment.AlignmentId
+
+    def apply(self, state: simulator.GameState) -> None:
+        if state.faction != self.faction:
+            state.faction = self.faction
+        if state.alignment != self.alignment:
+            state.alignment = self.alignment
+
+
+@dataclass(frozen=True)
+class Rollback(Event):
+    """A batch failed and the state was restored to how it was when the batch began
+
+    The batch's own events were never sent, so there is nothing to replay.
+    """
+    def apply(self, state: simulator.GameState) -> None:
+        pass
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """Compact snapshot of everything needed to rebuild a GameState
+
+    Modifiers granted by purchased upgrades, active spells and the default modifiers are implied,
+    so only modifiers registered directly are stored. Spells are stored only if their state
+    differs from a fresh one. Apart from those modifiers, a checkpoint holds only ids, numbers and
+    the clicking profile itself (a frozen dataclass, so custom profiles survive a restore). The
+    modifiers' amounts and filters are usually lambdas or closures, so only a checkpoint without
+    directly registered modifiers can be pickled and sent to another process (as GameStates built
+    from saves, scenarios and purchases are).
+    """
+    resources: Tuple[Decimal, ...]
+    elapsed: Decimal
+    buildings: Tuple[Tuple[building.BuildingId, Decimal], ...]
+    purchased: Tuple[upgrade.UpgradeId, ...]
+    modifiers: Tuple[modifier.Modifier, ...] = ()
+    numeric: str = numeric.DECIMAL.name
+    # (id, autocast, primary, secondary and independent priority, casts, active until)
+    spells: Tuple[Tuple[spell.SpellId, bool, int, int, int, int, Optional[Decimal]], ...] = ()
+    faction: faction.FactionId = faction.FactionId.NONE
+    alignment: alignment.AlignmentId = alignment.AlignmentId.NONE
+    clicking: clicks.ClickProfile = clicks.NONE
+
+    @staticmethod
+    def capture(state: simulator.GameState) -> Checkpoint:
+        purchased = tuple(id_ for id_, u in state.upgrades.items() if u.purchased)
+        active_spells = [s.spell for s in state.spells.values() if s.active]
+        implied = {
+            id(mod) for id_ in purchased for mod in state.upgrades[id_].upgrade.effects
+        } | {id(mod) for s in active_spells for mod in s.effects}
+        extra_modifiers = tuple(
+            mod
+            for mods in state.modifiers
+            for mod in mods
+            if id(mod) not in implied and not simulator.is_default_modifier(mod)
+        )
+
+        return Checkpoint(
+            tuple(getattr(state, name) for name in simulator.RESOURCES),
+            state.elapsed,
+            tuple((id_, b.owned) for id_, b in state.buildings.items() if b.owned),
+            purchased,
+            extra_modifiers,
+            state.numeric.name,
+            tuple(
+                (id_, s.autocast, s.primary_priority, s.secondary_priority,
+                 s.independent_priority, s.casts, s.active_until)
+                for id_, s in state.spells.items() if s != simulator.SpellState(s.spell)
+            ),
+            state.faction,
+            state.alignment,
+            state.clicking,
+        )
+
+    def restore(self) -> simulator.GameState:
+        """A new GameState equal to the state this checkpoint was captured from"""
+        state = simulator.GameState(
+            faction=self.faction, alignment=self.alignment, numeric=numeric.get(self.numeric),
+            clicking=self.clicking,
+            **dict(zip(simulator.RESOURCES, self.resources))
+        )
+        state.elapsed = self.elapsed
+        for building_id, owned in self.buildings:
+            state.buildings[building_id].owned = owned
+        for upgrade_id in self.purchased:
+            state.purchase_upgrade(upgrade.get(upgrade_id))
+        for mod in self.modifiers:
+            state.register_modifier(mod)
+        for spell_id, *settings, active_until in self.spells:
+            spell_state = state.spells[spell_id]
+            (spell_state.autocast, spell_state.primary_priority, spell_state.secondary_priority,
+             spell_state.independent_priority, spell_state.casts) = settings
+            spell_state.active_until = active_until
+            if active_until is not None:
+                for mod in spell_state.spell.effects:
+                    state._register_modifier(mod)  # pylint: disable=protected-access
+
+        return state
+
+
+class EventLog:
+    """Record every event applied to a state, for rewinding to any point in its history
+
+    A checkpoint is taken once checkpoint_interval events have been recorded since the last, or
+    at the end of the batch those events were part of.
+    """
+
+    def __init__(self, state: simulator.GameState, checkpoint_interval: int = 1000) -> None:
+        if checkpoint_interval < 1:
+            raise ValueError('checkpoint_interval must be positive')
+
+        self.checkpoint_interval = checkpoint_interval
+        self.events: List[Event] = []
+        self._state = state
+        # (number of events applied, checkpoint), in increasing order of position
+        self._checkpoints: List[Tuple[int, Checkpoint]] = [(0, Checkpoint.capture(state))]
+        state.listeners.append(self.record)
+
+    @property
+    def state(self) -> simulator.GameState:
+        return self._state
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def record(self, event: Event) -> None:
+        self.events.append(event)
+        # Within a batch the state is already past the events still to be recorded, so a
+        # checkpoint falling due there is taken at the end of the batch
+        due = len(self.events) - self._checkpoints[-1][0] >= self.checkpoint_interval
+        if due and self._state.settled:
+            self._checkpoints.append((len(self.events), Checkpoint.capture(self._state)))
+
+    def state_at(self, position: int) -> simulator.GameState:
+        """A new GameState as it was after the first `position` events (0 = when logging began)"""
+        if not 0 <= position <= len(self.events):
+            raise IndexError(f'Position {position} outside log of {len(self.events)} events')
+
+        index = bisect.bisect_right([pos for pos, _ in self._checkpoints], position) - 1
+        checkpoint_position, checkpoint = self._checkpoints[index]
+
+        state = checkpoint.restore()
+        for event in self.events[checkpoint_position:position]:
+            event.apply(state)
+
+        return state
+
+    def rewind(self, position: int) -> simulator.GameState:
+        """Discard events after position and continue logging from the state at that point"""
+        state = self.state_at(position)
+
+        self._state.listeners.remove(self.record)
+        del self.events[position:]
+        self._checkpoints = [(pos, cp) for pos, cp in self._checkpoints if pos <= position]
+        self._state = state
+        state.listeners.append(self.record)
+
+        return state
+
+    def detach(self) -> None:
+        """Stop recording events applied to the state"""
+        self._state.listeners.remove(self.record)
@@ -2,13 +2,14 @@
 
 from __future__ import annotations
 
-from typing import Any
-
-from . import callback, simulator
+from typing import Any, TYPE_CHECKING
 
 from .entities import alignment as alignment_
 from .entities import building as building_
 
+if TYPE_CHECKING:
+    from . import callback, simulator
+
 
 def alignment(*alignments: alignment_.Alignment) -> callback.Filter:
     def _(_state: simulator.GameState, target: Any) -> bool:
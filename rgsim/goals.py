@@ -0,0 +1,166 @@
+"""How long until gold reaches a target, a purchase is affordable or buildings are owned
+
+Between purchases gold grows at a fixed rate, production plus click income, so the time until it
+reaches a target is closed-form (see ClickProfile.seconds_to_earn). Across a plan of purchases,
+each made as soon as it is affordable, progress is a timeline of such pieces, one per purchase.
+
+The cost of each planned purchase and the rates after it depend only on the state's buildings and
+modifiers, so they are computed once per state version (GameState.derived) and shared by every
+query against the same plan. Only the waits, which also depend on the gold held and the time, are
+worked out per query, and that is arithmetic: no production is recomputed until the state next
+changes. Points within a timeline are found by bisecting its purchase times.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Optional, Sequence, Tuple, TYPE_CHECKING
+
+from . import projection
+from .entities import building as building_
+from .entities import upgrade as upgrade_
+
+if TYPE_CHECKING:
+    from . import simulator
+
+Plan = Tuple[projection.Purchase, ...]
+
+
+@dataclass(frozen=True)
+class Step:
+    purchase: projection.Purchase
+    cost: Any
+    # Production, and click income per second spent clicking, once purchase is made
+    production: Any
+    click_rate: Any
+
+
+def _click_rate(state: simulator.GameState) -> Any:
+    return state.clicks_per_second() * state.click_reward()
+
+
+def steps(state: simulator.GameState, plan: Sequence[projection.Purchase]) -> Tuple[Step, ...]:
+    """Cost of each purchase of plan, and the rates after it, made in order"""
+    plan = tuple(plan)
+    return state.derived(('goal_steps', plan), lambda: _steps(state, plan))
+
+
+def _steps(state: simulator.GameState, plan: Plan) -> Tuple[Step, ...]:
+    convert = state.numeric.convert
+    work = state.copy() if plan else state
+    result = []
+    for purchase in plan:
+        if isinstance(purchase, building_.BuildingId):
+            building = building_.get(purchase)
+            cost = projection.building_cost(work, building, work.buildings[purchase].owned)
+            work.purchase_building(purchase, Decimal(1))
+        else:
+            upgrade = upgrade_.get(purchase)
+            if upgrade.id_ in work.upgrades and work.upgrades[upgrade.id_].purchased:
+                raise ValueError(f'{upgrade.name} is already purchased')
+            cost = upgrade.cost
+            work.purchase_upgrade(upgrade)
+        result.append(Step(purchase, convert(cost), work.total_production(), _click_rate(work)))
+    return tuple(result)
+
+
+@dataclass(frozen=True)
+class Timeline:
+    """Progress from a state through a plan, each purchase made as soon as it is affordable"""
+    state: simulator.GameState
+    steps: Tuple[Step, ...]
+    # Seconds from the state until each purchase is made, and gold held just after it, for the
+    # purchases made at all: a plan stalls at a purchase it never earns enough for
+    times: Tuple[Any, ...]
+    gold: Tuple[Any, ...]
+
+    @property
+    def complete(self) -> bool:
+        return len(self.times) == len(self.steps)
+
+    def purchases_by(self, seconds: Any) -> int:
+        """Number of the plan's purchases made within seconds"""
+        return bisect.bisect_right(self.times, seconds)
+
+    def _piece(self, made: int) -> Tuple[Any, Any, Any, Any]:
+        """Start, gold and rates of the piece after the first made purchases"""
+        if made == 0:
+            state = self.state
+            return state.numeric.convert(0), state.gold, state.total_production(), \
+                _click_rate(state)
+        step = self.steps[made - 1]
+        return self.times[made - 1], self.gold[made - 1], step.production, step.click_rate
+
+    def gold_at(self, seconds: Any) -> Any:
+        """Gold held seconds from the state"""
+        start, gold, production, click_rate = self._piece(self.purchases_by(seconds))
+        elapsed = self.state.elapsed
+        clicking = self.state.clicking.active_seconds(
+            elapsed + start, elapsed + seconds, self.state.numeric.convert
+        )
+        return gold + production * (seconds - start) + click_rate * clicking
+
+    def time_to_gold(self, target: Any) -> Optional[Any]:
+        """Seconds until gold held after the whole plan reaches target, None if it never does"""
+        if not self.complete:
+            return None
+        start, gold, production, click_rate = self._piece(len(self.times))
+        wait = self.state.clicking.seconds_to_earn(
+            self.state.elapsed + start, self.state.numeric.convert(target) - gold, production,
+            click_rate, self.state.numeric.convert
+        )
+        return None if wait is None else start + wait
+
+
+def timeline(state: simulator.GameState, plan: Sequence[projection.Purchase] = ()) -> Timeline:
+    plan_steps = steps(state, plan)
+    convert = state.numeric.convert
+    zero = convert(0)
+    times, gold = [], []
+    start, held = zero, state.gold
+    production, click_rate = state.total_production(), _click_rate(state)
+    for step in plan_steps:
+        wait = state.clicking.seconds_to_earn(
+            state.elapsed + start, step.cost - held, production, click_rate, convert
+        )
+        if wait is None:
+            break
+        start += wait
+        held = (held if held > step.cost else step.cost) - step.cost
+        times.append(start)
+        gold.append(held)
+        production, click_rate = step.production, step.click_rate
+    return Timeline(state, plan_steps, tuple(times), tuple(gold))
+
+
+def time_to_gold(
+        state: simulator.GameState, target: Any,
+        plan: Sequence[projection.Purchase] = ()) -> Optional[Any]:
+    """Seconds until gold reaches target after plan, None if it never does"""
+    return timeline(state, plan).time_to_gold(target)
+
+
+def time_to_afford(
+        state: simulator.GameState, purchase: projection.Purchase,
+        plan: Sequence[projection.Purchase] = ()) -> Optional[Any]:
+    """Seconds until purchase (one more of a building, or an upgrade) is affordable after plan"""
+    result = timeline(state, (*plan, purchase))
+    return result.times[-1] if result.complete else None
+
+
+def time_to_own(
+        state: simulator.GameState, building_id: building_.BuildingId, count: Any,
+        plan: Sequence[projection.Purchase] = ()) -> Optional[Any]:
+    """Seconds until count of a building are owned, buying the missing ones one by one after plan
+
+    Zero if count are owned already once plan is done, or at once if plan is empty.
+    """
+    owned = state.buildings[building_id].owned + sum(1 for p in plan if p == building_id)
+    missing = max(math.ceil(float(state.numeric.convert(count) - owned)), 0)
+    result = timeline(state, (*plan, *(building_id,) * missing))
+    if not result.complete:
+        return None
+    return result.times[-1] if result.times else state.numeric.convert(0)
@@ -38,8 +38,8 @@ class MainWindow(wx.Frame):
 
 
 def main():
-    shared.game_state.purchase_building(building.FARM.id_, 10)
-    shared.game_state.purchase_upgrade(upgrade.IRRIGATION)
+    shared.game_state().purchase_building(building.FARM.id_, 10)
+    shared.game_state().purchase_upgrade(upgrade.IRRIGATION)
     RGSimulatorApp().MainLoop()
 
 
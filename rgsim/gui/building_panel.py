@@ -18,7 +18,7 @@ class BuildingPanel(wx.Panel):
         self.border = wx.BoxSizer()
         self.border.Add(self.sizer, 1, wx.ALL | wx.EXPAND, 5)
 
-        for building_state in shared.game_state.buildings.values():
+        for building_state in shared.game_state().buildings.values():
             self.button = wx.Button(self, label=str(f'{building_state.building.name}: {building_state.owned}'))
             self.sizer.Add(self.button)
 
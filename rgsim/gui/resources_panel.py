@@ -18,13 +18,15 @@ class ResourcesPanel(wx.Panel):
         self.border = wx.BoxSizer()
         self.border.Add(self.sizer, 1, wx.ALL | wx.EXPAND, 5)
 
-        self.gold = wx.Button(self, label=str(f'Gold: {shared.game_state.gold} (+{shared.game_state.calculate_building_production()}/s)'))
+        state = shared.game_state()
+
+        self.gold = wx.Button(self, label=str(f'Gold: {state.gold} (+{state.total_production()}/s)'))
         self.sizer.Add(self.gold)
 
-        self.gems = wx.Button(self, label=str(f'Gems: {shared.game_state.gems}'))
+        self.gems = wx.Button(self, label=str(f'Gems: {state.gems}'))
         self.sizer.Add(self.gems)
 
-        self.mana = wx.Button(self, label=str(f'Mana: {shared.game_state.mana}'))
+        self.mana = wx.Button(self, label=str(f'Mana: {state.mana}'))
         self.sizer.Add(self.mana)
 
         self.SetSizerAndFit(self.border)
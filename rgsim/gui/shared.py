@@ -2,6 +2,18 @@
 
 from __future__ import annotations
 
+from typing import Optional
+
 from .. import simulator
 
-game_state: simulator.GameState = simulator.GameState()
+_game_state: Optional[simulator.GameState] = None
+
+
+def game_state() -> simulator.GameState:
+    """The game state displayed by the GUI (created on first use, not at import)"""
+    global _game_state  # pylint: disable=global-statement
+
+    if _game_state is None:
+        _game_state = simulator.GameState()
+
+    return _game_state
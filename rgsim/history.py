@@ -0,0 +1,176 @@
+"""Append-only log of game state snapshots for time-series analysis
+
+Every snapshot is one fixed-width record: a timestamp, the resources, building production, the
+owned count of each building and a bitset of purchased upgrades. The log can be read back as a
+memory-mapped NumPy structured array without parsing.
+
+A store is a valid SaveWatcher subscriber, so tracking a running game is::
+
+    watcher.subscribe(history.HistoryStore(path))
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import time
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import diff, simulator
+from .entities import building, upgrade
+
+_MAGIC = b'RGHS'
+_VERSION = 1
+_PREFIX = struct.Struct('>4s3I')
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) // 8 * 8
+
+
+class HistoryStore:
+    """Snapshot log at path, created on the first append if it does not exist
+
+    The building and upgrade columns are fixed when the log is created and recorded in its header,
+    so existing logs stay readable as more entities are added to the simulator.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._building_ids: List[building.BuildingId] = []
+        self._upgrade_ids: List[upgrade.UpgradeId] = []
+        self._header_size = 0
+        self._dtype: Optional[np.dtype] = None
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._read_header()
+
+    @property
+    def building_ids(self) -> Sequence[building.BuildingId]:
+        return tuple(self._building_ids)
+
+    @property
+    def upgrade_ids(self) -> Sequence[upgrade.UpgradeId]:
+        return tuple(self._upgrade_ids)
+
+    @property
+    def dtype(self) -> np.dtype:
+        if self._dtype is None:
+            raise ValueError(f'History log {self.path} has not been created yet')
+        return self._dtype
+
+    def append(self, state: simulator.GameState, timestamp: Optional[float] = None) -> None:
+        """Record a snapshot of state, at timestamp (default: now)"""
+        if self._dtype is None:
+            self._create(state)
+
+        record = np.zeros(1, self.dtype)
+        record['timestamp'] = time.time() if timestamp is None else timestamp
+        for name in simulator.RESOURCES:
+            record[name] = float(getattr(state, name))
+        record['production'] = float(state.total_production())
+        record['buildings'] = [float(state.buildings[id_].owned) for id_ in self._building_ids]
+
+        purchased = [
+            id_ in state.upgrades and state.upgrades[id_].purchased for id_ in self._upgrade_ids
+        ]
+        bits = np.packbits(np.array(purchased, dtype=bool), bitorder='little')
+        record['upgrades'][0, :len(bits)] = bits
+
+        with open(self.path, 'r+b') as file:
+            # Drop any record cut short by a crash mid-append, which would otherwise misalign
+            # every record written after it
+            whole = (file.seek(0, os.SEEK_END) - self._header_size) // self.dtype.itemsize
+            end = self._header_size + whole * self.dtype.itemsize
+            if file.tell() != end:
+                file.truncate(end)
+                file.seek(end)
+            file.write(record.tobytes())
+
+    def __call__(self, state: simulator.GameState, _changes: diff.StateDiff) -> None:
+        self.append(state)
+
+    def read(self) -> np.ndarray:
+        """All snapshots as a read-only memory-mapped structured array"""
+        if self._dtype is None:
+            return np.zeros(0, np.dtype(self._record_fields(0, 0)))
+
+        count = (os.path.getsize(self.path) - self._header_size) // self.dtype.itemsize
+        if count == 0:
+            return np.zeros(0, self.dtype)
+        # A record cut short by a crash mid-append is ignored
+        return np.memmap(self.path, self.dtype, 'r', self._header_size, (count,))
+
+    def between(self, start: float, end: float) -> np.ndarray:
+        """Snapshots with start <= timestamp < end (appends are assumed to be in time order)"""
+        records = self.read()
+        lo, hi = np.searchsorted(records['timestamp'], [start, end])
+        return records[lo:hi]
+
+    def building_counts(self, records: Optional[np.ndarray] = None) -> np.ndarray:
+        """Owned counts as a (snapshots, buildings) array, columns ordered as building_ids"""
+        return (self.read() if records is None else records)['buildings']
+
+    def purchased(self, records: Optional[np.ndarray] = None) -> np.ndarray:
+        """Purchased flags as a (snapshots, upgrades) bool array, columns ordered as upgrade_ids"""
+        bits = (self.read() if records is None else records)['upgrades']
+        unpacked = np.unpackbits(bits, axis=1, bitorder='little')
+        return unpacked[:, :len(self._upgrade_ids)].astype(bool)
+
+    def mean_production(self, start: float, end: float) -> float:
+        """Time-weighted mean production over [start, end), holding each snapshot until the next"""
+        records = self.between(start, end)
+        if len(records) == 0:
+            return 0.0
+
+        durations = np.diff(np.append(records['timestamp'], end))
+        total = durations.sum()
+        if not total:
+            return float(records['production'][-1])
+
+        return float((records['production'] * durations).sum() / total)
+
+    @staticmethod
+    def _record_fields(num_buildings: int, num_upgrades: int) -> List[Tuple[Any, ...]]:
+        bitset_bytes = _aligned((num_upgrades + 7) // 8)
+        fields: List[Tuple[Any, ...]] = [('timestamp', '<f8')]
+        fields += [(name, '<f8') for name in simulator.RESOURCES]
+        fields += [
+            ('production', '<f8'),
+            ('buildings', '<f8', (num_buildings,)),
+            ('upgrades', 'u1', (bitset_bytes,)),
+        ]
+        return fields
+
+    def _create(self, state: simulator.GameState) -> None:
+        self._building_ids = list(state.buildings)
+        self._upgrade_ids = sorted(
+            {*state.upgrades, *(u.id_ for u in upgrade.all())}, key=lambda id_: id_.value
+        )
+
+        ids = [id_.value for id_ in self._building_ids] + [id_.value for id_ in self._upgrade_ids]
+        header = _PREFIX.pack(_MAGIC, _VERSION, len(self._building_ids), len(self._upgrade_ids))
+        header += struct.pack(f'>{len(ids)}i', *ids)
+        header += b'\0' * (_aligned(len(header)) - len(header))
+
+        with open(self.path, 'wb') as file:
+            file.write(header)
+
+        self._header_size = len(header)
+        self._dtype = np.dtype(self._record_fields(len(self._building_ids), len(self._upgrade_ids)))
+
+    def _read_header(self) -> None:
+        with open(self.path, 'rb') as file:
+            magic, version, num_buildings, num_upgrades = _PREFIX.unpack(file.read(_PREFIX.size))
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f'{self.path} is not a version {_VERSION} history log')
+            ids = struct.unpack(
+                f'>{num_buildings + num_upgrades}i', file.read(4 * (num_buildings + num_upgrades))
+            )
+
+        self._building_ids = [building.BuildingId(id_) for id_ in ids[:num_buildings]]
+        self._upgrade_ids = [upgrade.UpgradeId(id_) for id_ in ids[num_buildings:]]
+        self._header_size = _aligned(_PREFIX.size + 4 * len(ids))
+        self._dtype = np.dtype(self._record_fields(num_buildings, num_upgrades))
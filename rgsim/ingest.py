@@ -0,0 +1,188 @@
+"""Bulk ingestion of archived saves into columnar files
+
+Each save becomes a partition directory holding one .npy file per column of each table, e.g.
+``<out>/<save id>/buildings/current_quantity.npy``, which can later be opened with
+``numpy.load(path, mmap_mode='r')``.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import dataclasses
+import functools
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Type
+
+import numpy as np
+
+from . import serializer, sol
+
+TABLES: Dict[str, Type[serializer.Record]] = {
+    'buildings': serializer.Building,
+    'upgrades': serializer.Upgrade,
+    'spells': serializer.Spell,
+    'stats': serializer.Statistic,
+    'lineages': serializer.Lineage,
+}
+
+SAVE_EXTENSIONS = ('.sol', '.txt')
+
+_STRUCT_TO_NUMPY = {
+    '?': '?', 'b': 'i1', 'B': 'u1', 'h': '>i2', 'H': '>u2',
+    'i': '>i4', 'I': '>u4', 'q': '>i8', 'Q': '>u8', 'd': '>f8', 'f': '>f4',
+}
+
+
+@dataclass(frozen=True)
+class IngestResult:
+    save_id: str
+    path: str
+    rows: Dict[str, int] = dataclasses.field(default_factory=dict)
+    error: Optional[str] = None
+
+
+@functools.lru_cache(maxsize=None)
+def record_dtype(record_type: Type[serializer.Record]) -> np.dtype:
+    """Packed big-endian structured dtype matching a record's struct signature"""
+    signature = record_type.signature()
+    if signature[0] != '>':
+        raise ValueError(f'Only big-endian records are supported: {signature}')
+
+    formats: List[str] = []
+    for count, code in re.findall(r'(\d*)([a-zA-Z?])', signature[1:]):
+        formats.extend([_STRUCT_TO_NUMPY[code]] * int(count or 1))
+
+    names = [field.name for field in dataclasses.fields(record_type)]
+    dtype = np.dtype({'names': names, 'formats': formats})
+    if dtype.itemsize != record_type.length():
+        raise ValueError(f'{record_type.__name__} signature does not match its length')
+    return dtype
+
+
+def decode_table(section_bytes: bytes, record_type: Type[serializer.Record]) -> np.ndarray:
+    """Decode a counted section (as split by Serializer.sections) straight into an array"""
+    [count] = np.frombuffer(section_bytes, '>u2', 1)
+    return np.frombuffer(section_bytes, record_dtype(record_type), int(count), offset=2)
+
+
+def find_saves(root: str) -> Iterator[str]:
+    """Recursively yield save files under root in a stable order"""
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(files):
+            if name.endswith(SAVE_EXTENSIONS):
+                yield os.path.join(directory, name)
+
+
+def save_id(root: str, path: str) -> str:
+    """Partition name for a save: its path relative to root, extension included, flattened
+
+    Characters other than ASCII letters, digits, '.' and '-' (path separators and '_' among them)
+    are escaped as '_' and two hex digits per UTF-8 byte, so distinct paths never share a name.
+    """
+    relative = os.path.relpath(path, root).replace(os.sep, '/')
+    return re.sub(
+        r'[^A-Za-z0-9.-]', lambda match: ''.join(f'_{b:02x}' for b in match[0].encode()),
+        relative
+    )
+
+
+def read_save_string(path: str) -> str:
+    if path.endswith('.sol'):
+        return sol.read_save(path)
+    with open(path, encoding='ascii') as file:
+        return file.read().strip()
+
+
+def write_partition(save_data: str, directory: str) -> Dict[str, int]:
+    """Write every table of a save as one .npy per column, returning the row count per table"""
+    sections = serializer.Serializer(save_data).sections()
+    rows = {}
+    for table, record_type in TABLES.items():
+        records = decode_table(sections[table], record_type)
+        table_directory = os.path.join(directory, table)
+        os.makedirs(table_directory, exist_ok=True)
+        for name in records.dtype.names:
+            # Store columns in native byte order so they can be memory-mapped and used directly
+            column = records[name].astype(records.dtype[name].newbyteorder('='))
+            np.save(os.path.join(table_directory, f'{name}.npy'), column)
+        rows[table] = len(records)
+
+    return rows
+
+
+def _ingest_one(root: str, path: str, out_dir: str) -> IngestResult:
+    id_ = save_id(root, path)
+    try:
+        rows = write_partition(read_save_string(path), os.path.join(out_dir, id_))
+    except Exception as exc:  # pylint: disable=broad-except
+        # One corrupt save must not abort a run over thousands
+        return IngestResult(id_, path, error=f'{type(exc).__name__}: {exc}')
+
+    return IngestResult(id_, path, rows)
+
+
+def ingest(
+        root: str, out_dir: str, workers: Optional[int] = None,
+        max_pending: Optional[int] = None, skip: Iterable[str] = ()) -> Iterator[IngestResult]:
+    """Ingest every save under root into out_dir across a process pool
+
+    One save is one task. At most max_pending tasks (default: twice the worker count) are in
+    flight at once, so memory stays bounded however many saves there are, and results are yielded
+    as soon as each task finishes. Saves whose id is in skip are not ingested again.
+    """
+    skip_ids: Set[str] = set(skip)
+    paths = (p for p in find_saves(root) if save_id(root, p) not in skip_ids)
+
+    workers = workers or os.cpu_count() or 1
+    limit = max_pending or 2 * workers
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        pending: Set[concurrent.futures.Future] = set()
+
+        for path in paths:
+            pending.add(executor.submit(_ingest_one, root, path, out_dir))
+            if len(pending) >= limit:
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                yield from (future.result() for future in done)
+
+        for future in concurrent.futures.as_completed(pending):
+            yield future.result()
+
+
+def load_table(partition: str, table: str) -> Dict[str, np.ndarray]:
+    """Memory-map the columns of one table of an ingested save"""
+    directory = os.path.join(partition, table)
+    return {
+        os.path.splitext(name)[0]: np.load(os.path.join(directory, name), mmap_mode='r')
+        for name in sorted(os.listdir(directory))
+    }
+
+
+def completed(manifest_path: str) -> Tuple[str, ...]:
+    """Ids of saves recorded as successfully ingested in a manifest written by the CLI
+
+    A last line without its newline was cut off mid-write and is ignored.
+    """
+    if not os.path.exists(manifest_path):
+        return ()
+
+    with open(manifest_path, encoding='utf-8') as manifest:
+        entries = (json.loads(line) for line in manifest if line.endswith('\n') and line.strip())
+        return tuple(entry['save_id'] for entry in entries if entry.get('error') is None)
+
+
+def truncate_partial_line(manifest_path: str) -> None:
+    """Drop a last line cut off mid-write, so appended entries start on a line of their own"""
+    if not os.path.exists(manifest_path):
+        return
+
+    with open(manifest_path, 'r+b') as manifest:
+        data = manifest.read()
+        if data and not data.endswith(b'\n'):
+            manifest.truncate(data.rfind(b'\n') + 1)
@@ -0,0 +1,215 @@
+"""Simulation of many consecutive runs of the game
+
+A branch plays a Strategy for a number of runs. Each run starts a fresh state carrying over gems,
+trophies and excavations from the last, picks the strategy's faction for that run (and with it
+the faction's alignment, which decides the buildings that can be built), makes the strategy's
+opening purchases and abdicates at the time that maximises gems per hour (see projection). The
+gems earned are added to those carried into the next run, where they boost production.
+
+After every run a branch writes a JSON checkpoint, so an interrupted sweep picks up from the last
+completed run; a checkpoint records a digest of the strategy and is only resumed by the same
+strategy. Independent branches run in parallel across a process pool.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import projection, simulator
+from .entities import faction as faction_
+from .entities import modifier
+
+_CHECKPOINT_VERSION = 2
+
+# Carried from one run to the next
+CARRIED = ('gems', 'trophies', 'excavations')
+
+# Production bonus per gem carried into a run
+GEM_BONUS = Decimal('0.02')
+
+_GEM_BONUS = modifier.multiplicative(
+    modifier.Target.BUILDING_PRODUCTION,
+    lambda state, _target: 1 + state.gems * state.numeric.convert(GEM_BONUS)
+)
+
+
+@dataclass(frozen=True)
+class Strategy:
+    """How every run of a branch is played
+
+    Run i uses factions[i], or the last faction once they run out. starting_gold stands in for
+    the clicking that pays for the first purchases of a run.
+    """
+    name: str
+    factions: Tuple[faction_.FactionId, ...] = (faction_.FactionId.NONE,)
+    opening: Tuple[projection.Purchase, ...] = ()
+    starting_gold: Decimal = Decimal(10)
+    horizon: float = 7 * 24 * 3600
+
+    def faction(self, run: int) -> faction_.FactionId:
+        return self.factions[min(run, len(self.factions) - 1)]
+
+    def digest(self) -> str:
+        """Hash of every field, identifying the runs a checkpoint of this strategy holds"""
+        encoded = asdict(self)
+        encoded['factions'] = [f.name for f in self.factions]
+        encoded['opening'] = [f'{type(p).__name__}.{p.name}' for p in self.opening]
+        encoded['starting_gold'] = str(self.starting_gold)
+        return hashlib.sha256(json.dumps(encoded, sort_keys=True).encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class RunResult:
+    run: int
+    faction: faction_.FactionId
+    # Seconds played before abdicating
+    duration: float
+    gems_earned: int
+    gems_per_hour: float
+    # Resources carried into the next run
+    carried: Dict[str, Decimal] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class BranchResult:
+    strategy: Strategy
+    runs: Tuple[RunResult, ...]
+
+    @property
+    def gems(self) -> Decimal:
+        return self.runs[-1].carried['gems'] if self.runs else Decimal(0)
+
+    @property
+    def duration(self) -> float:
+        return sum(r.duration for r in self.runs)
+
+
+def play_run(strategy: Strategy, run: int, carried: Dict[str, Decimal]) -> RunResult:
+    """Play one run of strategy, starting with carried resources"""
+    faction = faction_.get(strategy.faction(run))
+    state = simulator.GameState(
+        gold=strategy.starting_gold, faction=faction.id_, alignment=faction.alignment.id_,
+        **carried
+    )
+    state.register_modifier(_GEM_BONUS)
+    abdication = projection.optimal_abdication(
+        state, strategy.horizon, earned=Decimal(0), opening=strategy.opening
+    )
+
+    carried_next = dict(carried)
+    carried_next['gems'] = carried.get('gems', Decimal(0)) + abdication.gems
+    return RunResult(
+        run, strategy.faction(run), abdication.time, abdication.gems, abdication.gems_per_hour,
+        carried_next,
+    )
+
+
+def _encode(result: RunResult) -> Dict[str, Any]:
+    encoded = asdict(result)
+    encoded['faction'] = result.faction.name
+    encoded['carried'] = {name: str(value) for name, value in result.carried.items()}
+    return encoded
+
+
+def _decode(encoded: Dict[str, Any]) -> RunResult:
+    return RunResult(
+        encoded['run'], faction_.FactionId[encoded['faction']], encoded['duration'],
+        encoded['gems_earned'], encoded['gems_per_hour'],
+        {name: Decimal(value) for name, value in encoded['carried'].items()},
+    )
+
+
+def load_checkpoint(path: str, strategy: Strategy) -> List[RunResult]:
+    """Runs completed by a branch of strategy according to the checkpoint at path"""
+    if not os.path.exists(path):
+        return []
+
+    with open(path, encoding='utf-8') as file:
+        checkpoint = json.load(file)
+    if checkpoint.get('version') != _CHECKPOINT_VERSION:
+        raise ValueError(f'{path} is not a version {_CHECKPOINT_VERSION} checkpoint')
+    if checkpoint['strategy'] != strategy.name:
+        raise ValueError(f'{path} is a checkpoint of strategy {checkpoint["strategy"]!r}')
+    if checkpoint['digest'] != strategy.digest():
+        raise ValueError(f'{path} is a checkpoint of a different version of {strategy.name!r}')
+
+    return [_decode(run) for run in checkpoint['runs']]
+
+
+def _write_checkpoint(path: str, strategy: Strategy, runs: Sequence[RunResult]) -> None:
+    checkpoint = {
+        'version': _CHECKPOINT_VERSION,
+        'strategy': strategy.name,
+        'digest': strategy.digest(),
+        'runs': [_encode(run) for run in runs],
+    }
+    # Write then rename so an interruption never leaves a truncated checkpoint
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+        json.dump(checkpoint, file)
+    os.replace(temporary, path)
+
+
+def checkpoint_path(directory: str, strategy: Strategy) -> str:
+    return os.path.join(directory, f'{strategy.name}.json')
+
+
+def play_branch(
+        strategy: Strategy, runs: int, directory: Optional[str] = None,
+        start: Optional[Dict[str, Decimal]] = None) -> BranchResult:
+    """Play runs runs of strategy, resuming from and updating its checkpoint in directory"""
+    path = checkpoint_path(directory, strategy) if directory is not None else None
+    completed = load_checkpoint(path, strategy) if path is not None else []
+
+    carried = completed[-1].carried if completed else {
+        name: Decimal((start or {}).get(name, 0)) for name in CARRIED
+    }
+    for run in range(len(completed), runs):
+        result = play_run(strategy, run, carried)
+        completed.append(result)
+        carried = result.carried
+        if path is not None:
+            _write_checkpoint(path, strategy, completed)
+
+    return BranchResult(strategy, tuple(completed[:runs]))
+
+
+def play(
+        strategies: Iterable[Strategy], runs: int, directory: Optional[str] = None,
+        workers: Optional[int] = None,
+        start: Optional[Dict[str, Decimal]] = None) -> Dict[str, BranchResult]:
+    """Play every strategy as an independent branch, in parallel (None: one worker per CPU)"""
+    strategies = list(strategies)
+    if len({s.name for s in strategies}) != len(strategies):
+        raise ValueError('Strategy names must be unique')
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(strategies) <= 1:
+        results = [play_branch(s, runs, directory, start) for s in strategies]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(min(workers, len(strategies))) as executor:
+            futures = [executor.submit(play_branch, s, runs, directory, start) for s in strategies]
+            results = [future.result() for future in futures]
+
+    return {result.strategy.name: result for result in results}
+
+
+def faction_branches(
+        opening: Sequence[projection.Purchase] = (),
+        types: Iterable[faction_.FactionType] = (faction_.FactionType.BASE,),
+        **kwargs: Any) -> List[Strategy]:
+    """One strategy per faction of the given types, each always picking that faction"""
+    types = set(types)
+    return [
+        Strategy(f.name.lower(), (f.id_,), tuple(opening), **kwargs)
+        for f in faction_.all() if f.type_ in types
+    ]
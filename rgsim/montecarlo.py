@@ -0,0 +1,198 @@
+"""Monte Carlo simulation of the random parts of the game
+
+Building production is deterministic, but clicks arrive at random and each click has a chance of
+yielding a faction coin. A run simulates many independent trajectories from the same state: clicks
+in each interval are Poisson distributed and coins are binomial in the clicks, drawn with NumPy a
+whole chunk of trajectories at a time.
+
+Trajectories are split into fixed-size chunks, each drawing from its own stream spawned from one
+seed, so results depend only on the seed and never on the number of worker processes.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import os
+import statistics
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import simulator
+from .entities import modifier
+
+DEFAULT_CHUNK_SIZE = 4096
+
+# Per trajectory outcomes, the columns of Result.outcomes
+METRICS = ('gold', 'clicks', 'faction_coins', 'production')
+
+
+@dataclass(frozen=True)
+class Parameters:
+    """Everything a trajectory depends on, as plain floats so it is cheap to send to workers"""
+    gold: float
+    production: float
+    click_reward: float
+    clicks_per_second: float
+    coin_chance: float
+
+    @staticmethod
+    def from_state(
+            state: simulator.GameState, clicks_per_second: Optional[float] = None) -> Parameters:
+        """Parameters of state, optionally overriding its (modified) clicks per second
+
+        By default clicks come from the state's clicking profile, averaged over its period, or
+        from the CLICKS_PER_SECOND modifiers if it has none.
+        """
+        profile = state.clicking
+        if clicks_per_second is None and profile.target is not None:
+            clicks_per_second = float(state.clicks_per_second())
+            if profile.period is not None:
+                clicks_per_second *= float(profile.active / profile.period)
+        elif clicks_per_second is None:
+            clicks_per_second = float(
+                state.apply_modifiers(None, modifier.Target.CLICKS_PER_SECOND)
+            )
+
+        return Parameters(
+            float(state.gold),
+            float(state.total_production()),
+            float(state.click_reward()),
+            clicks_per_second,
+            min(1.0, max(0.0, float(
+                state.apply_modifiers(None, modifier.Target.FACTION_COIN_CHANCE)
+            ))),
+        )
+
+
+@dataclass(frozen=True)
+class Summary:
+    mean: float
+    std: float
+    quantiles: Dict[float, float]
+    # Confidence interval of the mean
+    ci_low: float
+    ci_high: float
+
+
+@dataclass(frozen=True)
+class Result:
+    parameters: Parameters
+    duration: float
+    seed: int
+    # Structured array, one row per trajectory, with a float64 column per metric
+    outcomes: np.ndarray
+    # Gold of every trajectory at the end of each sample interval, (trajectories, samples)
+    gold_path: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.outcomes)
+
+    def summary(
+            self, metric: str, quantiles: Sequence[float] = (0.05, 0.5, 0.95),
+            confidence: float = 0.95) -> Summary:
+        return summarize(self.outcomes[metric], quantiles, confidence)
+
+    def summaries(self, **kwargs) -> Dict[str, Summary]:
+        return {metric: self.summary(metric, **kwargs) for metric in METRICS}
+
+    def path_quantiles(self, quantiles: Sequence[float] = (0.05, 0.5, 0.95)) -> np.ndarray:
+        """Quantiles of gold at each sample time, (len(quantiles), samples)"""
+        return np.quantile(self.gold_path, quantiles, axis=0)
+
+
+def summarize(
+        values: np.ndarray, quantiles: Sequence[float] = (0.05, 0.5, 0.95),
+        confidence: float = 0.95) -> Summary:
+    """Mean, standard deviation, quantiles and a normal confidence interval of the mean"""
+    if len(values) == 0:
+        raise ValueError('Cannot summarize no trajectories')
+
+    mean = float(np.mean(values))
+    std = float(np.std(values, ddof=1)) if len(values) > 1 else 0.0
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    margin = z * std / np.sqrt(len(values))
+
+    return Summary(
+        mean, std,
+        dict(zip(quantiles, (float(q) for q in np.quantile(values, quantiles)))),
+        mean - margin, mean + margin,
+    )
+
+
+def _outcome_dtype() -> np.dtype:
+    return np.dtype([(metric, '<f8') for metric in METRICS])
+
+
+def simulate_chunk(
+        parameters: Parameters, size: int, duration: float, samples: int,
+        seed: np.random.SeedSequence) -> Tuple[np.ndarray, np.ndarray]:
+    """Outcomes and gold paths of size trajectories drawn from seed"""
+    rng = np.random.default_rng(seed)
+    interval = duration / samples
+
+    clicks = rng.poisson(parameters.clicks_per_second * interval, (size, samples))
+    coins = rng.binomial(clicks, parameters.coin_chance)
+
+    gains = clicks * parameters.click_reward + parameters.production * interval
+    gold_path = parameters.gold + np.cumsum(gains, axis=1)
+
+    outcomes = np.empty(size, _outcome_dtype())
+    outcomes['gold'] = gold_path[:, -1]
+    outcomes['clicks'] = clicks.sum(axis=1)
+    outcomes['faction_coins'] = coins.sum(axis=1)
+    outcomes['production'] = (outcomes['gold'] - parameters.gold) / duration
+
+    return outcomes, gold_path
+
+
+def _chunks(
+        trajectories: int, chunk_size: int, seed: int) -> List[Tuple[int, np.random.SeedSequence]]:
+    sizes = [chunk_size] * (trajectories // chunk_size)
+    if trajectories % chunk_size:
+        sizes.append(trajectories % chunk_size)
+    return list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+
+
+def run(
+        state: simulator.GameState, trajectories: int, duration: Decimal, seed: int = 0,
+        samples: int = 1, workers: Optional[int] = 1, chunk_size: int = DEFAULT_CHUNK_SIZE,
+        clicks_per_second: Optional[float] = None) -> Result:
+    """Simulate trajectories independent runs of duration seconds from state
+
+    Gold is recorded at samples evenly spaced times. With workers other than 1, chunks are
+    distributed across a process pool (None: one worker per CPU).
+    """
+    return run_parameters(
+        Parameters.from_state(state, clicks_per_second), trajectories, float(duration), seed,
+        samples, workers, chunk_size,
+    )
+
+
+def run_parameters(
+        parameters: Parameters, trajectories: int, duration: float, seed: int = 0,
+        samples: int = 1, workers: Optional[int] = 1,
+        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Result:
+    if trajectories < 1 or samples < 1 or chunk_size < 1:
+        raise ValueError('trajectories, samples and chunk_size must be positive')
+    if duration <= 0:
+        raise ValueError('duration must be positive')
+
+    chunks = _chunks(trajectories, chunk_size, seed)
+    sizes = [size for size, _ in chunks]
+    seeds = [chunk_seed for _, chunk_seed in chunks]
+    arguments = ([parameters] * len(chunks), sizes, [duration] * len(chunks),
+                 [samples] * len(chunks), seeds)
+
+    results: Iterable[Tuple[np.ndarray, np.ndarray]]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) == 1:
+        results = list(map(simulate_chunk, *arguments))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(min(workers, len(chunks))) as executor:
+            results = list(executor.map(simulate_chunk, *arguments))
+
+    outcomes, paths = zip(*results)
+    return Result(parameters, duration, seed, np.concatenate(outcomes), np.concatenate(paths))
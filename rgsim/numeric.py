@@ -0,0 +1,297 @@
+"""Numeric backends for simulation quantities
+
+Decimal is exact, and floats overflow at 1.8e308, which late game costs exceed. BigFloat stores a
+float mantissa and an unbounded integer binary exponent, so it has float precision with no
+practical range limit. A GameState picks its backend with its `numeric` field; Decimal remains the
+default and reference.
+
+None of these is both faster than Decimal and unbounded. float is faster but overflows. BigFloat,
+being pure Python, runs at about a third of the speed of the C decimal module, in arithmetic and
+in whole simulations alike (see benchmarks/numeric_backends.py); it is for range, not speed. A
+type with both would have to be compiled.
+"""
+
+from __future__ import annotations
+
+import functools
+import math
+import sys
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Tuple, Union
+
+Number = Union[int, float, Decimal, 'BigFloat']
+
+_LOG2_10 = math.log2(10)
+_HASH_MODULUS = sys.hash_info.modulus
+_LOG10_2 = math.log10(2)
+
+# Exponents are kept at multiples of _STEP and mantissas within [2 ** -_STEP, 2 ** _STEP), so
+# operands usually share an exponent and most operations are a single float operation. Products of
+# two mantissas stay far inside the float range.
+_STEP = 256
+_HIGH = 2.0 ** _STEP
+_LOW = 2.0 ** -_STEP
+
+
+def _make(mantissa: float, exponent: int) -> BigFloat:
+    result = _new(BigFloat)
+    result.mantissa = mantissa
+    result.exponent = exponent
+    return result
+
+
+def _normalized(mantissa: float, exponent: int) -> BigFloat:
+    """BigFloat for mantissa * 2 ** exponent, rescaling the mantissa only if it left its range"""
+    magnitude = abs(mantissa)
+    if magnitude >= _HIGH or (magnitude < _LOW and exponent):
+        if not mantissa:
+            return _make(0.0, 0)
+        if math.isinf(mantissa) or math.isnan(mantissa):
+            raise OverflowError('BigFloat mantissa overflow')
+        steps = (math.frexp(mantissa)[1] - 1) // _STEP
+        mantissa = math.ldexp(mantissa, -steps * _STEP)
+        exponent += steps * _STEP
+    result = _new(BigFloat)
+    result.mantissa = mantissa
+    result.exponent = exponent
+    return result
+
+
+_new = object.__new__
+
+
+class BigFloat:
+    """mantissa * 2 ** exponent, with an unbounded integer exponent
+
+    Behaves like a float (about 15 significant digits) without overflowing at 1.8e308.
+    """
+    __slots__ = ('mantissa', 'exponent')
+
+    mantissa: float
+    exponent: int
+
+    def __init__(self, value: Number = 0) -> None:
+        converted = BigFloat.of(value)
+        self.mantissa = converted.mantissa
+        self.exponent = converted.exponent
+
+    @staticmethod
+    def of(value: Number) -> BigFloat:
+        if isinstance(value, BigFloat):
+            return value
+        if isinstance(value, Decimal):
+            return _from_decimal(value)
+        if isinstance(value, int) and not -2 ** 1000 < value < 2 ** 1000:
+            shift = value.bit_length() - 64
+            return _normalized(float(value >> shift), shift)
+        return _normalized(float(value), 0)
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.mantissa) * Decimal(2) ** self.exponent
+
+    def log10(self) -> float:
+        if self.mantissa <= 0:
+            raise ValueError('log10 of non-positive BigFloat')
+        return math.log10(self.mantissa) + self.exponent * _LOG10_2
+
+    def __float__(self) -> float:
+        try:
+            return math.ldexp(self.mantissa, self.exponent)
+        except OverflowError:
+            return math.copysign(math.inf, self.mantissa)
+
+    def __int__(self) -> int:
+        """Truncated toward zero, exactly"""
+        numerator, denominator = self._ratio()
+        quotient = abs(numerator) // denominator
+        return quotient if numerator >= 0 else -quotient
+
+    def _ratio(self) -> Tuple[int, int]:
+        """Exact value as numerator / denominator"""
+        numerator, denominator = self.mantissa.as_integer_ratio()
+        if self.exponent >= 0:
+            return numerator << self.exponent, denominator
+        return numerator, denominator << -self.exponent
+
+    def __bool__(self) -> bool:
+        return self.mantissa != 0
+
+    def __neg__(self) -> BigFloat:
+        return _make(-self.mantissa, self.exponent)
+
+    def __pos__(self) -> BigFloat:
+        return self
+
+    def __abs__(self) -> BigFloat:
+        return _make(abs(self.mantissa), self.exponent)
+
+    def __add__(self, other: Any) -> BigFloat:
+        if type(other) is not BigFloat:  # pylint: disable=unidiomatic-typecheck
+            if not isinstance(other, (int, float, Decimal)):
+                return NotImplemented
+            other = BigFloat.of(other)
+
+        exponent = self.exponent
+        if exponent == other.exponent:
+            return _normalized(self.mantissa + other.mantissa, exponent)
+        if exponent > other.exponent:
+            mantissa = self.mantissa + math.ldexp(other.mantissa, other.exponent - exponent)
+            return _normalized(mantissa, exponent)
+        mantissa = math.ldexp(self.mantissa, exponent - other.exponent) + other.mantissa
+        return _normalized(mantissa, other.exponent)
+
+    __radd__ = __add__
+
+    def __sub__(self, other: Any) -> BigFloat:
+        if not isinstance(other, (BigFloat, int, float, Decimal)):
+            return NotImplemented
+        return self + -BigFloat.of(other)
+
+    def __rsub__(self, other: Any) -> BigFloat:
+        return -self + other
+
+    def __mul__(self, other: Any) -> BigFloat:
+        if type(other) is not BigFloat:  # pylint: disable=unidiomatic-typecheck
+            if not isinstance(other, (int, float, Decimal)):
+                return NotImplemented
+            other = BigFloat.of(other)
+        return _normalized(self.mantissa * other.mantissa, self.exponent + other.exponent)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: Any) -> BigFloat:
+        if type(other) is not BigFloat:  # pylint: disable=unidiomatic-typecheck
+            if not isinstance(other, (int, float, Decimal)):
+                return NotImplemented
+            other = BigFloat.of(other)
+        if not other.mantissa:
+            raise ZeroDivisionError('BigFloat division by zero')
+        return _normalized(self.mantissa / other.mantissa, self.exponent - other.exponent)
+
+    def __rtruediv__(self, other: Any) -> BigFloat:
+        return BigFloat.of(other) / self
+
+    def __pow__(self, power: Union[int, float, BigFloat, Decimal]) -> BigFloat:
+        if isinstance(power, (BigFloat, Decimal)):
+            # Powers are counts (e.g. buildings owned), well within float range
+            power = float(power)
+        if not self.mantissa:
+            return self if power else BigFloat.of(1)
+        if self.mantissa < 0 and not isinstance(power, int):
+            raise ValueError('Fractional power of negative BigFloat')
+
+        mantissa, exponent = math.frexp(self.mantissa)
+        log2 = (math.log2(abs(mantissa)) + exponent + self.exponent) * power
+        whole = math.floor(log2)
+        sign = -1.0 if mantissa < 0 and power % 2 else 1.0
+        return _normalized(sign * 2 ** (log2 - whole), whole)
+
+    def _compare(self, other: Any) -> int:
+        difference = self - other
+        return (difference.mantissa > 0) - (difference.mantissa < 0)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, (BigFloat, int, float, Decimal)):
+            return NotImplemented
+        return self._compare(other) == 0
+
+    def __hash__(self) -> int:
+        # Python's hash of the exact rational value, which int, float, Decimal and Fraction all
+        # share, so a BigFloat hashes like the native numbers it equals. The denominator of a
+        # float is a power of two, so the value is numerator * 2 ** power.
+        numerator, denominator = self.mantissa.as_integer_ratio()
+        power = self.exponent - (denominator.bit_length() - 1)
+        result = abs(numerator) * pow(2, power, _HASH_MODULUS) % _HASH_MODULUS
+        result = -result if numerator < 0 else result
+        return -2 if result == -1 else result
+
+    def __lt__(self, other: Any) -> bool:
+        return self._compare(other) < 0
+
+    def __le__(self, other: Any) -> bool:
+        return self._compare(other) <= 0
+
+    def __gt__(self, other: Any) -> bool:
+        return self._compare(other) > 0
+
+    def __ge__(self, other: Any) -> bool:
+        return self._compare(other) >= 0
+
+    def __repr__(self) -> str:
+        return f'BigFloat({str(self)!r})'
+
+    def __str__(self) -> str:
+        if not self.mantissa:
+            return '0.0'
+        value = float(self)
+        if not math.isinf(value):
+            return repr(value)
+        log10 = math.log10(abs(self.mantissa)) + self.exponent * _LOG10_2
+        exponent = math.floor(log10)
+        sign = '-' if self.mantissa < 0 else ''
+        return f'{sign}{10 ** (log10 - exponent):.15g}e{exponent:+d}'
+
+
+def _from_decimal(value: Decimal) -> BigFloat:
+    if not value.is_finite():
+        raise ValueError(f'Cannot represent {value} as BigFloat')
+    if not value:
+        return _make(0.0, 0)
+
+    exponent10 = value.adjusted()
+    if -300 < exponent10 < 300:
+        return _normalized(float(value), 0)
+
+    # value = mantissa10 * 10 ** exponent10 = mantissa10 * 2 ** (exponent10 * log2(10))
+    mantissa10 = float(value.scaleb(-exponent10))
+    log2 = exponent10 * _LOG2_10
+    whole = math.floor(log2)
+    return _normalized(mantissa10 * 2 ** (log2 - whole), whole)
+
+
+@dataclass(frozen=True)
+class Backend:
+    """How a simulation represents quantities"""
+    name: str
+    type_: type
+    _convert: Callable[[Any], Any]
+
+    def convert(self, value: Any) -> Any:
+        """value in this backend's representation"""
+        if type(value) is self.type_:  # pylint: disable=unidiomatic-typecheck
+            return value
+        return self._convert(value)
+
+    def sum(self, values: Iterable[Any]) -> Any:
+        return sum(values, self.convert(0))
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_bigfloat(value: Decimal) -> BigFloat:
+    # Entity definitions (costs, base production, fixed modifier amounts) are a small set of
+    # Decimals converted over and over, so memoize them
+    return BigFloat.of(value)
+
+
+def _to_bigfloat(value: Any) -> BigFloat:
+    return _cached_bigfloat(value) if isinstance(value, Decimal) else BigFloat.of(value)
+
+
+def _to_decimal(value: Any) -> Decimal:
+    return value.to_decimal() if isinstance(value, BigFloat) else Decimal(value)
+
+
+DECIMAL = Backend('decimal', Decimal, _to_decimal)
+FLOAT = Backend('float', float, float)
+BIGFLOAT = Backend('bigfloat', BigFloat, _to_bigfloat)
+
+_BACKENDS: Dict[str, Backend] = {b.name: b for b in (DECIMAL, FLOAT, BIGFLOAT)}
+
+
+def get(name: str) -> Backend:
+    return _BACKENDS[name]
+
+
+def all() -> Iterable[Backend]:
+    return _BACKENDS.values()
@@ -0,0 +1,210 @@
+"""Projection of a run's progress and the best time to abdicate
+
+Between purchases gold grows linearly, so progress from a state is a list of segments, each
+starting at a purchase with a fixed production rate. Buildings are bought greedily, always the one
+with the shortest payback time (cost / added production), as soon as it is affordable; the time
+until then is closed-form, so projecting a run costs one step per purchase rather than per second.
+
+Abdicating converts gold earned during the run into gems. Gems per hour of the run peak at some
+time: the best breakpoint between segments brackets the peak, which golden-section search then
+narrows down.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import math
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import List, Optional, Sequence, Tuple, Union
+
+from . import simulator
+from .entities import building as building_
+from .entities import modifier
+from .entities import upgrade as upgrade_
+
+# A step of an opening plan: a building to buy one of, or an upgrade to buy
+Purchase = Union[building_.BuildingId, upgrade_.UpgradeId]
+
+COST_GROWTH = 1.15
+GEM_DIVISOR = 1e12
+
+_INVERSE_PHI = (math.sqrt(5) - 1) / 2
+
+
+def building_cost(
+        state: simulator.GameState, building: building_.Building, owned: Decimal,
+        quantity: Decimal = Decimal(1)) -> Decimal:
+    """Cost of buying quantity more of building with owned already built"""
+    multiplier = state.apply_modifiers(
+        building, modifier.Target.BULIDING_COST_MULTIPLIER, Decimal(1)
+    )
+    convert = state.numeric.convert
+    growth = convert(Decimal(COST_GROWTH))
+    return convert(building.base_price) * multiplier * growth ** convert(owned) \
+        * (growth ** convert(quantity) - 1) / (growth - 1)
+
+
+def gems_for(earned: float) -> float:
+    """Gems (before flooring) for abdicating after earning this much gold in the run"""
+    return (math.sqrt(1 + 8 * max(earned, 0) / GEM_DIVISOR) - 1) / 2
+
+
+@dataclass(frozen=True)
+class Segment:
+    # Seconds from the projected state
+    start: float
+    # Gold earned in the run, and gold held, at start (after the purchase)
+    earned: float
+    gold: float
+    production: float
+    # Building or upgrade bought at start, None for the initial segment
+    purchase: Optional[Purchase] = None
+
+
+@dataclass(frozen=True)
+class Abdication:
+    # Seconds from the projected state
+    time: float
+    gems: int
+    gems_per_hour: float
+
+
+@dataclass(frozen=True)
+class Projection:
+    segments: Tuple[Segment, ...]
+    horizon: float
+    # Seconds of the run already played before the projected state
+    elapsed: float
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, '_starts', [s.start for s in self.segments])
+
+    def _segment(self, time: float) -> Segment:
+        index = bisect.bisect_right(self._starts, time) - 1  # type: ignore[attr-defined]
+        return self.segments[max(index, 0)]
+
+    def earned_at(self, time: float) -> float:
+        segment = self._segment(time)
+        return segment.earned + segment.production * (time - segment.start)
+
+    def gems_at(self, time: float) -> float:
+        return gems_for(self.earned_at(time))
+
+    def gems_per_hour(self, time: float) -> float:
+        played = self.elapsed + time
+        return 3600 * self.gems_at(time) / played if played > 0 else 0.0
+
+    def optimal_abdication(self, tolerance: float = 1.0) -> Abdication:
+        """When gems per hour peak within the horizon, to within tolerance seconds"""
+        times = [*self._starts, self.horizon]  # type: ignore[attr-defined]
+        rates = [self.gems_per_hour(t) for t in times]
+        best = max(range(len(times)), key=rates.__getitem__)
+
+        low, high = times[max(best - 1, 0)], times[min(best + 1, len(times) - 1)]
+        time = _golden_section(self.gems_per_hour, low, high, tolerance)
+        if self.gems_per_hour(time) < rates[best]:
+            time = times[best]
+
+        return Abdication(time, math.floor(self.gems_at(time)), self.gems_per_hour(time))
+
+
+def _golden_section(function, low: float, high: float, tolerance: float) -> float:
+    """Maximum of a unimodal function on [low, high]"""
+    a, b = low, high
+    c, d = b - _INVERSE_PHI * (b - a), a + _INVERSE_PHI * (b - a)
+    fc, fd = function(c), function(d)
+    while b - a > tolerance:
+        if fc > fd:
+            b, d, fd = d, c, fc
+            c = b - _INVERSE_PHI * (b - a)
+            fc = function(c)
+        else:
+            a, c, fc = c, d, fd
+            d = a + _INVERSE_PHI * (b - a)
+            fd = function(d)
+    return (a + b) / 2
+
+
+def _wait_for(last: Segment, cost: float, horizon: float) -> Optional[Tuple[float, float, float]]:
+    """Start, earned and gold (after paying) of buying cost as soon as affordable after last"""
+    if last.gold >= cost:
+        wait = 0.0
+    elif last.production > 0:
+        wait = (cost - last.gold) / last.production
+    else:
+        return None
+
+    start = last.start + wait
+    if start > horizon:
+        return None
+    return start, last.earned + last.production * wait, last.gold + last.production * wait - cost
+
+
+def project(
+        state: simulator.GameState, horizon: float, earned: Optional[Decimal] = None,
+        opening: Sequence[Purchase] = ()) -> Projection:
+    """Project the run from state for horizon seconds, buying buildings greedily
+
+    The purchases in opening are made first, in order, each as soon as it is affordable. earned is
+    the gold earned so far in the run (default: the gold currently held). Production per building
+    is taken from the state's modifiers after the opening, so modifiers that depend on building
+    counts, and assistants moving to the buildings bought, are not tracked as buildings are bought.
+    Only buildings of the state's alignment, or of no alignment, are bought greedily.
+    """
+    gold = float(state.gold)
+    production = float(state.total_production())
+    segments: List[Segment] = [Segment(0.0, float(gold if earned is None else earned), gold,
+                                       production)]
+
+    work = state.copy() if opening else state
+    for purchase in opening:
+        if isinstance(purchase, building_.BuildingId):
+            cost = building_cost(work, building_.get(purchase), work.buildings[purchase].owned)
+        else:
+            cost = upgrade_.get(purchase).cost
+        bought = _wait_for(segments[-1], float(cost), horizon)
+        if bought is None:
+            return Projection(tuple(segments), float(horizon), float(state.elapsed))
+
+        if isinstance(purchase, building_.BuildingId):
+            work.purchase_building(purchase, Decimal(1))
+        else:
+            work.purchase_upgrade(upgrade_.get(purchase))
+        segments.append(Segment(*bought, float(work.total_production()), purchase))
+
+    # (payback seconds, building id, cost, added production) of the next unit of each building
+    candidates: List[Tuple[float, int, float, float]] = []
+    for building_state in work.buildings.values():
+        building = building_state.building
+        if not building.buildable(work.alignment):
+            continue
+        unit = float(work.apply_modifiers(
+            building, modifier.Target.BUILDING_PRODUCTION, building.base_production
+        ))
+        if unit > 0:
+            cost = float(building_cost(work, building, building_state.owned))
+            heapq.heappush(candidates, (cost / unit, building.id_.value, cost, unit))
+
+    while candidates:
+        payback, id_, unit_cost, unit = candidates[0]
+        last = segments[-1]
+        bought = _wait_for(last, unit_cost, horizon)
+        if bought is None:
+            break
+
+        segments.append(Segment(*bought, last.production + unit, building_.BuildingId(id_)))
+        heapq.heapreplace(
+            candidates, (payback * COST_GROWTH, id_, unit_cost * COST_GROWTH, unit)
+        )
+
+    return Projection(tuple(segments), float(horizon), float(state.elapsed))
+
+
+def optimal_abdication(
+        state: simulator.GameState, horizon: float = 7 * 24 * 3600,
+        earned: Optional[Decimal] = None, tolerance: float = 1.0,
+        opening: Sequence[Purchase] = ()) -> Abdication:
+    """Best time to abdicate from state for gems per hour, looking up to horizon seconds ahead"""
+    return project(state, horizon, earned, opening).optimal_abdication(tolerance)
@@ -0,0 +1,127 @@
+"""Reproduction of the game's random number streams
+
+Saves store the 32-bit state of several random streams: the egg stream in the header, the
+artifact stream (excavations), one stream per upgrade and one per spell. This module assumes the
+game generates them with the Park-Miller minimal standard generator, state' = state * 16807 mod
+(2 ** 31 - 1), with nextDouble and nextIntRange as below; that is unverified against the game's
+client. Under that assumption each stream is a pure function of the saved state, so the next draws
+of any stream can be predicted.
+
+Only the streams and generic draws are modelled. Which draws the game takes from which stream for
+an excavation find, a faction coin or a spell proc, and with what probabilities, is not known
+without save data to check it against, so those outcomes are not predicted here.
+
+Every function here takes an array of states (e.g. one stream across many saves, or a column
+loaded with ingest.load_table) and returns the next draws of all of them as one array. Draw k of a
+stream is state * 16807 ** k mod m, so a whole (states, count) block is a single vectorized
+multiply-and-reduce with precomputed multiplier powers.
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from . import serializer
+
+MODULUS = 2 ** 31 - 1
+MULTIPLIER = 16807
+
+EGG = 'egg'
+ARTIFACT = 'artifact'
+
+
+def upgrade_stream(upgrade_id: int) -> str:
+    return f'upgrade:{upgrade_id}'
+
+
+def spell_stream(spell_id: int) -> str:
+    return f'spell:{spell_id}'
+
+
+@functools.lru_cache(maxsize=32)
+def _powers(count: int) -> np.ndarray:
+    # MULTIPLIER ** k mod MODULUS for k = 1..count; every value is below 2 ** 31, so the product
+    # with a state fits in 62 bits
+    powers = np.empty(count, np.uint64)
+    power = 1
+    for k in range(count):
+        power = power * MULTIPLIER % MODULUS
+        powers[k] = power
+    powers.setflags(write=False)
+    return powers
+
+
+def _states(states: Iterable[int]) -> np.ndarray:
+    values = np.asarray(states).reshape(-1)
+    if values.size and (values.min() < 0 or values.max() >= MODULUS):
+        raise ValueError(f'Generator states must be in [0, {MODULUS})')
+    return values.astype(np.uint64)
+
+
+def advance(states: Iterable[int], steps: int) -> np.ndarray:
+    """The states after `steps` further draws"""
+    return _states(states) * np.uint64(pow(MULTIPLIER, steps, MODULUS)) % np.uint64(MODULUS)
+
+
+def sequence(states: Iterable[int], count: int) -> np.ndarray:
+    """The next count raw draws of each stream, as a (states, count) uint64 array
+
+    The last column is the state each stream is left in.
+    """
+    return _states(states)[:, None] * _powers(count)[None, :] % np.uint64(MODULUS)
+
+
+def doubles(states: Iterable[int], count: int) -> np.ndarray:
+    """The next count draws of each stream scaled to (0, 1), as the game's nextDouble"""
+    return sequence(states, count) / MODULUS
+
+
+def int_range(states: Iterable[int], count: int, low: int, high: int) -> np.ndarray:
+    """The next count integer draws in [low, high], as the game's nextIntRange"""
+    low_, high_ = low - 0.4999, high + 0.4999
+    # Flash's Math.round rounds halves up
+    return np.floor(low_ + (high_ - low_) * doubles(states, count) + 0.5).astype(np.int64)
+
+
+def chances(states: Iterable[int], count: int, probability: float) -> np.ndarray:
+    """Whether each of the next count rolls against probability succeeds, (states, count) bool"""
+    return doubles(states, count) < probability
+
+
+def first_success(states: Iterable[int], probability: float, horizon: int) -> np.ndarray:
+    """Number of rolls until each stream's first success (1 = the next roll), or 0 if none
+
+    Only the next horizon rolls are considered.
+    """
+    successes = chances(states, horizon, probability)
+    first = successes.argmax(axis=1) + 1
+    first[~successes.any(axis=1)] = 0
+    return first
+
+
+def streams(save_data: serializer.SaveData) -> Dict[str, int]:
+    """The state of every random stream in a save, keyed by stream name"""
+    states = {
+        EGG: save_data.header.egg_rng_state,
+        ARTIFACT: save_data.artifact_rng_state,
+    }
+    states.update((upgrade_stream(u.id_), u.rng_state) for u in save_data.upgrades)
+    states.update((spell_stream(s.id_), s.spell_rng_state) for s in save_data.spells)
+    return states
+
+
+def gather(saves: Iterable[serializer.SaveData], stream: str) -> Tuple[np.ndarray, np.ndarray]:
+    """States of one stream across many saves, and a mask of the saves that have it
+
+    Saves without the stream get state 0, whose draws are all 0.
+    """
+    states: List[int] = []
+    present: List[bool] = []
+    for save_data in saves:
+        state = streams(save_data).get(stream)
+        states.append(state or 0)
+        present.append(state is not None)
+    return np.array(states, dtype=np.uint64), np.array(present, dtype=bool)
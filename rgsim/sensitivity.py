@@ -0,0 +1,153 @@
+"""Partial derivatives of total production, for ranking what to improve next
+
+Production of one of a building is (base + sum of additive amounts) * product of multiplicative
+amounts (see GameState.modifier_terms), and total production weighs each building's unit
+production by the units producing it: the owned count plus the assistants working it (scaled by
+ASSISTANT_PRODUCTION). Differentiating that structure directly gives every partial derivative from
+one evaluation of each building's modifiers, rather than recomputing production once per lever.
+
+Derivatives with respect to building counts and assistants hold the assistants' assignment
+fixed except at the margin: a new unit of a building takes an idle assistant, or one from the
+least productive building worked if that produces less.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Dict, List, Sequence, Tuple
+
+from . import simulator
+from .entities import building as building_
+from .entities import modifier
+
+
+@dataclass(frozen=True)
+class Lever:
+    modifier: modifier.Modifier
+    # The modifier's current amount, and d(total production) / d(amount)
+    amount: Any
+    derivative: Any
+    # Fraction production changes by per fraction the amount changes (amount * derivative /
+    # production), comparable between additive and multiplicative modifiers
+    elasticity: float
+
+
+@dataclass(frozen=True)
+class Report:
+    production: Any
+    # d(total production) / d(owned), for every building
+    buildings: Dict[building_.BuildingId, Any]
+    # d(total production) / d(assistants)
+    assistants: Any
+    levers: Tuple[Lever, ...]
+
+    def ranked(self) -> List[Lever]:
+        """Modifiers by how much production responds to them, strongest first"""
+        return sorted(self.levers, key=lambda lever: abs(lever.elasticity), reverse=True)
+
+
+def _without_each(values: Sequence[Any], one: Any) -> List[Any]:
+    """Product of all but each of values, without dividing (amounts may be 0)"""
+    prefix = [one]
+    for value in values[:-1]:
+        prefix.append(prefix[-1] * value)
+    result = [one] * len(values)
+    suffix = one
+    for i in range(len(values) - 1, -1, -1):
+        result[i] = prefix[i] * suffix
+        suffix *= values[i]
+    return result
+
+
+class _Accumulator:
+    """Sum of derivatives per modifier, in the order modifiers are first seen"""
+
+    def __init__(self, zero: Any) -> None:
+        self.zero = zero
+        self.terms: Dict[int, Tuple[modifier.Modifier, Any, Any]] = {}
+
+    def add(self, mod: modifier.Modifier, amount: Any, derivative: Any) -> None:
+        _mod, _amount, total = self.terms.get(id(mod), (mod, amount, self.zero))
+        self.terms[id(mod)] = (mod, amount, total + derivative)
+
+    def factored(
+            self, terms: Tuple[List[Tuple[modifier.Modifier, Any]], ...], base: Any, one: Any,
+            weight: Any) -> None:
+        """Add the derivatives of weight * (base + additive) * multiplicative"""
+        additive, multiplicative = terms
+        total = base
+        for _mod, amount in additive:
+            total += amount
+        amounts = [amount for _mod, amount in multiplicative]
+        others = _without_each(amounts, one)
+        product = others[0] * amounts[0] if amounts else one
+
+        for mod, amount in additive:
+            self.add(mod, amount, weight * product)
+        for (mod, amount), other in zip(multiplicative, others):
+            self.add(mod, amount, weight * total * other)
+
+
+def report(state: simulator.GameState) -> Report:
+    """Partial derivatives of state.total_production()"""
+    convert = state.numeric.convert
+    zero, one = convert(0), convert(1)
+    production = state.total_production()
+    units = state.unit_production()
+    accumulator = _Accumulator(zero)
+
+    # Assistants, assigned as GameState assigns them
+    assistant_terms = state.modifier_terms(None, modifier.Target.ASSISTANTS)
+    assistants = state.apply_modifiers(None, modifier.Target.ASSISTANTS)
+    multiple_terms = state.modifier_terms(None, modifier.Target.ASSISTANT_PRODUCTION)
+    multiple = state.apply_modifiers(None, modifier.Target.ASSISTANT_PRODUCTION, Decimal(1))
+
+    working: Dict[building_.BuildingId, Any] = {}
+    idle = assistants if assistants > 0 else zero
+    for id_ in sorted(units, key=units.__getitem__, reverse=True):
+        working[id_] = min(idle, state.buildings[id_].owned)
+        idle -= working[id_]
+    worked = [id_ for id_, count in working.items() if count > 0]
+    # Unit production of the building the next assistant would work, and of the one a new
+    # building would take an assistant from
+    spare = next(
+        (units[id_] for id_, count in working.items() if count < state.buildings[id_].owned), zero
+    )
+    displaced = units[worked[-1]] if worked and idle <= 0 else zero
+
+    assisted = zero
+    for id_, count in working.items():
+        assisted += count * units[id_]
+
+    for id_ in units:
+        building = state.buildings[id_].building
+        weight = state.buildings[id_].owned + multiple * working[id_]
+        accumulator.factored(
+            state.modifier_terms(building, modifier.Target.BUILDING_PRODUCTION),
+            convert(building.base_production), one, weight
+        )
+    if assisted > 0:
+        accumulator.factored(multiple_terms, one, one, assisted)
+    if assistants > 0:
+        accumulator.factored(assistant_terms, zero, one, multiple * spare)
+
+    buildings = {}
+    for id_, building_state in state.buildings.items():
+        unit = units.get(id_)
+        if unit is None:
+            unit = state.apply_modifiers(
+                building_state.building, modifier.Target.BUILDING_PRODUCTION,
+                building_state.building.base_production
+            )
+        gain = unit - displaced if assistants > 0 else zero
+        buildings[id_] = unit + multiple * (gain if gain > 0 else zero)
+
+    levers = tuple(
+        Lever(
+            mod, amount, derivative,
+            float(amount * derivative / production) if production != 0 else 0.0
+        )
+        for mod, amount, derivative in accumulator.terms.values()
+    )
+    return Report(production, buildings, multiple * spare, levers)
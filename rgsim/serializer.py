@@ -1,13 +1,28 @@
+from __future__ import annotations
+
 import base64
 import struct
 import zlib
 
 from dataclasses import dataclass
-from typing import Iterable, List, Type, cast
+from decimal import Decimal
+from enum import Enum
+from typing import (
+    Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple, Type, TypeVar, TYPE_CHECKING
+)
+
+from . import sol
+from .entities import alignment as alignment_
+from .entities import building as building_
+from .entities import faction as faction_
+from .entities import spell as spell_
+from .entities import upgrade as upgrade_
+from .simulator import GameState
 
-from pyamf import sol #type: ignore
+if TYPE_CHECKING:
+    from .cache import SaveCache
 
-from .simulator import GameState
+E = TypeVar('E', bound=Enum)
 
 
 @dataclass
@@ -209,48 +224,200 @@ class Lineage(Record):
         return 8
 
 
+@dataclass
+class ArtifactRngState(Record):
+    rng_state: int
+
+    @staticmethod
+    def signature() -> str:
+        return '>I'
+
+    @staticmethod
+    def length() -> int:
+        return 4
+
+
+@dataclass(frozen=True)
+class Section:
+    """A contiguous region of a save: one record, or a 16-bit count followed by that many"""
+    name: str
+    record_type: Type[Record]
+    many: bool = True
+
+
+LAYOUT: Tuple[Section, ...] = (
+    Section('header', Header, many=False),
+    Section('buildings', Building),
+    Section('upgrades', Upgrade),
+    Section('trophies', Trophy),
+    Section('artifact_rng_state', ArtifactRngState, many=False),
+    Section('spells', Spell),
+    Section('current_game', CurrentGame, many=False),
+    Section('faction_coins', FactionCoin),
+    Section('event_resources', EventResource),
+    Section('stats', Statistic),
+    Section('lineages', Lineage),
+)
+
+
+@dataclass
+class SaveData:
+    """All records decoded from a save, one attribute per section of LAYOUT"""
+    header: Header
+    buildings: List[Building]
+    upgrades: List[Upgrade]
+    trophies: List[Trophy]
+    artifact_rng_state: int
+    spells: List[Spell]
+    current_game: CurrentGame
+    faction_coins: List[FactionCoin]
+    event_resources: List[EventResource]
+    stats: List[Statistic]
+    lineages: List[Lineage]
+
+    @staticmethod
+    def from_sections(decoded: Mapping[str, Any]) -> SaveData:
+        """Assemble from the output of Serializer.decode_section, keyed by section name"""
+        values = dict(decoded)
+        values['artifact_rng_state'] = values['artifact_rng_state'].rng_state
+        return SaveData(**values)
+
+
 class Serializer:
     def __init__(self, save_data: str) -> None:
         self._raw = Serializer._get_bytes(save_data)
         self._pos = 0
 
+    @classmethod
+    def from_raw(cls, raw: bytes) -> Serializer:
+        """Create a serializer over already decoded (deciphered) save bytes"""
+        serializer = cls.__new__(cls)
+        serializer._raw = raw
+        serializer._pos = 0
+        return serializer
+
+    @property
+    def raw(self) -> bytes:
+        """The decoded (deciphered) save bytes"""
+        return self._raw
+
+    @staticmethod
+    def deserialize(save_data: str, cache: Optional[SaveCache] = None) -> GameState:
+        return Serializer.hydrate(Serializer.parse(save_data, cache))
+
+    @staticmethod
+    def parse(save_data: str, cache: Optional[SaveCache] = None) -> SaveData:
+        """Decode every section of a save into records, or take them from cache if given"""
+        if cache is not None:
+            return cache.parse(save_data)
+        return Serializer(save_data).read_all()
+
+    def read_all(self) -> SaveData:
+        """Decode every section from the current position"""
+        return SaveData.from_sections({
+            section.name: self.read_section(section) for section in LAYOUT
+        })
+
+    @staticmethod
+    def hydrate(save: SaveData) -> GameState:
+        """Build a GameState from decoded save records
+
+        Records with ids the simulator does not model yet are ignored. An upgrade counts as
+        purchased, and a trophy as earned, when its first flag is set. Spells keep their autocast
+        settings and cast counts but start inactive.
+        """
+        faction, alignment = Serializer.scope(save.current_game)
+        state = GameState(
+            faction=faction, alignment=alignment,
+            **Serializer.resources(save.current_game, save.trophies)
+        )
+
+        with state.batch():
+            for building_id, owned in Serializer.building_counts(save.buildings).items():
+                state.buildings[building_id].owned = owned
+
+            for upgrade_id in Serializer.purchased_upgrades(save.upgrades):
+                state.purchase_upgrade(upgrade_.get(upgrade_id))
+
+            for record in save.spells:
+                try:
+                    spell_state = state.spells[spell_.SpellId(record.id_)]
+                except ValueError:
+                    continue
+                spell_state.autocast = record.autocast
+                spell_state.primary_priority = record.primary_autocast_priority
+                spell_state.secondary_priority = record.secondary_autocast_priority
+                spell_state.independent_priority = record.independent_autocast_priority
+                spell_state.casts = int(record.casts)
+
+        return state
+
+    @staticmethod
+    def scope(current_game: CurrentGame) -> Tuple[faction_.FactionId, alignment_.AlignmentId]:
+        """GameState faction and alignment held in a save, NONE for ids not modelled"""
+        return (
+            _enum(faction_.FactionId, current_game.faction, faction_.FactionId.NONE),
+            _enum(alignment_.AlignmentId, current_game.alignment, alignment_.AlignmentId.NONE),
+        )
+
+    @staticmethod
+    def resources(current_game: CurrentGame, trophies: Iterable[Trophy]) -> Dict[str, Decimal]:
+        """GameState resource fields held in a save"""
+        return {
+            'mana': Decimal(current_game.mana),
+            'gold': Decimal(current_game.coins),
+            'gems': Decimal(current_game.gems),
+            'trophies': Decimal(sum(1 for trophy in trophies if trophy.u1)),
+            'excavations': Decimal(current_game.excavations),
+        }
+
+    @staticmethod
+    def building_counts(records: Iterable[Building]) -> Dict[building_.BuildingId, Decimal]:
+        """Owned count of each building the simulator models"""
+        counts = {}
+        for record in records:
+            try:
+                counts[building_.BuildingId(record.id_)] = Decimal(record.current_quantity)
+            except ValueError:
+                continue
+        return counts
+
     @staticmethod
-    def deserialize(save_data: str) -> GameState:
-        serializer = Serializer(save_data)
-
-        header = serializer.read_one(Header)
-        buildings = serializer.read_many(Building)
-        upgrades = serializer.read_many(Upgrade)
-        trophies = serializer.read_many(Trophy)
-        [artifact_rng_state] = serializer.read('>I', 4)
-        spells = serializer.read_many(Spell)
-        current_game = serializer.read_one(CurrentGame)
-        faction_coins = serializer.read_many(FactionCoin)
-        event_resources = serializer.read_many(EventResource)
-        stats = serializer.read_many(Statistic)
-        lineages = serializer.read_many(Lineage)
-
-        # print(header)
-        # print(buildings)
-        # print(upgrades)
-        # print(trophies)
-        # print(artifact_rng_state)
-        # print(spells)
-        # print(current_game)
-        # print(faction_coins)
-        # print(event_resources)
-        # print(stats)
-        # print(lineages)
-
-        upgrades = cast(List[Upgrade], list(upgrades))
-        upgrades.sort(key=lambda u: u.id_)
-        i = 0
-        for upgrade in upgrades:
-            if upgrade.u1 or upgrade.u2 or upgrade.u3:
-                print(f'{i:3d}: {upgrade}')
-                i += 1
-
-        return GameState()
+    def purchased_upgrades(records: Iterable[Upgrade]) -> Set[upgrade_.UpgradeId]:
+        """Ids of purchased upgrades the simulator models"""
+        purchased = set()
+        for record in records:
+            if not record.u1:
+                continue
+            try:
+                purchased.add(upgrade_.UpgradeId(record.id_))
+            except ValueError:
+                continue
+        return purchased
+
+    def sections(self) -> Dict[str, bytes]:
+        """Split the save into the raw bytes of each section without decoding any records"""
+        result = {}
+        for section in LAYOUT:
+            start = self._pos
+            if section.many:
+                [num_records] = self.read('>H', 2)
+                self._pos += num_records * section.record_type.length()
+            else:
+                self._pos += section.record_type.length()
+            result[section.name] = self._raw[start:self._pos]
+
+        return result
+
+    @staticmethod
+    def decode_section(section: Section, data: bytes) -> Any:
+        """Decode the raw bytes of one section, as returned by Serializer.sections"""
+        return Serializer.from_raw(data).read_section(section)
+
+    def read_section(self, section: Section) -> Any:
+        if section.many:
+            return self.read_many(section.record_type)
+        return self.read_one(section.record_type)
 
     def consume(self, num_bytes: int) -> bytes:
         start = self._pos
@@ -275,13 +442,28 @@ class Serializer:
         decoded = base64.b64decode(savedata[4:-2])
         decompressed = zlib.decompress(decoded, 15)
 
+        # XOR the whole buffer against the repeated key in one big-integer operation
         key = b'therealmisalie'
-        deciphered = b''
-        for i, byte in enumerate(decompressed):
-            deciphered += bytes([byte ^ key[i % len(key)]])
+        length = len(decompressed)
+        key_stream = (key * (length // len(key) + 1))[:length]
+        deciphered = int.from_bytes(decompressed, 'big') ^ int.from_bytes(key_stream, 'big')
+
+        return deciphered.to_bytes(length, 'big')
+
+
+def _enum(type_: Type[E], value: int, default: E) -> E:
+    try:
+        return type_(value)
+    except ValueError:
+        return default
+
+
+def load_save_file(path: str, use_mmap: bool = True) -> str:
+    """Extract the raw save string from a Realm Grinder shared object (.sol) file"""
+    return sol.read_save(path, 'save', use_mmap)
 
-        return deciphered
 
+if __name__ == '__main__':
+    import sys
 
-SAVE_FILE = 'C:/Users/James/AppData/Roaming/com.kongregate.mobile.realmgrinder.air/Local Store/#SharedObjects/RealmGrinderDesktop.swf/realm-grinder.sol'
-Serializer.deserialize(sol.load(SAVE_FILE)['save'])
+    print(Serializer.deserialize(load_save_file(sys.argv[1])).total_production())
@@ -1,12 +1,27 @@
 from __future__ import annotations
 
+import contextlib
 from decimal import Decimal
-from dataclasses import dataclass, replace, field
-from typing import Any, Dict
+from dataclasses import dataclass, field
+from typing import (
+    Any, Callable, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+)
 
-from . import filters
-from .entities import building, modifier, upgrade
+from . import clicks, events, filters
+from . import numeric as numeric_
+from .entities import alignment as alignment_
+from .entities import building, faction as faction_, modifier, spell, upgrade
 
+RESOURCES = ('mana', 'gold', 'gems', 'trophies', 'treasury', 'excavations')
+
+# Registered modifiers of each slot (see modifier.slot), in order of registration
+ModifierTable = List[List[modifier.Modifier]]
+
+# Fields that derived values depend on (resources read by modifier amounts, and the clicking
+# profile behind click income), so assigning them invalidates derived values
+_DERIVED_INPUTS = frozenset({'gems', 'trophies', 'clicking'})
+
+T = TypeVar('T')
 
 _DEFAULT_MODIFIERS = [
     modifier.additive(modifier.Target.CLICK_REWARD, modifier.fixed(1)),
@@ -16,7 +31,7 @@ _DEFAULT_MODIFIERS = [
         modifier.Target.BUILDING_PRODUCTION,
         lambda state, _target: state.trophies,
         filters.building(building.HALL_OF_LEGENDS)
-    )
+    ),
 ]
 
 
@@ -32,7 +47,36 @@ class BuildingState:
     owned: Decimal = Decimal(0)
 
 
-@dataclass(frozen=True)
+@dataclass
+class SpellState:
+    spell: spell.Spell
+    autocast: bool = False
+    # Position in each autocast order, 1 first; 0 if not in that order
+    primary_priority: int = 0
+    secondary_priority: int = 0
+    independent_priority: int = 0
+    casts: int = 0
+    # Elapsed time at which the active spell expires, None if not active
+    active_until: Optional[Decimal] = None
+
+    @property
+    def active(self) -> bool:
+        return self.active_until is not None
+
+
+def _default_modifiers() -> ModifierTable:
+    modifiers: ModifierTable = [[] for _slot in range(modifier.SLOTS)]
+    for mod in _DEFAULT_MODIFIERS:
+        modifiers[mod.slot].append(mod)
+    return modifiers
+
+
+def is_default_modifier(mod: modifier.Modifier) -> bool:
+    """True for modifiers every GameState starts with"""
+    return any(mod is default for default in _DEFAULT_MODIFIERS)
+
+
+@dataclass
 class GameState:
     mana: Decimal = Decimal(1000)
     gold: Decimal = Decimal(0)
@@ -40,104 +84,418 @@ class GameState:
     trophies: Decimal = Decimal(0)
     treasury: Decimal = Decimal(0)
     excavations: Decimal = Decimal(0)
+    elapsed: Decimal = Decimal(0)
+    faction: faction_.FactionId = faction_.FactionId.NONE
+    alignment: alignment_.AlignmentId = alignment_.AlignmentId.NONE
+    numeric: numeric_.Backend = numeric_.DECIMAL
+    clicking: clicks.ClickProfile = clicks.NONE
 
     buildings: Dict[building.BuildingId, BuildingState] = field(default_factory=lambda: {
         b.id_: BuildingState(b) for b in building.all()
     })
-    upgrades: Dict[upgrade.UpgradeId, UpgradeState] = field(default_factory=lambda: {
-        u.id_: UpgradeState(u) for u in upgrade.all()
+    # Left empty, filled with the upgrades reachable under faction and alignment, and kept in
+    # step with them as they change
+    upgrades: Dict[upgrade.UpgradeId, UpgradeState] = field(default_factory=dict)
+    spells: Dict[spell.SpellId, SpellState] = field(default_factory=lambda: {
+        s.id_: SpellState(s) for s in spell.all()
     })
-    modifiers: Dict[modifier.Strategy, Dict[modifier.Target, Dict[int, modifier.Modifier]]] = field(
-        default_factory=lambda: {
-            m.strategy : {m.target : {m.uid: m}} for m in _DEFAULT_MODIFIERS
-        }
+    modifiers: ModifierTable = field(default_factory=_default_modifiers)
+
+    # Called with every event applied to this state, after it is applied (see events.EventLog)
+    listeners: List[Callable[[events.Event], None]] = field(
+        default_factory=list, repr=False, compare=False
     )
 
+    def __post_init__(self) -> None:
+        if not self.upgrades:
+            self._update_reachable_upgrades()
+
+        if self.numeric is not numeric_.DECIMAL:
+            for name in RESOURCES + ('elapsed',):
+                object.__setattr__(self, name, self.numeric.convert(getattr(self, name)))
+            for building_state in self.buildings.values():
+                building_state.owned = self.numeric.convert(building_state.owned)
+
+        # Incremented whenever values derived from this state (e.g. production) may have changed
+        self.version = 0
+        self._derived: Dict[Hashable, Any] = {}
+        self._batch_depth = 0
+        self._batch_dirty = False
+        self._pending_events: List[events.Event] = []
+        self._unsettled = False
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if '_derived' not in self.__dict__:
+            return
+        if name in _DERIVED_INPUTS:
+            self._changed()
+        elif name in ('faction', 'alignment'):
+            self._update_reachable_upgrades()
+            self._changed()
+            self._emit(events.ChangeScope(self.faction, self.alignment))
+
+    def invalidate(self) -> None:
+        """Discard derived values, e.g. after editing buildings or upgrades directly"""
+        self.version += 1
+        self._derived.clear()
+
+    def derived(self, key: Hashable, compute: Callable[[], T]) -> T:
+        """Value of compute(), cached until this state next changes"""
+        if self._batch_dirty:
+            return compute()
+
+        try:
+            return self._derived[key]
+        except KeyError:
+            value = self._derived[key] = compute()
+            return value
+
+    @contextlib.contextmanager
+    def batch(self) -> Iterator[GameState]:
+        """Apply any number of changes as one transaction
+
+        Changes take effect immediately, but derived values are invalidated once and listeners are
+        sent the batch's events when the outermost batch commits. If the block raises, the state
+        is rolled back to how it was when the batch began and, instead of the batch's events,
+        listeners are sent a Rollback event.
+        """
+        if self._batch_depth:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+            return
+
+        checkpoint = events.Checkpoint.capture(self)
+        self._batch_depth = 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth = 0
+            self._pending_events.clear()
+            self._rollback(checkpoint)
+            raise
+
+        self._batch_depth = 0
+        pending, self._pending_events = self._pending_events, []
+        if self._batch_dirty:
+            self._batch_dirty = False
+            self.invalidate()
+        try:
+            for i, event in enumerate(pending):
+                self._unsettled = i < len(pending) - 1
+                for listener in self.listeners:
+                    listener(event)
+        finally:
+            self._unsettled = False
+
+    @property
+    def settled(self) -> bool:
+        """Whether the state is as it was right after the event listeners are being sent
+
+        False while they are sent a committed batch's events, all but the last of which the
+        state is already past.
+        """
+        return not self._unsettled
+
+    def copy(self) -> GameState:
+        """An independent copy of this state (without listeners)"""
+        return events.Checkpoint.capture(self).restore()
+
     def purchase_building(self, building_id: building.BuildingId, quantity: Decimal) -> GameState:
-        self.buildings[building_id].owned += quantity
+        self.buildings[building_id].owned += self.numeric.convert(quantity)
+        self._changed()
+        self._emit(events.PurchaseBuilding(building_id, quantity))
 
         return self
 
     def purchase_upgrade(self, upgrade: upgrade.Upgrade, spend_gold: bool = False) -> GameState:
+        # Upgrades outside the state's faction and alignment can still be bought explicitly
+        self.upgrades.setdefault(upgrade.id_, UpgradeState(upgrade))
         if not self.upgrades[upgrade.id_].purchased:
             self.upgrades[upgrade.id_].purchased = True
 
             for modifier in upgrade.effects:
-                self.register_modifier(modifier)
+                self._register_modifier(modifier)
 
             if spend_gold:
-                self.gold -= upgrade.cost
+                self.gold -= self.numeric.convert(upgrade.cost)
+
+            self._changed()
+            self._emit(events.PurchaseUpgrade(upgrade.id_, spend_gold))
 
         return self
 
     def unpurchase_upgrade(self, upgrade: upgrade.Upgrade, credit_gold: bool = False) -> GameState:
-        if self.upgrades[upgrade.id_].purchased:
+        if upgrade.id_ in self.upgrades and self.upgrades[upgrade.id_].purchased:
             self.upgrades[upgrade.id_].purchased = False
 
             for modifier in upgrade.effects:
-                self.deregister_modifier(modifier)
+                self._deregister_modifier(modifier)
 
             if credit_gold:
-                self.gold += upgrade.cost
+                self.gold += self.numeric.convert(upgrade.cost)
+
+            self._changed()
+            self._emit(events.UnpurchaseUpgrade(upgrade.id_, credit_gold))
+
+        return self
+
+    def cast_spell(self, spell: spell.Spell) -> GameState:
+        """Spend mana on spell, applying its instant effect and activating its effects
+
+        Spells stay active until expire_spell is called; spells.run schedules expiry.
+        """
+        spell_state = self.spells[spell.id_]
+        if spell_state.active:
+            raise ValueError(f'{spell.name} is already active')
+        cost = self.numeric.convert(spell.cost)
+        if self.mana < cost:
+            raise ValueError(f'Not enough mana to cast {spell.name}')
+
+        self.mana -= cost
+        spell_state.casts += 1
+        if spell.duration:
+            spell_state.active_until = self.elapsed + self.numeric.convert(spell.duration)
+            for modifier in spell.effects:
+                self._register_modifier(modifier)
+        if spell.on_cast is not None:
+            spell.on_cast(self)
+
+        self._changed()
+        self._emit(events.CastSpell(spell.id_))
+
+        return self
+
+    def expire_spell(self, spell: spell.Spell) -> GameState:
+        spell_state = self.spells[spell.id_]
+        if spell_state.active:
+            spell_state.active_until = None
+            for modifier in spell.effects:
+                self._deregister_modifier(modifier)
+
+            self._changed()
+            self._emit(events.ExpireSpell(spell.id_))
 
         return self
 
     def register_modifier(self, modifier: modifier.Modifier) -> GameState:
-        (self.modifiers
-            .setdefault(modifier.strategy, {})
-            .setdefault(modifier.target, {})
-        )[modifier.uid] = modifier
+        self._register_modifier(modifier)
+        self._changed()
+        self._emit(events.RegisterModifier(modifier))
 
         return self
 
     def deregister_modifier(self, modifier: modifier.Modifier) -> GameState:
-        (self.modifiers
-            .setdefault(modifier.strategy, {})
-            .setdefault(modifier.target, {})
-        ).pop(modifier.uid, None)
+        self._deregister_modifier(modifier)
+        self._changed()
+        self._emit(events.DeregisterModifier(modifier))
 
         return self
 
-    def calculate_building_production(self) -> Decimal:
-        production = Decimal(0)
+    def advance_time(self, seconds: Decimal) -> GameState:
+        """Collect production and click income and regenerate mana for a number of seconds"""
+        seconds = self.numeric.convert(seconds)
+
+        self.gold += self.total_production() * seconds \
+            + self.click_income(self.elapsed, self.elapsed + seconds)
+        max_mana = self.apply_modifiers(None, modifier.Target.MAX_MANA)
+        if self.mana < max_mana:
+            regen = self.apply_modifiers(None, modifier.Target.MANA_REGEN)
+            self.mana = min(max_mana, self.mana + regen * seconds)
+        self.elapsed += seconds
+        self._emit(events.AdvanceTime(seconds))
 
-        for building_state in self.buildings.values():
-            if building_state.owned == 0:
-                continue
+        return self
 
-            production += building_state.owned * self.apply_modifiers(
+    def _update_reachable_upgrades(self) -> None:
+        """Track the upgrades reachable now, keeping purchased ones that no longer are"""
+        reachable = upgrade.reachable(self.faction, self.alignment)
+        reachable_ids = {u.id_ for u in reachable}
+        for id_ in [id_ for id_, u in self.upgrades.items() if not u.purchased]:
+            if id_ not in reachable_ids:
+                del self.upgrades[id_]
+        for u in reachable:
+            self.upgrades.setdefault(u.id_, UpgradeState(u))
+
+    def _register_modifier(self, modifier: modifier.Modifier) -> None:
+        registered = self.modifiers[modifier.slot]
+        if not any(mod is modifier for mod in registered):
+            registered.append(modifier)
+
+    def _deregister_modifier(self, modifier: modifier.Modifier) -> None:
+        registered = self.modifiers[modifier.slot]
+        for i, mod in enumerate(registered):
+            if mod is modifier:
+                del registered[i]
+                return
+
+    def _changed(self) -> None:
+        if self._batch_depth:
+            self._batch_dirty = True
+            self._derived.clear()
+        else:
+            self.invalidate()
+
+    def _emit(self, event: events.Event) -> None:
+        if self._batch_depth:
+            self._pending_events.append(event)
+            return
+
+        for listener in self.listeners:
+            listener(event)
+
+    def _rollback(self, checkpoint: events.Checkpoint) -> None:
+        restored = checkpoint.restore()
+        for name in RESOURCES + ('elapsed', 'faction', 'alignment', 'clicking', 'buildings',
+                                 'upgrades', 'spells', 'modifiers'):
+            object.__setattr__(self, name, getattr(restored, name))
+        self._batch_dirty = False
+        self.invalidate()
+        self._emit(events.Rollback())
+
+    def total_production(self) -> Decimal:
+        """Gold per second from every production source (buildings and assistants)"""
+        return self.derived('total_production', lambda: (
+            self.calculate_building_production() + self.calculate_assistant_production()
+        ))
+
+    def click_reward(self) -> Decimal:
+        """Gold per click"""
+        return self.derived(
+            'click_reward', lambda: self.apply_modifiers(None, modifier.Target.CLICK_REWARD)
+        )
+
+    def clicks_per_second(self) -> Decimal:
+        """Clicks per second while the clicking profile is clicking"""
+        profile = self.clicking
+        if profile.target is None:
+            return self.numeric.convert(0)
+        return self.derived(('clicks_per_second', profile.name), lambda: self.apply_modifiers(
+            None, profile.target, profile.clicks_per_second
+        ))
+
+    def click_income(self, start: Decimal, end: Decimal) -> Decimal:
+        """Gold from clicking between elapsed times start and end, given the state as it is now"""
+        if self.clicking.target is None:
+            return self.numeric.convert(0)
+        clicking = self.clicking.active_seconds(start, end, self.numeric.convert)
+        return clicking * self.clicks_per_second() * self.click_reward()
+
+    # Time to goals, buying the purchases of plan (building or upgrade ids) in order first, each
+    # as soon as it is affordable; None if never reached. See goals, which imports this module.
+
+    def time_to_gold(self, target: Decimal, plan: Sequence[Any] = ()) -> Optional[Decimal]:
+        """Seconds until gold reaches target"""
+        from . import goals  # pylint: disable=import-outside-toplevel
+        return goals.time_to_gold(self, target, plan)
+
+    def time_to_afford(self, purchase: Any, plan: Sequence[Any] = ()) -> Optional[Decimal]:
+        """Seconds until purchase (one more of a building, or an upgrade) is affordable"""
+        from . import goals  # pylint: disable=import-outside-toplevel
+        return goals.time_to_afford(self, purchase, plan)
+
+    def time_to_own(
+            self, building_id: building.BuildingId, count: Decimal,
+            plan: Sequence[Any] = ()) -> Optional[Decimal]:
+        """Seconds until count of a building are owned, buying the missing ones one by one"""
+        from . import goals  # pylint: disable=import-outside-toplevel
+        return goals.time_to_own(self, building_id, count, plan)
+
+    def unit_production(self) -> Dict[building.BuildingId, Decimal]:
+        """Production of one of each owned building"""
+        return self.derived('unit_production', self._calculate_unit_production)
+
+    def _calculate_unit_production(self) -> Dict[building.BuildingId, Decimal]:
+        return {
+            id_: self.apply_modifiers(
                 building_state.building,
                 modifier.Target.BUILDING_PRODUCTION,
                 building_state.building.base_production
             )
+            for id_, building_state in self.buildings.items() if building_state.owned != 0
+        }
 
-        return production
+    def calculate_building_production(self) -> Decimal:
+        return self.derived('building_production', self._calculate_building_production)
+
+    def _calculate_building_production(self) -> Decimal:
+        return self.numeric.sum(
+            self.buildings[id_].owned * unit for id_, unit in self.unit_production().items()
+        )
+
+    def calculate_assistant_production(self) -> Decimal:
+        return self.derived('assistant_production', self._calculate_assistant_production)
+
+    def _calculate_assistant_production(self) -> Decimal:
+        """Each assistant works one owned building, the most productive ones first
+
+        An assistant adds the ASSISTANT_PRODUCTION multiple (base 1) of the production of the
+        building it works. Assigning assistants is one pass over the buildings in order of unit
+        production, each taking min(assistants left, owned), so the cost does not depend on how
+        many assistants there are. Both targets are evaluated once, with target None.
+        """
+        zero = self.numeric.convert(0)
+        assistants = self.apply_modifiers(None, modifier.Target.ASSISTANTS)
+        if assistants <= 0:
+            return zero
+
+        production = zero
+        units = self.unit_production()
+        for id_ in sorted(units, key=units.__getitem__, reverse=True):
+            working = min(assistants, self.buildings[id_].owned)
+            production += working * units[id_]
+            assistants -= working
+            if assistants <= 0:
+                break
+
+        return production * self.apply_modifiers(
+            None, modifier.Target.ASSISTANT_PRODUCTION, Decimal(1)
+        )
+
+    def modifier_terms(
+            self, target: Any, modifier_type: modifier.Target
+    ) -> Tuple[List[Tuple[modifier.Modifier, Any]], List[Tuple[modifier.Modifier, Any]]]:
+        """(modifier, amount) of the additive and of the multiplicative modifiers applying to target
+
+        apply_modifiers(target, modifier_type, base) is (base + sum of additive amounts) times the
+        product of multiplicative amounts.
+        """
+        convert = self.numeric.convert
+        return tuple(  # type: ignore[return-value]
+            [
+                (mod, convert(mod.amount(self, target)))
+                for mod in self.modifiers[modifier.slot(strategy, modifier_type)]
+                if mod.applies_to(self, target)
+            ]
+            for strategy in (modifier.Strategy.ADDITIVE, modifier.Strategy.MULTIPLICATIVE)
+        )
 
     def apply_modifiers(
         self, target: Any, modifer_type: modifier.Target, base_value: Decimal = Decimal(0)
     ):
-        additive_mods = self.modifiers \
-            .get(modifier.Strategy.ADDITIVE, {}) \
-            .get(modifer_type, {}) \
-            .values()
-        multiplicative_mods = self.modifiers \
-            .get(modifier.Strategy.MULTIPLICATIVE, {}) \
-            .get(modifer_type, {}) \
-            .values()
-
-        result = base_value
-
-        for mod in additive_mods:
+        additive_slot, multiplicative_slot = modifier.slots(modifer_type)
+        numeric = self.numeric
+        native = numeric.type_
+
+        # Amounts are converted only if not already in the backend's type: in the Decimal backend
+        # and for fixed amounts in any backend that is never, and costs one type check
+        result = base_value if type(base_value) is native else numeric.convert(base_value)
+
+        for mod in self.modifiers[additive_slot]:
             if mod.applies_to(self, target):
-                result += mod.amount(self, target)
+                amount = mod.amount(self, target)
+                result += amount if type(amount) is native else numeric.convert(amount)
 
-        for mod in multiplicative_mods:
+        for mod in self.modifiers[multiplicative_slot]:
             if mod.applies_to(self, target):
-                result *= mod.amount(self, target)
+                amount = mod.amount(self, target)
+                result *= amount if type(amount) is native else numeric.convert(amount)
 
         return result
 
-
 if __name__ == '__main__':
     state = GameState().purchase_building(building.FARM.id_, Decimal(12))
     print(state.calculate_building_production())
@@ -0,0 +1,351 @@
+"""Minimal reader for Flash local shared object (.sol) files
+
+Realm Grinder stores its save as a single string under the ``save`` key of a shared object. Rather
+than decoding the whole AMF document, this walks the top-level entries, skipping over values
+without building them, and only decodes the value of the requested key. AMF3 arrays and objects
+are first passed over by a pattern search for the key; only if that misses (e.g. the key is sent
+as a string reference) is every value walked with the trait table needed to skip them.
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+from typing import List, Optional, Tuple, Union
+
+Buffer = Union[bytes, mmap.mmap]
+
+_MAGIC = b'\x00\xbf'
+_SIGNATURE = b'TCSO'
+_HEADER_PADDING = 6
+
+# AMF0 type markers
+_AMF0_NUMBER = 0x00
+_AMF0_BOOLEAN = 0x01
+_AMF0_STRING = 0x02
+_AMF0_OBJECT = 0x03
+_AMF0_NULL = 0x05
+_AMF0_UNDEFINED = 0x06
+_AMF0_REFERENCE = 0x07
+_AMF0_ECMA_ARRAY = 0x08
+_AMF0_OBJECT_END = 0x09
+_AMF0_STRICT_ARRAY = 0x0A
+_AMF0_DATE = 0x0B
+_AMF0_LONG_STRING = 0x0C
+_AMF0_UNSUPPORTED = 0x0D
+_AMF0_XML = 0x0F
+_AMF0_TYPED_OBJECT = 0x10
+_AMF0_AVMPLUS = 0x11
+
+# AMF3 type markers
+_AMF3_UNDEFINED = 0x00
+_AMF3_NULL = 0x01
+_AMF3_FALSE = 0x02
+_AMF3_TRUE = 0x03
+_AMF3_INTEGER = 0x04
+_AMF3_DOUBLE = 0x05
+_AMF3_STRING = 0x06
+_AMF3_XML_DOC = 0x07
+_AMF3_DATE = 0x08
+_AMF3_XML = 0x0B
+_AMF3_ARRAY = 0x09
+_AMF3_OBJECT = 0x0A
+_AMF3_BYTE_ARRAY = 0x0C
+_AMF3_VECTOR_INT = 0x0D
+_AMF3_VECTOR_UINT = 0x0E
+_AMF3_VECTOR_DOUBLE = 0x0F
+_AMF3_VECTOR_OBJECT = 0x10
+_AMF3_DICTIONARY = 0x11
+
+
+class _Fallback(Exception):
+    """Raised when a value is too complex to skip without decoding it"""
+
+
+def _u29(value: int) -> bytes:
+    """AMF3 variable length encoding of a 29 bit unsigned integer"""
+    if value < 0x80:
+        return bytes([value])
+    if value < 0x4000:
+        return bytes([(value >> 7) | 0x80, value & 0x7F])
+    if value < 0x200000:
+        return bytes([(value >> 14) | 0x80, ((value >> 7) & 0x7F) | 0x80, value & 0x7F])
+    return bytes([
+        (value >> 22) | 0x80, ((value >> 15) & 0x7F) | 0x80, ((value >> 8) & 0x7F) | 0x80,
+        value & 0xFF,
+    ])
+
+
+class _Reader:
+    def __init__(self, data: Buffer, full: bool = False) -> None:
+        self.data = data
+        self.pos = 0
+        self.amf_version = 0
+        # Skip AMF3 arrays and objects too, rather than raising _Fallback
+        self.full = full
+        # AMF3 strings may be sent by reference to an earlier string, so keep (offset, length)
+        # of every inline string seen. The strings themselves are only decoded if referenced.
+        self._strings: List[Tuple[int, int]] = []
+        # (externalizable, dynamic, sealed member count) of every inline AMF3 trait seen
+        self._traits: List[Tuple[bool, bool, int]] = []
+
+    def u8(self) -> int:
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def unpack(self, fmt: str, size: int) -> tuple:
+        values = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += size
+        return values
+
+    def skip(self, num_bytes: int) -> None:
+        self.pos += num_bytes
+        if self.pos > len(self.data):
+            raise ValueError('Unexpected end of shared object data')
+
+    def text(self, start: int, length: int) -> str:
+        return bytes(self.data[start:start + length]).decode('utf-8')
+
+    def read_header(self) -> None:
+        if self.data[0:2] != _MAGIC:
+            raise ValueError('Not a shared object file (bad magic)')
+        self.skip(6)
+        if self.data[6:10] != _SIGNATURE:
+            raise ValueError('Not a shared object file (missing TCSO signature)')
+        self.skip(4 + _HEADER_PADDING)
+        [name_length] = self.unpack('>H', 2)
+        self.skip(name_length)
+        [self.amf_version] = self.unpack('>I', 4)
+        if self.amf_version not in (0, 3):
+            raise ValueError(f'Unsupported AMF version {self.amf_version}')
+
+    # region AMF0
+    def amf0_key(self) -> Tuple[int, int]:
+        [length] = self.unpack('>H', 2)
+        start = self.pos
+        self.skip(length)
+        return start, length
+
+    def amf0_string(self, marker: int) -> Optional[Tuple[int, int]]:
+        if marker == _AMF0_STRING:
+            [length] = self.unpack('>H', 2)
+        elif marker == _AMF0_LONG_STRING:
+            [length] = self.unpack('>I', 4)
+        else:
+            return None
+        start = self.pos
+        self.skip(length)
+        return start, length
+
+    def skip_amf0_properties(self) -> None:
+        while True:
+            _start, length = self.amf0_key()
+            if length == 0 and self.data[self.pos] == _AMF0_OBJECT_END:
+                self.pos += 1
+                return
+            self.skip_amf0_value()
+
+    def skip_amf0_value(self) -> None:
+        marker = self.u8()
+        if self.amf0_string(marker) is not None:
+            return
+        if marker == _AMF0_NUMBER:
+            self.skip(8)
+        elif marker == _AMF0_BOOLEAN:
+            self.skip(1)
+        elif marker in (_AMF0_NULL, _AMF0_UNDEFINED, _AMF0_UNSUPPORTED):
+            pass
+        elif marker == _AMF0_REFERENCE:
+            self.skip(2)
+        elif marker == _AMF0_DATE:
+            self.skip(10)
+        elif marker == _AMF0_XML:
+            [length] = self.unpack('>I', 4)
+            self.skip(length)
+        elif marker == _AMF0_OBJECT:
+            self.skip_amf0_properties()
+        elif marker == _AMF0_TYPED_OBJECT:
+            self.amf0_key()
+            self.skip_amf0_properties()
+        elif marker == _AMF0_ECMA_ARRAY:
+            self.skip(4)
+            self.skip_amf0_properties()
+        elif marker == _AMF0_STRICT_ARRAY:
+            [count] = self.unpack('>I', 4)
+            for _i in range(count):
+                self.skip_amf0_value()
+        elif marker == _AMF0_AVMPLUS:
+            self.skip_amf3_value()
+        else:
+            raise ValueError(f'Unknown AMF0 marker {marker:#04x} at offset {self.pos - 1}')
+    # endregion
+
+    # region AMF3
+    def u29(self) -> int:
+        value = 0
+        for _i in range(3):
+            byte = self.u8()
+            value = (value << 7) | (byte & 0x7F)
+            if not byte & 0x80:
+                return value
+        return (value << 8) | self.u8()
+
+    def amf3_string(self) -> Tuple[int, int]:
+        header = self.u29()
+        if not header & 1:
+            return self._strings[header >> 1]
+        start, length = self.pos, header >> 1
+        self.skip(length)
+        if length:
+            self._strings.append((start, length))
+        return start, length
+
+    def skip_amf3_value(self) -> None:
+        marker = self.u8()
+        if marker in (_AMF3_UNDEFINED, _AMF3_NULL, _AMF3_FALSE, _AMF3_TRUE):
+            pass
+        elif marker == _AMF3_INTEGER:
+            self.u29()
+        elif marker == _AMF3_DOUBLE:
+            self.skip(8)
+        elif marker == _AMF3_STRING:
+            self.amf3_string()
+        elif marker in (_AMF3_XML_DOC, _AMF3_XML, _AMF3_BYTE_ARRAY):
+            header = self.u29()
+            if header & 1:
+                self.skip(header >> 1)
+        elif marker == _AMF3_DATE:
+            if self.u29() & 1:
+                self.skip(8)
+        elif not self.full:
+            # Arrays, objects, vectors and dictionaries need the trait table to skip reliably,
+            # which is exactly the decoding work this reader avoids unless it has to.
+            raise _Fallback()
+        else:
+            self.skip_amf3_complex(marker)
+
+    def skip_amf3_dynamic_members(self) -> None:
+        while self.amf3_string()[1]:
+            self.skip_amf3_value()
+
+    def skip_amf3_complex(self, marker: int) -> None:
+        header = self.u29()
+        if not header & 1:
+            return  # Reference to an earlier value
+        if marker == _AMF3_ARRAY:
+            self.skip_amf3_dynamic_members()
+            for _i in range(header >> 1):
+                self.skip_amf3_value()
+        elif marker == _AMF3_OBJECT:
+            if not header & 2:
+                externalizable, dynamic, count = self._traits[header >> 2]
+            else:
+                externalizable, dynamic, count = bool(header & 4), bool(header & 8), header >> 4
+                self._traits.append((externalizable, dynamic, count))
+                for _i in range(count + 1):  # Class name, then sealed member names
+                    self.amf3_string()
+            if externalizable:
+                raise ValueError(f'Cannot skip externalizable object at offset {self.pos}')
+            for _i in range(count):
+                self.skip_amf3_value()
+            if dynamic:
+                self.skip_amf3_dynamic_members()
+        elif marker in (_AMF3_VECTOR_INT, _AMF3_VECTOR_UINT, _AMF3_VECTOR_DOUBLE):
+            self.skip(1 + (header >> 1) * (8 if marker == _AMF3_VECTOR_DOUBLE else 4))
+        elif marker == _AMF3_VECTOR_OBJECT:
+            self.skip(1)
+            self.amf3_string()
+            for _i in range(header >> 1):
+                self.skip_amf3_value()
+        elif marker == _AMF3_DICTIONARY:
+            self.skip(1)
+            for _i in range(2 * (header >> 1)):
+                self.skip_amf3_value()
+        else:
+            raise ValueError(f'Unknown AMF3 marker {marker:#04x} at offset {self.pos - 1}')
+    # endregion
+
+    def find_value(self, key: str) -> Tuple[int, int]:
+        """Walk top-level entries and return (offset, length) of the string stored at key"""
+        wanted = key.encode('utf-8')
+        while self.pos < len(self.data):
+            if self.amf_version == 0:
+                start, length = self.amf0_key()
+            else:
+                start, length = self.amf3_string()
+
+            if self.data[start:start + length] == wanted:
+                value = self.string_value()
+                if value is not None:
+                    return value
+
+            if self.amf_version == 0:
+                self.skip_amf0_value()
+            else:
+                self.skip_amf3_value()
+            self.skip(1)  # Each top-level entry is followed by a padding byte
+
+        raise KeyError(key)
+
+    def string_value(self) -> Optional[Tuple[int, int]]:
+        start = self.pos
+        marker = self.u8()
+        if self.amf_version == 3 and marker == _AMF3_STRING:
+            return self.amf3_string()
+        value = self.amf0_string(marker) if self.amf_version == 0 else None
+        if value is None:
+            self.pos = start
+        return value
+
+    def scan_for_value(self, key: str) -> Tuple[int, int]:
+        """Locate key by pattern search from the current position (used past complex values)"""
+        wanted = key.encode('utf-8')
+        if self.amf_version == 0:
+            pattern = struct.pack('>H', len(wanted)) + wanted
+        else:
+            pattern = _u29((len(wanted) << 1) | 1) + wanted
+
+        while True:
+            found = self.data.find(pattern, self.pos)
+            if found < 0:
+                raise KeyError(key)
+            self.pos = found + len(pattern)
+            value = self.string_value()
+            if value is not None:
+                return value
+
+
+def extract(data: Buffer, key: str = 'save') -> str:
+    """Extract the string stored under a top-level key of an in-memory shared object"""
+    reader = _Reader(data)
+    reader.read_header()
+    body_start = reader.pos
+
+    try:
+        start, length = reader.find_value(key)
+    except _Fallback:
+        reader.pos = body_start
+        try:
+            start, length = reader.scan_for_value(key)
+        except KeyError:
+            # The key may only be sent by reference: walk every value after all
+            reader = _Reader(data, full=True)
+            reader.read_header()
+            start, length = reader.find_value(key)
+
+    return reader.text(start, length)
+
+
+def read_save(path: str, key: str = 'save', use_mmap: bool = True) -> str:
+    """Read the string stored under a top-level key of a shared object file
+
+    With use_mmap the file is memory-mapped, so only the pages holding the header, the entries
+    preceding key and the value itself are read from disk.
+    """
+    with open(path, 'rb') as file:
+        if not use_mmap:
+            return extract(file.read(), key)
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return extract(data, key)
@@ -0,0 +1,153 @@
+"""Event-driven simulation of spell casting and autocast
+
+Rather than stepping the game tick by tick, time jumps straight to the next moment something can
+happen: an active spell expiring, or mana reaching the cost of a spell autocast is waiting for.
+Expiries are scheduled on a heap when spells are cast, and the next mana deadline is worked out
+from the current regeneration rate, so a long mana-limited autocast loop costs a few operations
+per cast regardless of how much game time passes.
+
+Autocast follows each spell's settings (SpellState.autocast and priorities). The primary order is
+tried first, then the secondary order: each casts the first of its spells that is not active, and
+waits for mana for that spell rather than casting a cheaper one, holding back the orders after it.
+Spells in the independent order are cast whenever they are affordable and not active.
+"""
+
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterable, List, Optional, Tuple
+
+from . import simulator
+from .entities import modifier, spell as spell_
+
+# Smallest step of game time taken when the next event is due immediately
+_RESOLUTION = Decimal('1e-6')
+
+
+@dataclass(frozen=True)
+class Cast:
+    elapsed: Decimal
+    spell_id: spell_.SpellId
+
+
+def _order(state: simulator.GameState, priority: str) -> List[simulator.SpellState]:
+    ordered = [s for s in state.spells.values() if s.autocast and getattr(s, priority) > 0]
+    return sorted(ordered, key=lambda s: getattr(s, priority))
+
+
+def _wanted(
+        state: simulator.GameState, order: Iterable[simulator.SpellState],
+        max_mana: Decimal) -> Optional[spell_.Spell]:
+    """The spell an autocast order would cast next, skipping spells mana can never pay for"""
+    for spell_state in order:
+        if not spell_state.active and state.numeric.convert(spell_state.spell.cost) <= max_mana:
+            return spell_state.spell
+    return None
+
+
+class Autocaster:
+    """Drive a GameState forward in time, casting and expiring spells as events"""
+
+    def __init__(self, state: simulator.GameState) -> None:
+        self.state = state
+        self.casts: List[Cast] = []
+        # (expiry time, sequence number, spell id); the sequence number breaks ties in cast order
+        self._expiries: List[Tuple[Decimal, int, spell_.SpellId]] = []
+        self._sequence = 0
+
+        for spell_state in state.spells.values():
+            if spell_state.active:
+                self._schedule_expiry(spell_state)
+
+    def cast(self, spell: spell_.Spell) -> None:
+        self.state.cast_spell(spell)
+        self.casts.append(Cast(self.state.elapsed, spell.id_))
+        spell_state = self.state.spells[spell.id_]
+        if spell_state.active:
+            self._schedule_expiry(spell_state)
+
+    def run(self, duration: Decimal) -> List[Cast]:
+        """Advance the state by duration seconds; returns the spells autocast meanwhile"""
+        state = self.state
+        first_cast = len(self.casts)
+        end = state.elapsed + state.numeric.convert(duration)
+
+        while True:
+            self._expire_due()
+            waiting_for = self._autocast()
+            if state.elapsed >= end:
+                break
+
+            next_time = end
+            if self._expiries:
+                next_time = min(next_time, self._expiries[0][0])
+            ready = self._mana_ready(waiting_for)
+            if ready is not None:
+                next_time = min(next_time, ready)
+
+            step = next_time - state.elapsed
+            if step <= 0:
+                # Rounding left mana a hair short of a cost; step just past the shortfall
+                step = min(end - state.elapsed, state.numeric.convert(_RESOLUTION))
+            state.advance_time(step)
+
+        return self.casts[first_cast:]
+
+    def _schedule_expiry(self, spell_state: simulator.SpellState) -> None:
+        assert spell_state.active_until is not None
+        heapq.heappush(
+            self._expiries, (spell_state.active_until, self._sequence, spell_state.spell.id_)
+        )
+        self._sequence += 1
+
+    def _expire_due(self) -> None:
+        while self._expiries and self._expiries[0][0] <= self.state.elapsed:
+            _time, _sequence, spell_id = heapq.heappop(self._expiries)
+            self.state.expire_spell(spell_.get(spell_id))
+
+    def _autocast(self) -> List[spell_.Spell]:
+        """Cast everything autocast can now; returns the spells it is waiting for mana for"""
+        state = self.state
+        max_mana = state.apply_modifiers(None, modifier.Target.MAX_MANA)
+        waiting_for = []
+
+        for priority in ('primary_priority', 'secondary_priority'):
+            order = _order(state, priority)
+            wanted = _wanted(state, order, max_mana)
+            while wanted is not None and state.mana >= state.numeric.convert(wanted.cost):
+                self.cast(wanted)
+                wanted = _wanted(state, order, max_mana)
+            if wanted is not None:
+                waiting_for.append(wanted)
+                break
+
+        for spell_state in _order(state, 'independent_priority'):
+            cost = state.numeric.convert(spell_state.spell.cost)
+            if cost > max_mana:
+                continue
+            # Spells without a duration never become active, so are cast as often as affordable
+            while not spell_state.active and state.mana >= cost:
+                self.cast(spell_state.spell)
+            if not spell_state.active:
+                waiting_for.append(spell_state.spell)
+
+        return waiting_for
+
+    def _mana_ready(self, spells: Iterable[spell_.Spell]) -> Optional[Decimal]:
+        """Elapsed time at which mana first covers the cost of one of spells, if it ever will"""
+        state = self.state
+        regen = state.apply_modifiers(None, modifier.Target.MANA_REGEN)
+        if regen <= 0:
+            return None
+
+        costs = [state.numeric.convert(s.cost) for s in spells]
+        if not costs:
+            return None
+        return state.elapsed + (min(costs) - state.mana) / regen
+
+
+def run(state: simulator.GameState, duration: Decimal) -> List[Cast]:
+    """Advance state by duration seconds, autocasting spells; returns the casts made"""
+    return Autocaster(state).run(duration)
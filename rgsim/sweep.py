@@ -0,0 +1,341 @@
+"""Sweeps of scenario parameters evaluated across a process pool
+
+A sweep is a Grid of scenario parameters (trophies, building counts, purchased upgrade sets,
+faction and horizon), or a seeded Sample of one. Scenarios are numbered, and scenario i is
+decoded from i on demand, so neither a grid nor a sample is ever held in memory however many
+points it has.
+
+run() evaluates scenarios in chunks across a process pool, with a bounded number of chunks in
+flight, and writes each chunk's results to a sink (JSON Lines, or one .npz of columns per chunk)
+as soon as it finishes. Completed scenarios are recorded in a bitmap next to the results, after
+their results are written, so a restarted sweep skips them. A sweep interrupted between writing a
+chunk and recording it evaluates that chunk again; the JSON Lines sink may then hold its results
+twice (the index identifies them), while an .npz part is simply rewritten.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import hashlib
+import json
+import math
+import os
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from . import projection, simulator
+from .entities import building as building_
+from .entities import faction as faction_
+from .entities import upgrade as upgrade_
+
+DEFAULT_CHUNK_SIZE = 256
+
+SPEC_FILE = 'sweep.json'
+BITMAP_FILE = 'completed.bitmap'
+
+# Result fields, in column order
+FIELDS = (
+    'index', 'trophies', 'faction', 'horizon', 'production', 'gold', 'gems', 'abdication',
+    'gems_per_hour',
+)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    trophies: Decimal = Decimal(0)
+    buildings: Tuple[Tuple[building_.BuildingId, int], ...] = ()
+    upgrades: Tuple[upgrade_.UpgradeId, ...] = ()
+    faction: faction_.FactionId = faction_.FactionId.NONE
+    # Seconds to play on from the scenario's state
+    horizon: float = 3600.0
+
+    def state(self) -> simulator.GameState:
+        state = simulator.GameState(
+            trophies=self.trophies, faction=self.faction,
+            alignment=faction_.get(self.faction).alignment.id_
+        )
+        with state.batch():
+            for building_id, count in self.buildings:
+                state.purchase_building(building_id, Decimal(count))
+            for upgrade_id in self.upgrades:
+                state.purchase_upgrade(upgrade_.get(upgrade_id))
+        return state
+
+
+@dataclass(frozen=True)
+class Grid:
+    """Every combination of the given values, numbered in row-major order of the axes"""
+    trophies: Tuple[Decimal, ...] = (Decimal(0),)
+    buildings: Tuple[Tuple[building_.BuildingId, Tuple[int, ...]], ...] = ()
+    upgrade_sets: Tuple[Tuple[upgrade_.UpgradeId, ...], ...] = ((),)
+    factions: Tuple[faction_.FactionId, ...] = (faction_.FactionId.NONE,)
+    horizons: Tuple[float, ...] = (3600.0,)
+
+    def _axes(self) -> List[Sequence[Any]]:
+        return [
+            self.trophies, *(counts for _id, counts in self.buildings), self.upgrade_sets,
+            self.factions, self.horizons,
+        ]
+
+    def __len__(self) -> int:
+        return math.prod(len(axis) for axis in self._axes())
+
+    def __getitem__(self, index: int) -> Scenario:
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        values = []
+        for axis in reversed(self._axes()):
+            index, position = divmod(index, len(axis))
+            values.append(axis[position])
+        trophies, *counts, upgrades, faction, horizon = reversed(values)
+        buildings = tuple(
+            (building_id, count)
+            for (building_id, _counts), count in zip(self.buildings, counts) if count
+        )
+        return Scenario(trophies, buildings, upgrades, faction, horizon)
+
+    def spec(self) -> Dict[str, Any]:
+        return {
+            'trophies': [str(t) for t in self.trophies],
+            'buildings': {id_.name: list(counts) for id_, counts in self.buildings},
+            'upgrades': [[id_.name for id_ in upgrades] for upgrades in self.upgrade_sets],
+            'factions': [f.name for f in self.factions],
+            'horizons': list(self.horizons),
+        }
+
+    @staticmethod
+    def from_spec(spec: Dict[str, Any]) -> Grid:
+        return Grid(
+            tuple(Decimal(str(t)) for t in spec.get('trophies', [0])),
+            tuple(
+                (building_.BuildingId[name], tuple(int(c) for c in counts))
+                for name, counts in spec.get('buildings', {}).items()
+            ),
+            tuple(
+                tuple(upgrade_.UpgradeId[name] for name in upgrades)
+                for upgrades in spec.get('upgrades', [[]])
+            ),
+            tuple(faction_.FactionId[name] for name in spec.get('factions', ['NONE'])),
+            tuple(float(h) for h in spec.get('horizons', [3600])),
+        )
+
+
+@dataclass(frozen=True)
+class Sample:
+    """count scenarios drawn uniformly (with replacement) from a grid
+
+    Draw i depends only on seed and i, so any draw is decoded without generating the others.
+    """
+    grid: Grid
+    count: int
+    seed: int = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> Scenario:
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        generator = np.random.default_rng([self.seed, index])
+        return self.grid[int(generator.integers(len(self.grid)))]
+
+    def spec(self) -> Dict[str, Any]:
+        return {**self.grid.spec(), 'sample': {'count': self.count, 'seed': self.seed}}
+
+
+Sweep = Any  # Grid or Sample: numbered scenarios with a spec
+
+
+def from_spec(spec: Dict[str, Any]) -> Sweep:
+    """The grid, or sample of a grid if spec has a 'sample' entry, that spec describes"""
+    grid = Grid.from_spec(spec)
+    sample = spec.get('sample')
+    if sample is None:
+        return grid
+    return Sample(grid, int(sample['count']), int(sample.get('seed', 0)))
+
+
+def evaluate(index: int, scenario: Scenario) -> Dict[str, Any]:
+    """Production, gold after the horizon and the best abdication of one scenario"""
+    state = scenario.state()
+    production = state.total_production()
+    abdication = projection.optimal_abdication(state, scenario.horizon, earned=Decimal(0))
+    state.advance_time(Decimal(scenario.horizon))
+
+    return {
+        'index': index,
+        'trophies': float(scenario.trophies),
+        'faction': scenario.faction.name,
+        'horizon': scenario.horizon,
+        'production': float(production),
+        'gold': float(state.gold),
+        'gems': abdication.gems,
+        'abdication': abdication.time,
+        'gems_per_hour': abdication.gems_per_hour,
+    }
+
+
+def evaluate_chunk(sweep: Sweep, indices: Sequence[int]) -> List[Dict[str, Any]]:
+    return [evaluate(i, sweep[i]) for i in indices]
+
+
+class Bitmap:
+    """One bit per scenario on disk, set once the scenario's result is written"""
+
+    def __init__(self, path: str, size: int) -> None:
+        length = max(1, (size + 7) // 8)
+        if not os.path.exists(path) or os.path.getsize(path) != length:
+            with open(path, 'wb') as file:
+                file.truncate(length)
+        self.size = size
+        self._bits = np.memmap(path, np.uint8, 'r+', shape=(length,))
+
+    def __contains__(self, index: int) -> bool:
+        return bool(self._bits[index >> 3] & (1 << (index & 7)))
+
+    def add(self, indices: Sequence[int]) -> None:
+        for index in indices:
+            self._bits[index >> 3] |= 1 << (index & 7)
+        self._bits.flush()
+
+    def count(self) -> int:
+        return int(np.unpackbits(self._bits, bitorder='little')[:self.size].sum())
+
+    def pending(self, start: int, end: int) -> List[int]:
+        """Indices in [start, end) not yet set"""
+        bits = np.unpackbits(self._bits[start >> 3:(end + 7) >> 3], bitorder='little')
+        offset = start & ~7
+        return [i for i in range(start, end) if not bits[i - offset]]
+
+
+class JsonLinesSink:
+    def __init__(self, directory: str) -> None:
+        self._file = open(  # pylint: disable=consider-using-with
+            os.path.join(directory, 'results.jsonl'), 'a', encoding='utf-8'
+        )
+
+    def write(self, results: Sequence[Dict[str, Any]]) -> None:
+        self._file.writelines(json.dumps(result) + '\n' for result in results)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class NpzSink:
+    """Results of each chunk as one .npz of columns, named after the chunk's first index"""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = os.path.join(directory, 'parts')
+        os.makedirs(self.directory, exist_ok=True)
+
+    def write(self, results: Sequence[Dict[str, Any]]) -> None:
+        if not results:
+            return
+        columns = {name: np.array([r[name] for r in results]) for name in FIELDS}
+        path = os.path.join(self.directory, f'part-{results[0]["index"]:012d}.npz')
+        temporary = f'{path}.tmp.npz'
+        np.savez(temporary, **columns)
+        os.replace(temporary, path)
+
+    def close(self) -> None:
+        pass
+
+
+SINKS = {'jsonl': JsonLinesSink, 'npz': NpzSink}
+
+
+def load_npz(directory: str) -> Dict[str, np.ndarray]:
+    """All columns written by an npz sink under directory, in index order"""
+    parts_directory = os.path.join(directory, 'parts')
+    parts = [
+        np.load(os.path.join(parts_directory, name))
+        for name in sorted(os.listdir(parts_directory)) if name.endswith('.npz')
+        and not name.endswith('.tmp.npz')
+    ]
+    columns = {name: np.concatenate([part[name] for part in parts]) for name in FIELDS}
+    order = np.argsort(columns['index'], kind='stable')
+    return {name: column[order] for name, column in columns.items()}
+
+
+def _check_spec(directory: str, spec: Dict[str, Any]) -> None:
+    """Record spec for directory, or check it matches the one recorded"""
+    path = os.path.join(directory, SPEC_FILE)
+    encoded = json.dumps(spec, sort_keys=True)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as file:
+            recorded = json.dumps(json.load(file), sort_keys=True)
+        if recorded != encoded:
+            digest = hashlib.sha256(recorded.encode()).hexdigest()[:12]
+            raise ValueError(f'{directory} holds results of a different sweep ({digest})')
+        return
+
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(encoded)
+
+
+def run(
+        sweep: Sweep, directory: str, workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE, sink: str = 'jsonl',
+        max_pending: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Evaluate every scenario of sweep not already completed in directory
+
+    Yields each chunk's results once they are written. At most max_pending chunks (default:
+    twice the worker count) are in flight, so memory does not depend on the size of the sweep.
+    With workers=1 chunks are evaluated in this process.
+    """
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive')
+    if sink not in SINKS:
+        raise ValueError(f'Unknown sink {sink!r}; expected one of {", ".join(SINKS)}')
+
+    os.makedirs(directory, exist_ok=True)
+    _check_spec(directory, sweep.spec())
+    bitmap = Bitmap(os.path.join(directory, BITMAP_FILE), len(sweep))
+    output = SINKS[sink](directory)
+
+    chunks = (
+        bitmap.pending(start, min(start + chunk_size, len(sweep)))
+        for start in range(0, len(sweep), chunk_size)
+    )
+    chunks = (chunk for chunk in chunks if chunk)
+
+    def record(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        output.write(results)
+        bitmap.add([r['index'] for r in results])
+        return results
+
+    workers = workers or os.cpu_count() or 1
+    try:
+        if workers == 1:
+            for chunk in chunks:
+                yield record(evaluate_chunk(sweep, chunk))
+            return
+
+        limit = max_pending or 2 * workers
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            pending: Set[concurrent.futures.Future] = set()
+            for chunk in chunks:
+                pending.add(executor.submit(evaluate_chunk, sweep, chunk))
+                if len(pending) >= limit:
+                    done, pending = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        yield record(future.result())
+
+            for future in concurrent.futures.as_completed(pending):
+                yield record(future.result())
+    finally:
+        output.close()
+
+
+def completed(directory: str, sweep: Sweep) -> int:
+    """Number of scenarios of sweep completed in directory"""
+    path = os.path.join(directory, BITMAP_FILE)
+    return Bitmap(path, len(sweep)).count() if os.path.exists(path) else 0
@@ -0,0 +1,274 @@
+"""Tournaments between purchasing strategies, pruned by successive halving
+
+A strategy plays a run from a starting state for a horizon: it repeatedly picks its next purchase
+(a building or an upgrade), waits until that is affordable, buys it, and is scored by the gold
+earned by the end of the horizon. Waits are closed-form, so playing costs one step per purchase.
+
+Playing every strategy to the full horizon is wasted on the weak ones. Successive halving plays
+all of them for a short horizon, keeps the best 1/eta, multiplies the horizon by eta and repeats
+until the survivors have played the full horizon. Each round's strategies play in parallel.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import math
+import os
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import availability, events, projection, sensitivity, simulator
+from .entities import alignment as alignment_
+from .entities import building as building_
+from .entities import modifier
+from .entities import upgrade as upgrade_
+
+
+@dataclass(frozen=True)
+class Option:
+    purchase: projection.Purchase
+    cost: Decimal
+    # Total production added by the purchase
+    gain: Decimal
+
+
+Policy = Callable[[simulator.GameState, Sequence[Option]], Option]
+
+
+def greedy_roi(_state: simulator.GameState, options: Sequence[Option]) -> Option:
+    """Most production added per gold"""
+    return max(options, key=lambda o: o.gain / o.cost)
+
+
+def cheapest_first(_state: simulator.GameState, options: Sequence[Option]) -> Option:
+    return min(options, key=lambda o: o.cost)
+
+
+def payback(state: simulator.GameState, options: Sequence[Option]) -> Option:
+    """Soonest to pay for itself, counting the wait until it is affordable"""
+    production = state.total_production()
+
+    def seconds(option: Option) -> Tuple[bool, Decimal]:
+        shortfall = option.cost - state.gold
+        if shortfall <= 0:
+            return False, option.cost / option.gain
+        if production <= 0:
+            # Never affordable
+            return True, option.cost
+        return False, shortfall / production + option.cost / option.gain
+
+    return min(options, key=seconds)
+
+
+POLICIES: Dict[str, Policy] = {
+    'greedy_roi': greedy_roi,
+    'cheapest_first': cheapest_first,
+    'payback': payback,
+}
+
+
+@dataclass(frozen=True)
+class Strategy:
+    """A policy picking purchases, in a run of alignment (None plays the state's alignment)
+
+    Only buildings of the run's alignment, or of none, can be bought. Strategies name their
+    policy, so they can be sent to worker processes.
+    """
+    name: str
+    policy: str = 'greedy_roi'
+    alignment: Optional[alignment_.AlignmentId] = None
+
+    def choose(
+            self, state: simulator.GameState,
+            index: availability.AvailabilityIndex) -> Optional[Option]:
+        options = [o for o in _options(state, index) if o.gain > 0]
+        return POLICIES[self.policy](state, options) if options else None
+
+
+_PRODUCTION_TARGETS = frozenset({
+    modifier.Target.BUILDING_PRODUCTION, modifier.Target.ASSISTANTS,
+    modifier.Target.ASSISTANT_PRODUCTION,
+})
+
+
+def _options(
+        state: simulator.GameState, index: availability.AvailabilityIndex) -> List[Option]:
+    convert = state.numeric.convert
+    gains = sensitivity.report(state).buildings
+    options = [
+        Option(
+            id_,
+            convert(projection.building_cost(state, building_state.building, building_state.owned)),
+            gains[id_],
+        )
+        for id_, building_state in state.buildings.items()
+        if building_state.building.buildable(state.alignment)
+    ]
+
+    upgrades = [
+        u for u in index.candidates() if any(m.target in _PRODUCTION_TARGETS for m in u.effects)
+    ]
+    if not upgrades:
+        return options
+
+    # Buying and refunding is exact however the upgrade's effects combine. It is done on a copy,
+    # which has no listeners, so the state's derived values and index are left alone.
+    probe = state.copy()
+    production = probe.total_production()
+    for upgrade in upgrades:
+        with probe.batch():
+            probe.purchase_upgrade(upgrade)
+            gain = probe.total_production() - production
+            probe.unpurchase_upgrade(upgrade)
+        options.append(Option(upgrade.id_, convert(upgrade.cost), gain))
+    return options
+
+
+@dataclass(frozen=True)
+class Outcome:
+    strategy: Strategy
+    horizon: float
+    # Gold earned during the horizon (the score), and production at its end
+    earned: float
+    production: float
+    purchases: int
+
+
+def play(state: simulator.GameState, strategy: Strategy, horizon: float) -> Outcome:
+    """Play strategy from (a copy of) state for horizon seconds
+
+    A strategy with an alignment picks it for the run, unless the state has picked another.
+    """
+    if strategy.alignment is not None \
+            and state.alignment not in (alignment_.AlignmentId.NONE, strategy.alignment):
+        raise ValueError(
+            f'{strategy.name} plays {strategy.alignment.name}, but the state is '
+            f'{state.alignment.name}'
+        )
+    state = state.copy()
+    if strategy.alignment is not None:
+        state.alignment = strategy.alignment
+    index = availability.AvailabilityIndex(state)
+    convert = state.numeric.convert
+    end = state.elapsed + convert(Decimal(horizon))
+    earned = convert(0)
+    purchases = 0
+
+    def advance(seconds: Decimal) -> None:
+        nonlocal earned
+        gold = state.gold
+        state.advance_time(seconds)
+        earned += state.gold - gold
+
+    while True:
+        option = strategy.choose(state, index)
+        if option is None:
+            break
+        shortfall = option.cost - state.gold
+        production = state.total_production()
+        if shortfall > 0 and production <= 0:
+            break
+        wait = shortfall / production if shortfall > 0 else convert(0)
+        if state.elapsed + wait > end:
+            break
+
+        if wait > 0:
+            advance(wait)
+        if isinstance(option.purchase, building_.BuildingId):
+            state.gold -= option.cost
+            state.purchase_building(option.purchase, Decimal(1))
+        else:
+            state.purchase_upgrade(upgrade_.get(option.purchase), spend_gold=True)
+        purchases += 1
+
+    if state.elapsed < end:
+        advance(end - state.elapsed)
+    index.detach()
+    return Outcome(strategy, horizon, float(earned), float(state.total_production()), purchases)
+
+
+def _play_checkpoint(
+        checkpoint: events.Checkpoint, strategy: Strategy, horizon: float) -> Outcome:
+    return play(checkpoint.restore(), strategy, horizon)
+
+
+@dataclass(frozen=True)
+class Round:
+    horizon: float
+    # Best first
+    outcomes: Tuple[Outcome, ...]
+
+
+@dataclass(frozen=True)
+class Tournament:
+    rounds: Tuple[Round, ...]
+
+    def ranking(self) -> List[Outcome]:
+        """Every strategy's last outcome, those that lasted more rounds first, then by score"""
+        last: Dict[str, Tuple[int, Outcome]] = {}
+        for number, round_ in enumerate(self.rounds):
+            for outcome in round_.outcomes:
+                last[outcome.strategy.name] = (number, outcome)
+        ordered = sorted(last.values(), key=lambda item: (-item[0], -item[1].earned))
+        return [outcome for _number, outcome in ordered]
+
+    @property
+    def winner(self) -> Strategy:
+        return self.rounds[-1].outcomes[0].strategy
+
+
+def run(
+        state: simulator.GameState, strategies: Iterable[Strategy], min_horizon: float,
+        max_horizon: float, eta: int = 2, workers: Optional[int] = None) -> Tournament:
+    """Rank strategies from state by gold earned over max_horizon, by successive halving
+
+    Rounds start at min_horizon and grow by a factor of eta, each keeping the best
+    ceil(n / eta) strategies, until the survivors have played max_horizon. workers=1 plays in
+    this process; None uses one worker per CPU.
+    """
+    strategies = list(strategies)
+    if not strategies:
+        raise ValueError('No strategies to compare')
+    if len({s.name for s in strategies}) != len(strategies):
+        raise ValueError('Strategy names must be unique')
+    if eta < 2 or not 0 < min_horizon <= max_horizon:
+        raise ValueError('eta must be at least 2 and 0 < min_horizon <= max_horizon')
+
+    checkpoint = events.Checkpoint.capture(state)
+    workers = workers or os.cpu_count() or 1
+    executor = concurrent.futures.ProcessPoolExecutor(min(workers, len(strategies))) \
+        if workers > 1 and len(strategies) > 1 else None
+
+    rounds: List[Round] = []
+    survivors, horizon = strategies, float(min_horizon)
+    try:
+        while True:
+            horizon = min(horizon, float(max_horizon))
+            arguments = ([checkpoint] * len(survivors), survivors, [horizon] * len(survivors))
+            outcomes = list(
+                executor.map(_play_checkpoint, *arguments) if executor is not None
+                else map(_play_checkpoint, *arguments)
+            )
+            outcomes.sort(key=lambda o: o.earned, reverse=True)
+            rounds.append(Round(horizon, tuple(outcomes)))
+
+            if horizon >= max_horizon:
+                return Tournament(tuple(rounds))
+            survivors = [o.strategy for o in outcomes[:math.ceil(len(outcomes) / eta)]]
+            horizon *= eta
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def default_strategies(
+        alignment: alignment_.AlignmentId = alignment_.AlignmentId.NONE) -> List[Strategy]:
+    """Every policy, and greedy ROI picking each primary alignment if alignment is still NONE"""
+    strategies = [Strategy(name, name) for name in POLICIES]
+    if alignment == alignment_.AlignmentId.NONE:
+        strategies += [
+            Strategy(f'greedy_roi_{a.name.lower()}', 'greedy_roi', a.id_)
+            for a in alignment_.all() if a.is_primary
+        ]
+    return strategies
@@ -0,0 +1,150 @@
+"""Follow the running game by watching its save file"""
+
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import threading
+import zlib
+from binascii import Error as Base64Error
+from typing import Any, Callable, Dict, List, Optional
+
+from . import diff, serializer, simulator, sol
+
+_LOG = logging.getLogger(__name__)
+
+_SAVE_FILE_ENV = 'RGSIM_SAVE_FILE'
+_SAVE_FILE_RELATIVE = os.path.join(
+    'com.kongregate.mobile.realmgrinder.air', 'Local Store', '#SharedObjects',
+    'RealmGrinderDesktop.swf', 'realm-grinder.sol'
+)
+
+# Errors raised while reading a save the game is still in the middle of writing
+_PARTIAL_WRITE_ERRORS = (OSError, ValueError, KeyError, IndexError, struct.error, zlib.error,
+                         Base64Error)
+
+Subscriber = Callable[[simulator.GameState, diff.StateDiff], None]
+
+
+def default_save_path() -> str:
+    """Location of the desktop game's save: $RGSIM_SAVE_FILE if set, otherwise under %APPDATA%"""
+    override = os.environ.get(_SAVE_FILE_ENV)
+    if override:
+        return override
+
+    return os.path.join(os.environ.get('APPDATA', os.path.expanduser('~')), _SAVE_FILE_RELATIVE)
+
+
+class SaveWatcher:
+    """Reload a save whenever the game writes it and publish what changed to subscribers
+
+    The game rewrites its save in bursts, so reloads are debounced until the file has been quiet
+    for `debounce` seconds. Only sections whose bytes changed since the previous load are decoded
+    again.
+    """
+
+    def __init__(self, path: Optional[str] = None, debounce: float = 0.5) -> None:
+        self.path = os.path.abspath(path if path is not None else default_save_path())
+        self.debounce = debounce
+        self.state: Optional[simulator.GameState] = None
+
+        self._subscribers: List[Subscriber] = []
+        self._sections: Dict[str, bytes] = {}
+        self._decoded: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._observer: Any = None
+
+    def subscribe(self, subscriber: Subscriber) -> Callable[[], None]:
+        """Call subscriber(state, diff) after every reload that changes the state
+
+        Returns a function that removes the subscription.
+        """
+        self._subscribers.append(subscriber)
+        return lambda: self._subscribers.remove(subscriber)
+
+    def start(self) -> SaveWatcher:
+        """Load the current save and start watching for changes"""
+        # watchdog starts native observer threads, so only pull it in when actually watching
+        # pylint: disable=import-outside-toplevel
+        from watchdog.events import FileSystemEventHandler  # type: ignore
+        from watchdog.observers import Observer  # type: ignore
+
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):  # type: ignore
+            def on_any_event(self, event: Any) -> None:
+                paths = (getattr(event, 'src_path', None), getattr(event, 'dest_path', None))
+                if watcher.path in (os.path.abspath(p) for p in paths if p):
+                    watcher.schedule_reload()
+
+        self.reload()
+        self._observer = Observer()
+        self._observer.schedule(_Handler(), os.path.dirname(self.path), recursive=False)
+        self._observer.start()
+        return self
+
+    def stop(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def __enter__(self) -> SaveWatcher:
+        return self.start()
+
+    def __exit__(self, *_exc_info: Any) -> None:
+        self.stop()
+
+    def schedule_reload(self) -> None:
+        """Reload once no further writes have been seen for the debounce period"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self.reload)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def reload(self) -> Optional[diff.StateDiff]:
+        """Re-read the save now, returning the published diff (None if nothing changed)"""
+        with self._reload_lock:
+            return self._reload()
+
+    def _reload(self) -> Optional[diff.StateDiff]:
+        # Nothing is kept unless the whole save decodes, so a save caught mid-write leaves the
+        # previous sections, decoded records and state in place for the next reload
+        try:
+            sections = serializer.Serializer(sol.read_save(self.path)).sections()
+            decoded = dict(self._decoded)
+            for section in serializer.LAYOUT:
+                data = sections[section.name]
+                if self._sections.get(section.name) != data:
+                    decoded[section.name] = serializer.Serializer.decode_section(section, data)
+
+            if self.state is None:
+                state = serializer.Serializer.hydrate(serializer.SaveData.from_sections(decoded))
+                changes = diff.states(simulator.GameState(), state)
+            else:
+                state = self.state
+                changes = diff.sections(self._sections, sections)
+                # Sections StateDiff does not describe (e.g. spells) still change the state
+                if sections != self._sections:
+                    state = serializer.Serializer.hydrate(
+                        serializer.SaveData.from_sections(decoded)
+                    )
+        except _PARTIAL_WRITE_ERRORS as exc:
+            _LOG.debug('Skipping unreadable save %s: %s', self.path, exc)
+            return None
+
+        self.state, self._sections, self._decoded = state, sections, decoded
+
+        if changes:
+            for subscriber in list(self._subscribers):
+                subscriber(self.state, changes)
+            return changes
+
+        return None
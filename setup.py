@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-from distutils.core import setup
+from setuptools import find_packages, setup
 
 setup(
     name='rgsim',
@@ -9,9 +9,10 @@ setup(
     author='James Bungard',
     author_email='jmbungard@gmail.com',
     url='https://www.github.com/repos/verdesmarald/rgsim',
-    packages=['rgsim'],
+    packages=find_packages(include=['rgsim', 'rgsim.*']),
+    package_data={'rgsim.entities': ['entities.json']},
     zip_safe=False,
-    entry_points = {
-        'console_scripts': ['rgsim=rgsim.gui.app:main'],
+    entry_points={
+        'console_scripts': ['rgsim=rgsim.cli:main'],
     }
 )
\ No newline at end of file
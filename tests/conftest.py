@@ -0,0 +1,67 @@
+import base64
+import struct
+import zlib
+from dataclasses import astuple
+from typing import Callable, Dict, List, Optional
+
+import pytest
+
+from rgsim import serializer
+
+
+def encode_save(records: Dict[str, object]) -> str:
+    """Encode records (keyed by serializer.LAYOUT section name) as a game save string"""
+    raw = b''
+    for section in serializer.LAYOUT:
+        value = records[section.name]
+        signature = section.record_type.signature()
+        if section.many:
+            raw += struct.pack('>H', len(value))
+            raw += b''.join(struct.pack(signature, *astuple(r)) for r in value)
+        else:
+            raw += struct.pack(signature, *astuple(value))
+
+    key = b'therealmisalie'
+    ciphered = bytes(byte ^ key[i % len(key)] for i, byte in enumerate(raw))
+    return 'rgsv' + base64.b64encode(zlib.compress(ciphered)).decode() + '!!'
+
+
+def default_records(
+        buildings: Optional[Dict[int, int]] = None,
+        upgrades: Optional[List[int]] = None,
+        gems: float = 0, coins: float = 0) -> Dict[str, object]:
+    return {
+        'header': serializer.Header(1, 0, 0, 0, 0, 0, 12345, 0, 0, 0, 0),
+        'buildings': [
+            serializer.Building(id_, owned, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+            for id_, owned in (buildings or {}).items()
+        ],
+        'upgrades': [serializer.Upgrade(id_, True, False, False, 7) for id_ in upgrades or []],
+        'trophies': [serializer.Trophy(1, True, 0)],
+        'artifact_rng_state': serializer.ArtifactRngState(99),
+        'spells': [],
+        'current_game': serializer.CurrentGame(0, 0, 0, 0, gems, 1, 0, 0, 0, 500.0, coins, 0, 3),
+        'faction_coins': [serializer.FactionCoin(0, 0)],
+        'event_resources': [],
+        'stats': [serializer.Statistic(1, 2, 3)],
+        'lineages': [],
+    }
+
+
+@pytest.fixture
+def make_save() -> Callable[..., str]:
+    """Factory building save strings from a few headline values"""
+    return lambda **kwargs: encode_save(default_records(**kwargs))
+
+
+def write_sol(path, save: str) -> None:
+    """Write save as the only entry of an AMF0 shared object file"""
+    data = save.encode()
+    body = struct.pack('>H', 4) + b'save' + b'\x0c' + struct.pack('>I', len(data)) + data + b'\x00'
+    name = b'realm-grinder'
+    payload = (
+        b'TCSO' + b'\x00\x04\x00\x00\x00\x00' + struct.pack('>H', len(name)) + name
+        + struct.pack('>I', 0) + body
+    )
+    with open(path, 'wb') as file:
+        file.write(b'\x00\xbf' + struct.pack('>I', len(payload)) + payload)
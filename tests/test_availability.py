@@ -0,0 +1,86 @@
+from decimal import Decimal
+
+import pytest
+
+from rgsim import availability, simulator
+from rgsim.entities import alignment, building, upgrade
+
+FARM_DEPENDENCY = upgrade.building_dependency(building.BuildingId.FARM)
+
+
+def _state() -> simulator.GameState:
+    state = simulator.GameState()
+    # Ten farms unlock Heavy Plow, which is only available once Crop Rotation is bought
+    state.upgrades[upgrade.UpgradeId.HEAVY_PLOW] = simulator.UpgradeState(upgrade.Upgrade(
+        upgrade.UpgradeId.HEAVY_PLOW, Decimal(300),
+        unlocked=upgrade.owns(building.BuildingId.FARM, 10),
+        available=lambda s: s.upgrades[upgrade.UpgradeId.CROP_ROTATION].purchased,
+        depends_on=frozenset({
+            FARM_DEPENDENCY, upgrade.upgrade_dependency(upgrade.UpgradeId.CROP_ROTATION)
+        }),
+    ))
+    return state
+
+
+def test_ready_set_follows_gold_and_events():
+    state = _state()
+    index = availability.AvailabilityIndex(state)
+    plow = upgrade.UpgradeId.HEAVY_PLOW
+
+    assert not index.ready()
+    state.gold = Decimal(500)
+    assert [u.id_ for u in index.ready()] == [
+        upgrade.UpgradeId.CROP_ROTATION, upgrade.UpgradeId.STURDY_TREASURE
+    ]
+
+    state.purchase_building(building.FARM.id_, Decimal(10))
+    assert index.is_unlocked(plow) and not index.is_available(plow)
+
+    state.purchase_upgrade(upgrade.CROP_ROTATION, spend_gold=True)
+    ready = [u.id_ for u in index.ready()]
+    assert plow in ready and upgrade.UpgradeId.CROP_ROTATION not in ready
+    assert index.ready() == sorted(index.ready(), key=lambda u: u.cost)
+
+
+def test_only_dependents_are_reevaluated():
+    state = _state()
+    index = availability.AvailabilityIndex(state)
+    evaluations = index.evaluations
+
+    for _i in range(20):
+        state.purchase_building(building.INN.id_, Decimal(1))
+    assert index.evaluations == evaluations
+
+    state.purchase_building(building.FARM.id_, Decimal(1))
+    assert index.evaluations == evaluations + 1
+
+    state.alignment = alignment.AlignmentId.NEUTRAL
+    assert upgrade.UpgradeId.GRINDING_DEDICATION in [u.id_ for u in index.candidates()]
+
+
+def test_undeclared_dependencies_are_reevaluated_on_every_change():
+    state = simulator.GameState()
+    state.upgrades[upgrade.UpgradeId.HEAVY_PLOW] = simulator.UpgradeState(upgrade.Upgrade(
+        upgrade.UpgradeId.HEAVY_PLOW, Decimal(300), unlocked=upgrade.owns(building.FARM.id_, 10)
+    ))
+    index = availability.AvailabilityIndex(state)
+
+    assert not index.is_unlocked(upgrade.UpgradeId.HEAVY_PLOW)
+    state.purchase_building(building.FARM.id_, Decimal(10))
+    assert index.is_unlocked(upgrade.UpgradeId.HEAVY_PLOW)
+
+
+def test_rollback_refreshes_the_index():
+    state = _state()
+    state.gold = Decimal(500)
+    index = availability.AvailabilityIndex(state)
+
+    with pytest.raises(RuntimeError):
+        with state.batch():
+            state.purchase_upgrade(upgrade.CROP_ROTATION)
+            index.refresh()
+            assert upgrade.CROP_ROTATION not in index.ready()
+            raise RuntimeError
+
+    assert upgrade.CROP_ROTATION in index.ready()
+    assert index.candidates() == availability.AvailabilityIndex(state).candidates()
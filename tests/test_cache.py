@@ -0,0 +1,78 @@
+import mmap
+import os
+
+import numpy as np
+
+from rgsim import cache, diff, serializer
+from rgsim.entities import building
+
+
+def _entry_path(directory, save):
+    return directory / (cache.SaveCache.key(save) + '.v3.rgs')
+
+
+def test_repeat_loads_hit_the_cache(tmp_path, make_save, monkeypatch):
+    save_cache = cache.SaveCache(str(tmp_path))
+    save = make_save(buildings={building.FARM.id_.value: 7}, gems=3)
+
+    first = save_cache.parse(save)
+    assert save_cache.misses == 1
+
+    # Hits neither decipher the save nor unpack a single record
+    def fail(*_args):
+        raise AssertionError('decoded a cached save')
+    monkeypatch.setattr(serializer.Serializer, '_get_bytes', fail)
+    monkeypatch.setattr(serializer.Serializer, 'read_section', fail)
+
+    second = cache.SaveCache(str(tmp_path)).parse(save)
+    assert serializer.Serializer.deserialize(save, cache=save_cache).buildings[
+        building.FARM.id_].owned == 7
+    assert save_cache.hits == 1
+    assert diff.saves(save, save, save_cache) == diff.StateDiff({}, {}, frozenset(), frozenset())
+    monkeypatch.undo()
+
+    assert first == second == serializer.Serializer.parse(save)
+
+
+def test_unreadable_entries_are_rebuilt(tmp_path, make_save):
+    save_cache = cache.SaveCache(str(tmp_path))
+    save = make_save(gems=2)
+    save_cache.parse(save)
+    path = _entry_path(tmp_path, save)
+    whole = path.read_bytes()
+
+    for data in (b'', whole[:len(whole) - 3]):
+        path.write_bytes(data)
+        assert save_cache.parse(save) == serializer.Serializer.parse(save)
+    assert save_cache.misses == 3
+
+
+def test_evicts_least_recently_used_across_processes(tmp_path, make_save):
+    saves = [make_save(gems=i) for i in range(3)]
+    cache.SaveCache(str(tmp_path)).parse(saves[0])
+    entry_size = os.path.getsize(_entry_path(tmp_path, saves[0]))
+    os.utime(_entry_path(tmp_path, saves[0]), (1, 1))
+
+    # Separate instances stand in for separate processes sharing the directory
+    cache.SaveCache(str(tmp_path), max_bytes=2 * entry_size).parse(saves[1])
+    os.utime(_entry_path(tmp_path, saves[1]), (2, 2))
+    save_cache = cache.SaveCache(str(tmp_path), max_bytes=2 * entry_size)
+    save_cache.parse(saves[2])
+
+    assert save_cache.size() <= 2 * entry_size
+    assert not _entry_path(tmp_path, saves[0]).exists()
+    assert _entry_path(tmp_path, saves[2]).exists()
+
+
+def test_tables_are_mapped_from_the_entry(tmp_path, make_save):
+    save = make_save(buildings={building.FARM.id_.value: 7, 13: 2}, upgrades=[501001])
+    cache.SaveCache(str(tmp_path)).parse(save)
+
+    save_cache = cache.SaveCache(str(tmp_path))
+    tables = save_cache.tables(save)
+    assert save_cache.hits == 1
+    assert isinstance(tables['buildings'], np.ndarray)
+    assert isinstance(tables['buildings'].base.obj, mmap.mmap)
+    assert tables['buildings']['current_quantity'].tolist() == [7, 2]
+    assert tables['upgrades']['id_'].tolist() == [501001]
+    assert tables['current_game']['gems'].tolist() == [0]
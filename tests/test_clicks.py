@@ -0,0 +1,63 @@
+from decimal import Decimal
+
+import pytest
+
+from rgsim import clicks, events, numeric, simulator
+from rgsim.entities import building, modifier, upgrade
+
+
+def test_no_clicking_by_default():
+    state = simulator.GameState()
+    state.purchase_building(building.FARM.id_, Decimal(1))
+    state.advance_time(Decimal(10))
+
+    assert state.gold == 20
+
+
+def test_click_income_over_days_is_closed_form(monkeypatch):
+    state = simulator.GameState(clicking=clicks.AUTOCLICKER)
+    state.purchase_building(building.FARM.id_, Decimal(5))
+    state.purchase_upgrade(upgrade.STURDY_TREASURE)
+    state.purchase_upgrade(upgrade.PRECIOUS_TREASURE)
+
+    # 1 + 4 per click, plus 1% of the 10 gold/s produced
+    assert state.click_reward() == Decimal('5.1')
+
+    calls = []
+    apply_modifiers = simulator.GameState.apply_modifiers
+    monkeypatch.setattr(
+        simulator.GameState, 'apply_modifiers',
+        lambda *args, **kwargs: calls.append(args) or apply_modifiers(*args, **kwargs)
+    )
+    days = 3 * 24 * 3600
+    state.advance_time(Decimal(days))
+
+    assert state.gold == days * (10 + 20 * Decimal('5.1'))
+    assert len(calls) < 10
+
+
+def test_periodic_profile():
+    profile = clicks.HUMAN
+    hour = 3600
+
+    assert profile.active_seconds(Decimal(0), Decimal(hour)) == 600
+    assert profile.active_seconds(Decimal(300), Decimal(2 * hour + 100)) == 300 + 600 + 100
+    assert profile.active_seconds(1000.0, 3000.0, float) == 0
+    with pytest.raises(ValueError):
+        clicks.ClickProfile('broken', period=Decimal(60), active=Decimal(61))
+
+
+def test_profile_targets_and_backends():
+    state = simulator.GameState(clicking=clicks.OFFLINE, numeric=numeric.FLOAT)
+    state.purchase_upgrade(upgrade.STURDY_TREASURE)
+    state.purchase_upgrade(upgrade.DURABLE_TREASURE)
+    state.register_modifier(modifier.additive(modifier.Target.CLICKS_PER_SECOND, modifier.fixed(5)))
+
+    # Offline clicks only count the treasures' offline clicks
+    assert state.clicks_per_second() == 2
+    state.advance_time(Decimal(10))
+    assert state.gold == pytest.approx(10 * 2 * 50)
+
+    state.clicking = clicks.HUMAN
+    assert state.clicks_per_second() == 6 + 5
+    assert events.Checkpoint.capture(state).restore().clicking is clicks.HUMAN
@@ -0,0 +1,32 @@
+from decimal import Decimal
+
+from rgsim import diff, serializer
+from rgsim.entities import building, upgrade
+
+
+def test_save_diff_matches_state_diff(make_save):
+    before = make_save(
+        buildings={building.FARM.id_.value: 10, building.INN.id_.value: 2},
+        upgrades=[upgrade.CROP_ROTATION.id_.value], gems=5, coins=100
+    )
+    after = make_save(
+        buildings={building.FARM.id_.value: 15, building.INN.id_.value: 2},
+        upgrades=[upgrade.IRRIGATION.id_.value], gems=8, coins=100
+    )
+
+    changes = diff.saves(before, after)
+
+    assert changes == diff.states(
+        serializer.Serializer.deserialize(before), serializer.Serializer.deserialize(after)
+    )
+    assert changes.buildings == {building.FARM.id_: 5}
+    assert changes.purchased == {upgrade.IRRIGATION.id_}
+    assert changes.unpurchased == {upgrade.CROP_ROTATION.id_}
+    assert changes.resources == {'gems': Decimal(3)}
+
+
+def test_identical_saves_decode_nothing(make_save, monkeypatch):
+    save = make_save(buildings={building.FARM.id_.value: 10})
+    monkeypatch.setattr(serializer.Serializer, 'decode_section', None)
+
+    assert not diff.saves(save, save)
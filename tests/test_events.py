@@ -0,0 +1,72 @@
+from decimal import Decimal
+
+from rgsim import events, simulator
+from rgsim.entities import building, modifier, upgrade
+
+
+def _session(state):
+    snapshots = [events.Checkpoint.capture(state)]
+    for step in range(30):
+        state.purchase_building(building.FARM.id_, Decimal(1))
+        snapshots.append(events.Checkpoint.capture(state))
+        if step == 5:
+            state.purchase_upgrade(upgrade.CROP_ROTATION)
+            snapshots.append(events.Checkpoint.capture(state))
+        if step == 17:
+            state.unpurchase_upgrade(upgrade.CROP_ROTATION)
+            snapshots.append(events.Checkpoint.capture(state))
+        state.advance_time(Decimal(10))
+        snapshots.append(events.Checkpoint.capture(state))
+    return snapshots
+
+
+def test_state_at_matches_history():
+    state = simulator.GameState()
+    log = events.EventLog(state, checkpoint_interval=7)
+    snapshots = _session(state)
+
+    assert len(log) == len(snapshots) - 1
+    for position in (0, 1, 6, 7, 13, 14, 40, len(log)):
+        assert events.Checkpoint.capture(log.state_at(position)) == snapshots[position]
+
+
+def test_rewind_continues_logging():
+    state = simulator.GameState()
+    log = events.EventLog(state, checkpoint_interval=5)
+    snapshots = _session(state)
+
+    rewound = log.rewind(12)
+    rewound.purchase_building(building.INN.id_, Decimal(2))
+
+    assert len(log) == 13
+    assert events.Checkpoint.capture(log.state_at(12)) == snapshots[12]
+    assert log.state_at(13).buildings[building.INN.id_].owned == 2
+    assert not state.listeners
+
+
+def test_advance_time_and_copy():
+    state = simulator.GameState(mana=Decimal(0)).purchase_building(building.FARM.id_, Decimal(3))
+    extra = modifier.multiplicative(modifier.Target.BUILDING_PRODUCTION, modifier.fixed(2))
+    state.register_modifier(extra)
+    state.advance_time(Decimal(60))
+
+    assert state.gold == 3 * 2 * 2 * 60
+    assert state.mana == 60
+    assert state.elapsed == 60
+
+    copy = state.copy()
+    assert copy.calculate_building_production() == state.calculate_building_production()
+    copy.purchase_building(building.FARM.id_, Decimal(1))
+    assert state.buildings[building.FARM.id_].owned == 3
+
+
+def test_state_at_replays_batches():
+    state = simulator.GameState()
+    log = events.EventLog(state, checkpoint_interval=2)
+    with state.batch():
+        for _i in range(5):
+            state.purchase_building(building.FARM.id_, Decimal(1))
+    state.purchase_building(building.FARM.id_, Decimal(1))
+
+    assert [log.state_at(p).buildings[building.FARM.id_].owned for p in range(7)] \
+        == [0, 1, 2, 3, 4, 5, 6]
@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+import pytest
+
+from rgsim import clicks, goals, numeric, simulator
+from rgsim.entities import building, upgrade
+
+
+def farms(count, **kwargs):
+    state = simulator.GameState(**kwargs)
+    state.purchase_building(building.FARM.id_, Decimal(count))
+    return state
+
+
+@pytest.mark.parametrize('profile', [clicks.NONE, clicks.AUTOCLICKER, clicks.HUMAN])
+def test_time_to_gold_is_exact(profile):
+    state = farms(10, gold=Decimal(100), elapsed=Decimal(3000), clicking=profile)
+    target = Decimal(123456)
+
+    seconds = state.time_to_gold(target)
+    state.advance_time(seconds)
+    assert state.gold == pytest.approx(target, rel=Decimal('1e-20'))
+    assert farms(10, gold=Decimal(200)).time_to_gold(Decimal(100)) == 0
+    assert simulator.GameState().time_to_gold(Decimal(1)) is None
+
+
+def test_profile_earning_is_inverse_of_active_seconds():
+    for start in (0.0, 300.0, 1000.0, 3599.5):
+        for amount in (1.0, 5000.0, 123456.0):
+            seconds = clicks.HUMAN.seconds_to_earn(start, amount, 2.0, 30.0, float)
+            earned = 2 * seconds + 30 * clicks.HUMAN.active_seconds(start, start + seconds, float)
+            assert earned == pytest.approx(amount)
+    assert clicks.HUMAN.seconds_to_earn(0.0, 1.0, 0.0, 0.0, float) is None
+
+
+def test_time_to_own_follows_the_purchases():
+    state = farms(10, gold=Decimal(100))
+    expected = Decimal(0)
+    simulated = state.copy()
+    for _ in range(10):
+        owned = simulated.buildings[building.FARM.id_].owned
+        cost = Decimal(10) * Decimal(1.15) ** owned
+        wait = max((cost - simulated.gold) / simulated.total_production(), Decimal(0))
+        simulated.advance_time(wait)
+        simulated.gold -= cost
+        simulated.purchase_building(building.FARM.id_, Decimal(1))
+        expected += wait
+
+    assert state.time_to_own(building.FARM.id_, Decimal(20)) == pytest.approx(expected)
+    assert state.time_to_own(building.FARM.id_, Decimal(5)) == 0
+
+    plan = [building.FARM.id_] * 10
+    result = goals.timeline(state, plan)
+    assert result.complete
+    assert result.times[-1] == state.time_to_own(building.FARM.id_, Decimal(20))
+    assert result.gold_at(result.times[-1]) == pytest.approx(simulated.gold)
+    middle = (result.times[4] + result.times[5]) / 2
+    assert result.purchases_by(middle) == 5
+    assert result.gold_at(middle) == pytest.approx(
+        result.gold[4] + result.steps[4].production * (middle - result.times[4])
+    )
+
+
+def test_plans_with_upgrades():
+    state = farms(12)
+    plan = [upgrade.CROP_ROTATION.id_, building.FARM.id_]
+    seconds = state.time_to_afford(upgrade.IRRIGATION.id_, plan)
+
+    result = goals.timeline(state, [*plan, upgrade.IRRIGATION.id_])
+    assert seconds == result.times[-1] > result.times[0] > 0
+    assert result.steps[0].production > state.total_production()
+
+    state.purchase_upgrade(upgrade.CROP_ROTATION)
+    with pytest.raises(ValueError):
+        state.time_to_afford(upgrade.CROP_ROTATION.id_)
+    assert simulator.GameState().time_to_afford(upgrade.CROP_ROTATION.id_) is None
+
+
+def test_memoized_per_version(monkeypatch):
+    state = farms(10)
+    state.time_to_own(building.FARM.id_, Decimal(100))
+
+    calls = []
+    steps = goals._steps
+    monkeypatch.setattr(goals, '_steps', lambda *args: calls.append(args) or steps(*args))
+    state.advance_time(Decimal(60))
+    first = state.time_to_own(building.FARM.id_, Decimal(100))
+    assert first == state.time_to_own(building.FARM.id_, Decimal(100))
+    assert calls == []
+
+    state.purchase_building(building.FARM.id_, Decimal(1))
+    assert state.time_to_own(building.FARM.id_, Decimal(100)) < first
+    assert len(calls) == 1
+
+
+
+def test_changing_the_profile_invalidates_memos():
+    state = simulator.GameState()
+    plan = (building.FARM.id_,)
+    state.time_to_afford(building.INN.id_, plan)
+
+    state.clicking = clicks.AUTOCLICKER
+    fresh = simulator.GameState(clicking=clicks.AUTOCLICKER)
+    assert state.time_to_afford(building.INN.id_, plan) \
+        == fresh.time_to_afford(building.INN.id_, plan)
+
+@pytest.mark.parametrize('backend', [numeric.FLOAT, numeric.BIGFLOAT], ids=lambda b: b.name)
+def test_backends(backend):
+    state = farms(10, gold=Decimal(100), numeric=backend, clicking=clicks.HUMAN)
+    decimal_state = farms(10, gold=Decimal(100), clicking=clicks.HUMAN)
+
+    seconds = state.time_to_own(building.FARM.id_, 30)
+    assert isinstance(seconds, backend.type_)
+    assert float(seconds) == pytest.approx(
+        float(decimal_state.time_to_own(building.FARM.id_, 30))
+    )
@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+from rgsim import history, simulator
+from rgsim.entities import building, upgrade
+
+
+def test_append_and_query(tmp_path):
+    path = str(tmp_path / 'history.rgh')
+    store = history.HistoryStore(path)
+    state = simulator.GameState()
+
+    for hour in range(4):
+        state.purchase_building(building.FARM.id_, Decimal(10))
+        if hour == 2:
+            state.purchase_upgrade(upgrade.CROP_ROTATION)
+        store.append(state, timestamp=hour * 3600.0)
+
+    reopened = history.HistoryStore(path)
+    records = reopened.read()
+    farm = reopened.building_ids.index(building.FARM.id_)
+    crop_rotation = reopened.upgrade_ids.index(upgrade.CROP_ROTATION.id_)
+
+    assert len(records) == 4
+    assert reopened.building_counts()[:, farm].tolist() == [10, 20, 30, 40]
+    assert reopened.purchased()[:, crop_rotation].tolist() == [False, False, True, True]
+    # Crop Rotation doubles farms and adds an assistant working a farm (4 gold/s)
+    assert records['production'].tolist() == [20, 40, 124, 164]
+    assert len(reopened.between(3600, 3 * 3600)) == 2
+    assert reopened.mean_production(0, 4 * 3600) == 87
+
+
+def test_partial_trailing_record_is_ignored(tmp_path):
+    path = tmp_path / 'history.rgh'
+    store = history.HistoryStore(str(path))
+    store.append(simulator.GameState(), timestamp=1)
+    with open(path, 'ab') as file:
+        file.write(b'\0' * 5)
+
+    assert len(history.HistoryStore(str(path)).read()) == 1
+
+
+def test_append_after_partial_record(tmp_path):
+    path = tmp_path / 'history.rgh'
+    store = history.HistoryStore(str(path))
+    store.append(simulator.GameState(), timestamp=1)
+    with open(path, 'ab') as file:
+        file.write(b'\xff' * 5)
+
+    reopened = history.HistoryStore(str(path))
+    state = simulator.GameState()
+    state.purchase_building(building.FARM.id_, Decimal(3))
+    reopened.append(state, timestamp=2)
+
+    records = reopened.read()
+    farm = reopened.building_ids.index(building.FARM.id_)
+    assert records['timestamp'].tolist() == [1, 2]
+    assert reopened.building_counts()[:, farm].tolist() == [0, 3]
+    assert records['production'].tolist() == [0, 6]
@@ -0,0 +1,59 @@
+import json
+import subprocess
+import sys
+
+# Generous ceiling so the check is stable on slow CI machines, while still catching a regression
+# back to loading pyamf/wx or decoding a save file at import time.
+IMPORT_BUDGET_SECONDS = 1.0
+
+OPTIONAL_MODULES = ('pyamf', 'wx', 'watchdog')
+
+_PROBE = '''
+import json, sys, time
+
+opened = []
+
+def _audit(event, args):
+    if event == 'open' and isinstance(args[0], str) and not args[0].endswith(('.py', '.pyc')):
+        opened.append(args[0])
+
+sys.addaudithook(_audit)
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'modules': sorted(sys.modules), 'opened': opened}}))
+'''
+
+
+def _probe(statement: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, '-c', _PROBE.format(statement=statement)],
+        capture_output=True, check=True, text=True
+    )
+    return json.loads(result.stdout)
+
+
+def test_import_has_no_side_effects():
+    probe = _probe('import rgsim, rgsim.serializer')
+
+    assert not [m for m in probe['modules'] if m.split('.')[0] in OPTIONAL_MODULES]
+    assert not [path for path in probe['opened'] if path.endswith('.sol')]
+
+
+def test_headless_simulation_import_budget():
+    probe = _probe(
+        'from rgsim import simulator; simulator.GameState().calculate_building_production()'
+    )
+
+    assert not [m for m in probe['modules'] if m.split('.')[0] in OPTIONAL_MODULES]
+    assert 'rgsim.gui' not in probe['modules']
+    assert probe['elapsed'] < IMPORT_BUDGET_SECONDS
+
+
+def test_entity_table_loads_compiled():
+    _probe('import rgsim.entities.upgrade')
+    probe = _probe('import rgsim.entities.upgrade as upgrade; upgrade.all()')
+
+    # The compiled table is current after the first import, so the JSON is not even opened
+    assert not [path for path in probe['opened'] if path.endswith('entities.json')]
+    assert [path for path in probe['opened'] if path.endswith('.marshal')]
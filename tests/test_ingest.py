@@ -0,0 +1,63 @@
+import json
+import re
+
+import pytest
+
+from conftest import write_sol
+
+from rgsim import cli, ingest, serializer
+
+
+@pytest.mark.parametrize('section', serializer.LAYOUT, ids=lambda section: section.name)
+def test_record_dtypes_match_struct_layout(section):
+    assert ingest.record_dtype(section.record_type).itemsize == section.record_type.length()
+
+
+def test_batch_command_writes_columns(tmp_path, make_save):
+    saves = tmp_path / 'saves'
+    (saves / 'player').mkdir(parents=True)
+    (saves / 'a.txt').write_text(make_save(buildings={9: 12, 13: 3}))
+    write_sol(saves / 'player' / 'b.sol', make_save(upgrades=[501001, 501002]))
+    (saves / 'broken.txt').write_text('not a save')
+    out = tmp_path / 'out'
+
+    assert cli.main(['batch', str(saves), str(out), '--workers', '2']) == 1
+
+    manifest = [json.loads(line) for line in (out / 'manifest.jsonl').read_text().splitlines()]
+    assert {entry['save_id'] for entry in manifest} == {'a.txt', 'player_2fb.sol', 'broken.txt'}
+    assert [entry['save_id'] for entry in manifest if entry['error']] == ['broken.txt']
+
+    buildings = ingest.load_table(str(out / 'a.txt'), 'buildings')
+    assert buildings['id_'].tolist() == [9, 13]
+    assert buildings['current_quantity'].tolist() == [12, 3]
+
+    upgrades = ingest.load_table(str(out / 'player_2fb.sol'), 'upgrades')
+    assert upgrades['id_'].tolist() == [501001, 501002]
+    assert upgrades['u1'].all()
+
+    assert set(ingest.completed(str(out / 'manifest.jsonl'))) == {'a.txt', 'player_2fb.sol'}
+
+
+def test_save_ids_do_not_collide(tmp_path):
+    paths = ['x.sol', 'x.txt', 'a/b.sol', 'a__b.sol', 'a_2fb.sol', 'a b.sol', 'a_b.sol']
+    ids = [ingest.save_id(str(tmp_path), str(tmp_path / path)) for path in paths]
+
+    assert len(set(ids)) == len(ids)
+    assert all(re.fullmatch(r'[A-Za-z0-9._-]+', id_) for id_ in ids)
+
+
+def test_resume_after_partial_manifest_line(tmp_path, make_save):
+    saves = tmp_path / 'saves'
+    saves.mkdir()
+    (saves / 'a.txt').write_text(make_save())
+    (saves / 'b.txt').write_text(make_save(buildings={9: 1}))
+    out = tmp_path / 'out'
+    out.mkdir()
+    manifest = out / 'manifest.jsonl'
+    manifest.write_text(json.dumps({'save_id': 'a.txt', 'error': None}) + '\n{"save_id": "b.t')
+
+    assert ingest.completed(str(manifest)) == ('a.txt',)
+    assert cli.main(['batch', str(saves), str(out), '--workers', '1', '--resume']) == 0
+
+    entries = [json.loads(line) for line in manifest.read_text().splitlines()]
+    assert [entry['save_id'] for entry in entries] == ['a.txt', 'b.txt']
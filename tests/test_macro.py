@@ -0,0 +1,70 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+from rgsim import macro
+from rgsim.entities import building, faction, upgrade
+
+OPENING = (building.BuildingId.FARM, building.BuildingId.FARM, upgrade.UpgradeId.CROP_ROTATION)
+
+
+def _strategies():
+    return [
+        macro.Strategy('fairy', (faction.FactionId.FAIRY,), OPENING, horizon=30 * 24 * 3600),
+        macro.Strategy('goblin', (faction.FactionId.GOBLIN,), (), horizon=30 * 24 * 3600),
+    ]
+
+
+def test_gems_carry_over_between_runs():
+    result = macro.play(_strategies()[:1], 3, workers=1, start={'trophies': 2})['fairy']
+
+    assert [r.run for r in result.runs] == [0, 1, 2]
+    assert all(r.faction == faction.FactionId.FAIRY for r in result.runs)
+    assert all(r.gems_earned > 0 for r in result.runs)
+    assert result.gems == sum(r.gems_earned for r in result.runs)
+    assert result.runs[-1].carried['trophies'] == 2
+    # Gems from earlier runs boost production, so later runs earn faster
+    assert result.runs[1].gems_per_hour > result.runs[0].gems_per_hour
+
+
+def test_resume_from_checkpoint(tmp_path):
+    first = macro.play(_strategies(), 2, str(tmp_path), workers=2)
+
+    with open(tmp_path / 'fairy.json', encoding='utf-8') as file:
+        assert len(json.load(file)['runs']) == 2
+
+    resumed = macro.play(_strategies(), 3, str(tmp_path), workers=1)
+    fresh = macro.play(_strategies(), 3, workers=1)
+
+    for name in ('fairy', 'goblin'):
+        assert resumed[name].runs[:2] == first[name].runs
+        assert resumed[name] == fresh[name]
+
+
+def test_faction_branches():
+    strategies = macro.faction_branches(OPENING, starting_gold=Decimal(50))
+
+    assert {s.factions[0] for s in strategies} == {
+        f.id_ for f in faction.all() if f.is_base
+    }
+    assert all(s.opening == OPENING and s.starting_gold == 50 for s in strategies)
+
+
+def test_checkpoint_of_changed_strategy_is_rejected(tmp_path):
+    strategy = _strategies()[1]
+    macro.play([strategy], 1, str(tmp_path), workers=1)
+    changed = macro.Strategy(strategy.name, strategy.factions, horizon=strategy.horizon / 2)
+
+    with pytest.raises(ValueError, match='different version'):
+        macro.play([changed], 2, str(tmp_path), workers=1)
+
+
+def test_faction_decides_the_buildings_of_a_run():
+    carried = {name: Decimal(0) for name in macro.CARRIED}
+    fairy = macro.play_run(_strategies()[0], 0, carried)
+    unaligned = macro.play_run(
+        macro.Strategy('none', opening=OPENING, horizon=30 * 24 * 3600), 0, carried
+    )
+
+    assert fairy.gems_per_hour > unaligned.gems_per_hour
@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from rgsim import montecarlo, simulator
+from rgsim.entities import building, modifier
+
+PARAMETERS = montecarlo.Parameters(
+    gold=100.0, production=10.0, click_reward=5.0, clicks_per_second=4.0, coin_chance=0.25
+)
+
+
+def test_from_state_reads_modifiers():
+    state = simulator.GameState(gold=Decimal(50)).purchase_building(building.FARM.id_, Decimal(3))
+    state.register_modifier(
+        modifier.additive(modifier.Target.FACTION_COIN_CHANCE, modifier.fixed(0.1))
+    )
+
+    parameters = montecarlo.Parameters.from_state(state, clicks_per_second=2.0)
+
+    assert parameters == montecarlo.Parameters(50.0, 6.0, 1.0, 2.0, 0.1)
+
+
+def test_results_independent_of_chunking_across_workers():
+    serial = montecarlo.run_parameters(PARAMETERS, 1000, 60.0, seed=7, chunk_size=300)
+    parallel = montecarlo.run_parameters(
+        PARAMETERS, 1000, 60.0, seed=7, chunk_size=300, workers=2
+    )
+    other_seed = montecarlo.run_parameters(PARAMETERS, 1000, 60.0, seed=8, chunk_size=300)
+
+    assert len(serial) == 1000
+    assert np.array_equal(serial.outcomes, parallel.outcomes)
+    assert not np.array_equal(serial.outcomes, other_seed.outcomes)
+
+
+def test_distribution_matches_expectation():
+    result = montecarlo.run_parameters(PARAMETERS, 20000, 60.0, seed=1, samples=6)
+    clicks = result.summary('clicks', confidence=0.999)
+    gold = result.summary('gold')
+
+    assert clicks.ci_low < 240 < clicks.ci_high
+    assert clicks.std == pytest.approx(np.sqrt(240), rel=0.05)
+    assert result.summary('faction_coins').mean == pytest.approx(60, rel=0.02)
+    assert gold.quantiles[0.05] < gold.quantiles[0.5] < gold.quantiles[0.95]
+    assert result.gold_path.shape == (20000, 6)
+    assert result.path_quantiles().shape == (3, 6)
+    assert np.all(np.diff(result.gold_path, axis=1) >= 100)
@@ -0,0 +1,80 @@
+import math
+from decimal import Decimal
+
+import pytest
+
+from rgsim import events, numeric, simulator
+from rgsim.entities import building, upgrade
+from rgsim.numeric import BigFloat
+
+
+def _close(value: BigFloat, expected: Decimal) -> bool:
+    return abs(value.to_decimal() / expected - 1) < Decimal('1e-12')
+
+
+def test_arithmetic_matches_decimal():
+    a, b = Decimal('1.234e57'), Decimal('-9.87e-12')
+
+    assert _close(BigFloat.of(a) + b, a + b)
+    assert _close(BigFloat.of(a) * b, a * b)
+    assert _close(BigFloat.of(a) / b, a / b)
+    assert _close(3 - BigFloat.of(b), 3 - b)
+    assert _close(BigFloat.of(a) ** 3, a ** 3)
+
+
+def test_values_beyond_float_range():
+    huge = BigFloat.of(Decimal('1.5e400'))
+
+    assert math.isinf(float(huge * huge))
+    assert str(huge * huge) == '2.25e+800'
+    assert (huge * huge) / huge == huge
+    assert huge > Decimal('1e399') and -huge < 0
+    assert (huge ** 2).log10() == pytest.approx(800.352, abs=1e-3)
+    assert _close(huge + 1, Decimal('1.5e400'))
+
+
+def test_equal_values_hash_equally():
+    a = BigFloat.of(2.0 ** 300)
+    b = BigFloat.of(2.0 ** 200) * 2.0 ** 100
+
+    assert a == b and hash(a) == hash(b)
+    assert BigFloat.of(0) == 0 and not BigFloat.of(0)
+
+    for value in (0, 2, -1, -7, 2 ** 300, 2 ** -60, 0.375, -1.5e-200, Decimal('0.375')):
+        assert BigFloat.of(value) == value and hash(BigFloat.of(value)) == hash(value)
+    assert len({BigFloat.of(2), 2, 2.0, Decimal(2)}) == 1
+
+
+def test_int_is_exact():
+    assert int(BigFloat.of(2 ** 300) / 2 ** 50) == 2 ** 250
+    assert int(BigFloat.of(1.5) * 2 ** 1100) == 3 * 2 ** 1099
+    assert int(BigFloat.of(-7.9)) == -7 and int(BigFloat.of(0.5)) == 0
+
+
+def _play(backend: numeric.Backend) -> simulator.GameState:
+    state = simulator.GameState(gold=Decimal(10) ** 6, numeric=backend)
+    state.purchase_building(building.FARM.id_, Decimal(10))
+    state.purchase_building(building.INN.id_, Decimal(5))
+    state.purchase_upgrade(upgrade.CROP_ROTATION, spend_gold=True)
+    state.advance_time(Decimal(60))
+    return state
+
+
+@pytest.mark.parametrize('backend', [numeric.FLOAT, numeric.BIGFLOAT])
+def test_backends_match_decimal(backend):
+    reference = _play(numeric.DECIMAL)
+    state = _play(backend)
+
+    assert isinstance(state.gold, backend.type_)
+    assert float(state.calculate_building_production()) == pytest.approx(
+        float(reference.calculate_building_production())
+    )
+    assert float(state.gold) == pytest.approx(float(reference.gold))
+
+
+def test_checkpoint_keeps_backend():
+    state = _play(numeric.BIGFLOAT)
+    restored = events.Checkpoint.capture(state).restore()
+
+    assert restored.numeric is numeric.BIGFLOAT
+    assert float(restored.gold) == pytest.approx(float(state.gold))
@@ -0,0 +1,55 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from rgsim import projection, simulator
+from rgsim.entities import alignment, building
+
+
+def test_building_cost_and_gems():
+    state = simulator.GameState()
+
+    assert projection.building_cost(state, building.FARM, Decimal(0)) == 10
+    assert float(projection.building_cost(state, building.FARM, Decimal(1), Decimal(2))) \
+        == pytest.approx(11.5 + 13.225)
+    assert projection.gems_for(1e12) == 1
+    assert projection.gems_for(3e12) == 2
+
+
+def test_projection_is_piecewise_linear():
+    state = simulator.GameState(gold=Decimal(100))
+    result = projection.project(state, 3600)
+    segments = result.segments
+
+    assert segments[1].start == 0 and segments[1].purchase == building.BuildingId.FARM
+    assert all(a.start <= b.start for a, b in zip(segments, segments[1:]))
+    assert all(s.gold >= -1e-6 for s in segments)
+    middle = (segments[5].start + segments[6].start) / 2
+    assert result.earned_at(middle) == pytest.approx(
+        segments[5].earned + segments[5].production * (middle - segments[5].start)
+    )
+
+
+def test_optimal_abdication_matches_sampling():
+    state = simulator.GameState(gold=Decimal(1000), alignment=alignment.AlignmentId.GOOD)
+    state.purchase_building(building.FARM.id_, Decimal(20))
+    horizon = 30 * 24 * 3600
+    result = projection.project(state, horizon)
+
+    best = result.optimal_abdication()
+    times = np.linspace(1, horizon, 20000)
+    sampled = max(result.gems_per_hour(t) for t in times)
+
+    assert 0 < best.time < horizon
+    assert best.gems_per_hour >= sampled * (1 - 1e-6)
+    assert best.gems == int(result.gems_at(best.time))
+
+
+def test_projection_buys_only_buildings_of_the_alignment():
+    state = simulator.GameState(gold=Decimal(10 ** 9), alignment=alignment.AlignmentId.GOOD)
+    bought = {s.purchase for s in projection.project(state, 3600).segments[1:]}
+
+    assert all(building.get(b).buildable(alignment.AlignmentId.GOOD) for b in bought)
+    assert {building.get(b).alignment.id_ for b in bought} \
+        == {alignment.AlignmentId.NONE, alignment.AlignmentId.GOOD}
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from rgsim import rng, serializer
+
+from conftest import default_records
+
+
+def _reference(state: int, count: int):
+    draws = []
+    for _i in range(count):
+        state = state * rng.MULTIPLIER % rng.MODULUS
+        draws.append(state)
+    return draws
+
+
+def test_sequence_matches_scalar_generator():
+    states = [1, 12345, 2 ** 31 - 2, 987654321]
+    draws = rng.sequence(states, 50)
+
+    assert draws.shape == (4, 50)
+    for row, state in zip(draws, states):
+        assert row.tolist() == _reference(state, 50)
+    # 10000th state from seed 1 is the generator's published check value
+    assert rng.advance([1], 10000).tolist() == [1043618065]
+    assert rng.advance(states, 50).tolist() == draws[:, -1].tolist()
+
+
+@pytest.mark.parametrize('state', [2 ** 31 - 1, 2 ** 32, -1])
+def test_rejects_states_out_of_range(state):
+    with pytest.raises(ValueError):
+        rng.sequence([1, state], 3)
+    with pytest.raises(ValueError):
+        rng.advance([state], 1)
+
+
+def test_derived_outcomes():
+    states = np.arange(1, 1001)
+    values = rng.int_range(states, 20, 1, 6)
+    rolls = rng.chances(states, 20, 0.25)
+    first = rng.first_success(states, 0.25, 20)
+
+    assert values.min() == 1 and values.max() == 6
+    assert 0.2 < rolls.mean() < 0.3
+    hit = first > 0
+    assert np.all(rolls[hit, first[hit] - 1])
+    assert not rolls[first == 0].any()
+
+
+def test_streams_of_saves():
+    records = default_records(upgrades=[3])
+    save_data = serializer.SaveData.from_sections(records)
+    other = serializer.SaveData.from_sections(default_records())
+
+    assert rng.streams(save_data) == {'egg': 12345, 'artifact': 99, 'upgrade:3': 7}
+
+    states, present = rng.gather([save_data, other], rng.upgrade_stream(3))
+    assert states.tolist() == [7, 0] and present.tolist() == [True, False]
@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from rgsim import sensitivity, simulator
+from rgsim.entities import building, modifier, upgrade
+
+
+def _state():
+    state = simulator.GameState(gems=Decimal(5))
+    state.purchase_building(building.FARM.id_, Decimal(3))
+    state.purchase_building(building.INN.id_, Decimal(2))
+    for u in (upgrade.CROP_ROTATION, upgrade.IRRIGATION, upgrade.FILLED_TREASURE):
+        state.purchase_upgrade(u)
+    state.register_modifier(modifier.additive(modifier.Target.ASSISTANTS, modifier.fixed(2)))
+    return state
+
+
+def test_building_derivatives_match_buying_one_more():
+    state = _state()
+    report = sensitivity.report(state)
+
+    assert report.production == state.total_production()
+    for id_ in (building.BuildingId.FARM, building.BuildingId.INN, building.BuildingId.BLACKSMITH):
+        bought = state.copy().purchase_building(id_, Decimal(1))
+        assert report.buildings[id_] == bought.total_production() - report.production
+
+
+def test_modifier_derivatives_match_raising_each_amount():
+    state = _state()
+    report = sensitivity.report(state)
+
+    # Production is linear in each amount on its own, so a step of 1 is exact
+    assert len(report.levers) == 6
+    for lever in report.levers:
+        mod = lever.modifier
+        raised = state.copy()
+        raised.deregister_modifier(mod)
+        raised.register_modifier(modifier.Modifier(
+            mod.strategy, mod.target, modifier.fixed(lever.amount + 1), mod.applies_to
+        ))
+        assert lever.derivative == raised.total_production() - report.production
+
+    elasticities = [lever.elasticity for lever in report.ranked()]
+    assert elasticities == sorted(elasticities, reverse=True)
+    assert elasticities[0] == 1.0
+    # Every farm is worked already, so another assistant would work an inn
+    assert report.assistants == state.unit_production()[building.BuildingId.INN]
@@ -0,0 +1,163 @@
+import base64
+import dataclasses
+import threading
+import time
+import zlib
+from decimal import Decimal
+
+import pytest
+
+from conftest import default_records, encode_save, write_sol
+
+from rgsim import serializer, watcher
+from rgsim.entities import alignment, building, faction, upgrade
+
+
+def test_deserialize_hydrates_state(make_save):
+    save = make_save(
+        buildings={building.FARM.id_.value: 12, 999: 4},
+        upgrades=[upgrade.CROP_ROTATION.id_.value],
+        gems=50, coins=1e6
+    )
+
+    state = serializer.Serializer.deserialize(save)
+
+    assert state.buildings[building.FARM.id_].owned == 12
+    assert state.upgrades[upgrade.CROP_ROTATION.id_].purchased
+    assert state.gems == 50
+    assert state.gold == Decimal(1e6)
+    assert state.trophies == 1
+    assert state.calculate_building_production() == 48
+
+
+def test_sections_decode_like_full_parse(make_save):
+    save = make_save(buildings={building.INN.id_.value: 3})
+    parsed = serializer.Serializer.parse(save)
+
+    sections = serializer.Serializer(save).sections()
+    decoded = {
+        section.name: serializer.Serializer.decode_section(section, sections[section.name])
+        for section in serializer.LAYOUT
+    }
+
+    assert list(sections) == [section.name for section in serializer.LAYOUT]
+    assert serializer.SaveData.from_sections(decoded) == parsed
+    assert parsed.artifact_rng_state == 99
+
+
+def test_watcher_publishes_diffs(tmp_path, make_save):
+    path = tmp_path / 'realm-grinder.sol'
+    write_sol(path, make_save(buildings={building.FARM.id_.value: 1}))
+
+    save_watcher = watcher.SaveWatcher(str(path))
+    published = []
+    save_watcher.subscribe(lambda state, changes: published.append(changes))
+
+    assert save_watcher.reload()
+    assert save_watcher.reload() is None
+
+    write_sol(path, make_save(
+        buildings={building.FARM.id_.value: 5}, upgrades=[upgrade.IRRIGATION.id_.value]
+    ))
+    changes = save_watcher.reload()
+
+    assert changes.buildings == {building.FARM.id_: 4}
+    assert changes.purchased == {upgrade.IRRIGATION.id_}
+    assert len(published) == 2
+
+
+def test_watcher_follows_faction_changes(tmp_path):
+    path = tmp_path / 'realm-grinder.sol'
+    records = default_records()
+    write_sol(path, encode_save(records))
+    save_watcher = watcher.SaveWatcher(str(path))
+    save_watcher.reload()
+
+    records['current_game'] = dataclasses.replace(
+        records['current_game'], faction=faction.FactionId.GOBLIN.value,
+        alignment=alignment.AlignmentId.EVIL.value
+    )
+    write_sol(path, encode_save(records))
+    changes = save_watcher.reload()
+
+    assert (changes.faction, changes.alignment) \
+        == (faction.FactionId.GOBLIN, alignment.AlignmentId.EVIL)
+    assert save_watcher.state.faction == faction.FactionId.GOBLIN
+    assert save_watcher.state.alignment == alignment.AlignmentId.EVIL
+
+
+def test_watcher_rehydrates_sections_without_diffs(tmp_path):
+    path = tmp_path / 'realm-grinder.sol'
+    records = default_records()
+    write_sol(path, encode_save(records))
+    save_watcher = watcher.SaveWatcher(str(path))
+    save_watcher.reload()
+    state = save_watcher.state
+
+    records['stats'] = [serializer.Statistic(1, 2, 4)]
+    write_sol(path, encode_save(records))
+
+    assert save_watcher.reload() is None
+    assert save_watcher.state is not state
+
+
+def _recount_last_section(save: str) -> str:
+    """save with its last section claiming a record it does not hold, as if cut off mid-write"""
+    key = b'therealmisalie'
+    raw = zlib.decompress(base64.b64decode(save[4:-2]))
+    raw = bytes(byte ^ key[i % len(key)] for i, byte in enumerate(raw))[:-2] + b'\x00\x01'
+    ciphered = bytes(byte ^ key[i % len(key)] for i, byte in enumerate(raw))
+    return 'rgsv' + base64.b64encode(zlib.compress(ciphered)).decode() + '!!'
+
+
+def test_watcher_keeps_state_when_decoding_fails(tmp_path, make_save):
+    path = tmp_path / 'realm-grinder.sol'
+    write_sol(path, make_save(buildings={building.FARM.id_.value: 1}))
+    save_watcher = watcher.SaveWatcher(str(path))
+    save_watcher.reload()
+    state = save_watcher.state
+
+    write_sol(path, _recount_last_section(make_save(buildings={building.FARM.id_.value: 3})))
+    assert save_watcher.reload() is None
+    assert save_watcher.state is state
+
+    write_sol(path, make_save(buildings={building.FARM.id_.value: 3}))
+    assert save_watcher.reload().buildings == {building.FARM.id_: 2}
+
+
+def test_watcher_debounces_reloads(tmp_path, make_save):
+    path = tmp_path / 'realm-grinder.sol'
+    write_sol(path, make_save())
+    save_watcher = watcher.SaveWatcher(str(path), debounce=0.05)
+    reloaded = threading.Event()
+    reloads = []
+    save_watcher.reload = lambda: reloads.append(time.monotonic()) or reloaded.set()
+
+    started = time.monotonic()
+    for _i in range(5):
+        save_watcher.schedule_reload()
+    assert reloaded.wait(5)
+    time.sleep(0.1)
+
+    assert len(reloads) == 1
+    assert reloads[0] - started >= 0.05
+
+
+def test_watcher_start_follows_writes(tmp_path, make_save):
+    pytest.importorskip('watchdog')
+    path = tmp_path / 'realm-grinder.sol'
+    write_sol(path, make_save(buildings={building.FARM.id_.value: 1}))
+    published = threading.Event()
+
+    with watcher.SaveWatcher(str(path), debounce=0.05) as save_watcher:
+        assert save_watcher.state.buildings[building.FARM.id_].owned == 1
+        save_watcher.subscribe(lambda state, changes: published.set())
+        write_sol(path, make_save(buildings={building.FARM.id_.value: 4}))
+        assert published.wait(5)
+        assert save_watcher.state.buildings[building.FARM.id_].owned == 4
+
+
+def test_default_save_path_override(monkeypatch):
+    monkeypatch.setenv('RGSIM_SAVE_FILE', '/saves/rg.sol')
+
+    assert watcher.default_save_path() == '/saves/rg.sol'
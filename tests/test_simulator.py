@@ -0,0 +1,218 @@
+import dataclasses
+import subprocess
+import sys
+from decimal import Decimal
+
+import pytest
+
+from rgsim import clicks, events, simulator
+from rgsim.entities import alignment, building, faction, modifier, spell, upgrade
+
+
+def test_production_is_cached_until_state_changes():
+    state = simulator.GameState().purchase_building(building.FARM.id_, Decimal(5))
+    calls = []
+    original = state._calculate_building_production
+    state._calculate_building_production = lambda: calls.append(1) or original()
+
+    assert state.calculate_building_production() == 10
+    assert state.calculate_building_production() == 10
+    state.purchase_upgrade(upgrade.CROP_ROTATION)
+    assert state.calculate_building_production() == 20
+
+    assert len(calls) == 2
+
+
+def test_batch_invalidates_and_notifies_once():
+    state = simulator.GameState()
+    received = []
+    state.listeners.append(received.append)
+    version = state.version
+
+    with state.batch():
+        state.purchase_building(building.FARM.id_, Decimal(10))
+        state.purchase_upgrade(upgrade.CROP_ROTATION)
+        assert state.calculate_building_production() == 40
+        assert not received
+        state.purchase_upgrade(upgrade.IRRIGATION)
+
+    assert state.version == version + 1
+    assert [type(event) for event in received] == [
+        events.PurchaseBuilding, events.PurchaseUpgrade, events.PurchaseUpgrade
+    ]
+    assert state.calculate_building_production() == 120
+
+
+def test_batch_rolls_back_on_error():
+    state = simulator.GameState(gold=Decimal(1000)).purchase_building(building.FARM.id_, Decimal(1))
+    before = events.Checkpoint.capture(state)
+    received = []
+    state.listeners.append(received.append)
+
+    with pytest.raises(RuntimeError):
+        with state.batch():
+            state.purchase_upgrade(upgrade.CROP_ROTATION, spend_gold=True)
+            state.purchase_building(building.FARM.id_, Decimal(3))
+            raise RuntimeError()
+
+    assert events.Checkpoint.capture(state) == before
+    assert state.calculate_building_production() == 2
+    assert received == [events.Rollback()]
+
+
+def test_batch_rollback_keeps_custom_click_profile():
+    bot = clicks.ClickProfile('bot', Decimal(10))
+    state = simulator.GameState(clicking=bot).purchase_building(building.FARM.id_, Decimal(1))
+    assert state.copy().clicking is bot
+
+    with pytest.raises(RuntimeError):
+        with state.batch():
+            state.purchase_building(building.FARM.id_, Decimal(3))
+            raise RuntimeError()
+
+    assert state.buildings[building.BuildingId.FARM].owned == 1
+    assert state.clicking is bot
+
+
+def test_trophies_invalidate_production():
+    state = simulator.GameState().purchase_building(building.HALL_OF_LEGENDS.id_, Decimal(1))
+    assert state.calculate_building_production() == 0
+
+    state.trophies = Decimal(2)
+
+    assert state.calculate_building_production() == 500000
+
+
+def test_upgrades_follow_faction_and_alignment():
+    grinding = upgrade.UpgradeId.GRINDING_DEDICATION
+    state = simulator.GameState()
+    assert grinding not in state.upgrades
+    assert upgrade.CROP_ROTATION.id_ in state.upgrades
+
+    state.faction = faction.FactionId.TITAN
+    assert grinding in state.upgrades
+    state.purchase_upgrade(upgrade.get(grinding))
+    state.faction = faction.FactionId.FAIRY
+    assert state.upgrades[grinding].purchased
+
+    state.unpurchase_upgrade(upgrade.get(grinding))
+    state.alignment = alignment.AlignmentId.GOOD
+    assert grinding not in state.upgrades
+    assert simulator.GameState(alignment=alignment.AlignmentId.NEUTRAL).upgrades.keys() \
+        == state.upgrades.keys() | {grinding}
+
+
+def test_faction_and_alignment_invalidate_derived_values():
+    state = simulator.GameState()
+
+    def scope():
+        return state.faction, state.alignment
+
+    assert state.derived('scope', scope) == (faction.FactionId.NONE, alignment.AlignmentId.NONE)
+
+    state.faction = faction.FactionId.TITAN
+    assert state.derived('scope', scope) == (faction.FactionId.TITAN, alignment.AlignmentId.NONE)
+    state.alignment = alignment.AlignmentId.GOOD
+    assert state.derived('scope', scope) == (faction.FactionId.TITAN, alignment.AlignmentId.GOOD)
+
+
+def test_upgrade_groups_load_on_demand():
+    probe = (
+        'from rgsim.entities import upgrade\n'
+        'assert not upgrade._ALL_UPGRADES\n'
+        'upgrade.reachable()\n'
+        'print("GRINDING_DEDICATION" in vars(upgrade), upgrade.IRRIGATION.cost)\n'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', probe], capture_output=True, check=True, text=True
+    )
+
+    assert result.stdout.split() == ['False', '6580']
+
+
+def test_entity_indices_are_dense_and_stable():
+    for module in (alignment, building, faction, spell):
+        assert sorted(e.index for e in module.all()) == list(range(len(list(module.all()))))
+    assert faction.NONE.index == 0
+    assert building.FARM.index == list(building.BuildingId).index(building.BuildingId.FARM)
+
+    # Independent of what else was loaded first
+    probe = 'from rgsim.entities import upgrade\nprint(upgrade.POULTRY_FEED.index)\n'
+    result = subprocess.run(
+        [sys.executable, '-c', probe], capture_output=True, check=True, text=True
+    )
+    assert result.stdout.split() == [str(len(upgrade.UpgradeId) - 1)]
+
+
+def test_modifier_indices_are_dense_per_registry():
+    for module, owners in ((upgrade, upgrade.all()), (spell, spell.all())):
+        effects = [m for owner in owners for m in owner.effects]
+        assert sorted(m.index for m in effects) == list(range(len(module.EFFECTS)))
+        assert all(module.EFFECTS.get(m.index) is m for m in effects)
+
+    assert dataclasses.replace(upgrade.CROP_ROTATION.effects[0]).index is None
+    with pytest.raises(ValueError):
+        upgrade.EFFECTS.register(upgrade.CROP_ROTATION.effects[0])
+
+
+def test_modifier_indices_do_not_depend_on_load_order():
+    probes = (
+        'upgrade.get(upgrade.UpgradeId.CROP_ROTATION)',
+        'upgrade.reachable(faction.FactionId.NONE, alignment.AlignmentId.GOOD)',
+        'upgrade.all()',
+    )
+    indices = set()
+    for probe in probes:
+        result = subprocess.run([sys.executable, '-c', (
+            'from rgsim.entities import alignment, faction, upgrade\n'
+            f'{probe}\n'
+            'print(*(m.index for m in upgrade.CROP_ROTATION.effects))\n'
+        )], capture_output=True, check=True, text=True)
+        indices.add(result.stdout)
+
+    assert indices == {' '.join(str(m.index) for m in upgrade.CROP_ROTATION.effects) + '\n'}
+
+
+def test_modifiers_are_registered_by_slot():
+    state = simulator.GameState()
+    crop_rotation = upgrade.get(upgrade.UpgradeId.CROP_ROTATION)
+    farm_multiplier, assistant = crop_rotation.effects
+    slot = modifier.slot(modifier.Strategy.MULTIPLICATIVE, modifier.Target.BUILDING_PRODUCTION)
+
+    assert len(state.modifiers) == modifier.SLOTS
+    assert farm_multiplier.slot == slot
+    state.purchase_upgrade(crop_rotation)
+    state.register_modifier(farm_multiplier)
+    assert sum(m is farm_multiplier for m in state.modifiers[slot]) == 1
+    assert assistant in state.modifiers[assistant.slot]
+
+    state.unpurchase_upgrade(crop_rotation)
+    assert farm_multiplier not in state.modifiers[slot]
+    assert state.modifiers == simulator.GameState().modifiers
+
+
+def test_assistants_work_the_most_productive_buildings():
+    state = simulator.GameState()
+    state.purchase_building(building.FARM.id_, Decimal(3))
+    state.purchase_building(building.INN.id_, Decimal(2))
+    assert state.calculate_assistant_production() == 0
+
+    for _i in range(4):
+        state.register_modifier(
+            modifier.additive(modifier.Target.ASSISTANTS, modifier.fixed(1))
+        )
+    # Two assistants fill the inns (6 gold/s each), the other two work farms (2 gold/s each)
+    assert state.calculate_assistant_production() == 2 * 6 + 2 * 2
+    assert state.total_production() == 3 * 2 + 2 * 6 + 16
+
+    state.register_modifier(
+        modifier.multiplicative(modifier.Target.ASSISTANT_PRODUCTION, modifier.fixed(3))
+    )
+    state.register_modifier(
+        modifier.additive(modifier.Target.ASSISTANTS, modifier.fixed(10 ** 30))
+    )
+    # Every owned building is worked, however many assistants there are
+    assert state.calculate_assistant_production() == 3 * (3 * 2 + 2 * 6)
+
+    state.advance_time(Decimal(10))
+    assert state.gold == 10 * state.total_production()
@@ -0,0 +1,114 @@
+import struct
+
+import pytest
+
+from rgsim import sol
+
+SAVE = 'rg' + 'A' * 5000 + '=='
+
+
+def _shared_object(amf_version: int, body: bytes) -> bytes:
+    name = b'realm-grinder'
+    payload = (
+        b'TCSO' + b'\x00\x04\x00\x00\x00\x00'
+        + struct.pack('>H', len(name)) + name
+        + struct.pack('>I', amf_version) + body
+    )
+    return b'\x00\xbf' + struct.pack('>I', len(payload)) + payload
+
+
+def _amf0_entry(key: str, value: bytes) -> bytes:
+    return struct.pack('>H', len(key)) + key.encode() + value + b'\x00'
+
+
+def _amf0_string(value: str) -> bytes:
+    data = value.encode()
+    if len(data) > 0xFFFF:
+        return b'\x0c' + struct.pack('>I', len(data)) + data
+    return b'\x02' + struct.pack('>H', len(data)) + data
+
+
+def _u29_string(value: str) -> bytes:
+    length = (len(value.encode()) << 1) | 1
+    encoded = b''
+    if length < 0x80:
+        encoded = bytes([length])
+    elif length < 0x4000:
+        encoded = bytes([(length >> 7) | 0x80, length & 0x7F])
+    else:
+        encoded = bytes([(length >> 14) | 0x80, ((length >> 7) & 0x7F) | 0x80, length & 0x7F])
+    return encoded + value.encode()
+
+
+def test_amf0_skips_preceding_entries():
+    body = (
+        _amf0_entry('version', b'\x00' + struct.pack('>d', 3.5))
+        + _amf0_entry('settings', b'\x03' + struct.pack('>H', 1) + b'a' + b'\x01\x01' + b'\x00\x00\x09')
+        + _amf0_entry('name', _amf0_string('player'))
+        + _amf0_entry('save', _amf0_string(SAVE))
+    )
+
+    assert sol.extract(_shared_object(0, body)) == SAVE
+
+
+def test_amf3_scalar_entries():
+    body = (
+        _u29_string('muted') + b'\x03' + b'\x00'
+        + _u29_string('name') + b'\x06' + _u29_string('player') + b'\x00'
+        + _u29_string('save') + b'\x06' + _u29_string(SAVE) + b'\x00'
+    )
+
+    assert sol.extract(_shared_object(3, body)) == SAVE
+
+
+def test_amf3_falls_back_to_scan_past_objects():
+    # Dynamic anonymous object: traits inline (0x0b), empty class name, one dynamic member
+    obj = b'\x0a\x0b\x01' + _u29_string('x') + b'\x04\x05' + b'\x01'
+    body = (
+        _u29_string('options') + obj + b'\x00'
+        + _u29_string('save') + b'\x06' + _u29_string(SAVE) + b'\x00'
+    )
+
+    assert sol.extract(_shared_object(3, body)) == SAVE
+
+
+def test_amf3_scan_encodes_long_keys():
+    key = 'k' * 100
+    obj = b'\x0a\x0b\x01' + _u29_string('x') + b'\x04\x05' + b'\x01'
+    body = (
+        _u29_string('options') + obj + b'\x00'
+        + _u29_string(key) + b'\x06' + _u29_string(SAVE) + b'\x00'
+    )
+
+    assert sol.extract(_shared_object(3, body), key) == SAVE
+
+
+def test_amf3_parses_fully_when_key_is_a_reference():
+    # 'save' is first sent as a member name of an object, in a typed object with a sealed member
+    # and an array, so the top-level key is a reference (to string 3) the scan cannot match
+    obj = (
+        b'\x0a\x1b' + _u29_string('Settings') + _u29_string('volume') + b'\x05' + b'\x00' * 8
+        + _u29_string('save') + b'\x09\x05\x01\x04\x01\x06\x02' + b'\x01'
+    )
+    body = (
+        _u29_string('options') + obj + b'\x00'
+        + b'\x06' + b'\x06' + _u29_string(SAVE) + b'\x00'
+    )
+
+    assert sol.extract(_shared_object(3, body)) == SAVE
+
+
+def test_read_save_with_and_without_mmap(tmp_path):
+    path = tmp_path / 'realm-grinder.sol'
+    path.write_bytes(_shared_object(0, _amf0_entry('save', _amf0_string(SAVE))))
+
+    assert sol.read_save(str(path)) == SAVE
+    assert sol.read_save(str(path), use_mmap=False) == SAVE
+
+
+def test_missing_key_and_bad_magic():
+    with pytest.raises(KeyError):
+        sol.extract(_shared_object(0, _amf0_entry('name', _amf0_string('player'))))
+
+    with pytest.raises(ValueError):
+        sol.extract(b'not a shared object')
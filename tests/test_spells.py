@@ -0,0 +1,87 @@
+from decimal import Decimal
+
+import pytest
+
+from rgsim import events, serializer, simulator, spells
+from rgsim.entities import building, spell
+
+from conftest import default_records
+
+
+def _state(**kwargs) -> simulator.GameState:
+    return simulator.GameState(**kwargs).purchase_building(building.FARM.id_, Decimal(10))
+
+
+def test_cast_registers_effects_until_expiry():
+    state = _state(mana=Decimal(1000))
+
+    state.cast_spell(spell.CALL_TO_ARMS)
+    assert state.mana == 200
+    assert state.calculate_building_production() == 50
+    with pytest.raises(ValueError):
+        state.cast_spell(spell.CALL_TO_ARMS)
+
+    restored = events.Checkpoint.capture(state).restore()
+    assert restored.calculate_building_production() == 50
+    assert restored.spells[spell.SpellId.CALL_TO_ARMS].active_until == 30
+
+    state.expire_spell(spell.CALL_TO_ARMS)
+    assert state.calculate_building_production() == 20
+    with pytest.raises(ValueError):
+        state.cast_spell(spell.FAIRY_CHANTING)
+
+
+def test_mana_limited_autocast_loop():
+    state = _state(mana=Decimal(0))
+    settings = state.spells[spell.SpellId.CALL_TO_ARMS]
+    settings.autocast, settings.primary_priority = True, 1
+
+    casts = spells.run(state, Decimal(3600))
+
+    # 800 mana at 1 mana/second: a cast every 800 seconds, each active for 30 of them
+    assert [c.elapsed for c in casts] == [800, 1600, 2400, 3200]
+    assert state.elapsed == 3600
+    assert state.mana == 400
+    assert state.gold == 20 * 3600 + 30 * 30 * 4
+    assert not state.spells[spell.SpellId.CALL_TO_ARMS].active
+
+
+def test_primary_waits_and_independent_casts():
+    state = _state(mana=Decimal(1000))
+    for spell_id, attribute in ((spell.SpellId.FAIRY_CHANTING, 'primary_priority'),
+                                (spell.SpellId.CALL_TO_ARMS, 'secondary_priority'),
+                                (spell.SpellId.TAX_COLLECTION, 'independent_priority')):
+        settings = state.spells[spell_id]
+        settings.autocast = True
+        setattr(settings, attribute, 1)
+
+    log = events.EventLog(state)
+    casts = spells.run(state, Decimal(100))
+
+    # Fairy Chanting first; Call to Arms is held back while Fairy Chanting waits for mana again
+    assert [c.spell_id for c in casts] == [spell.SpellId.FAIRY_CHANTING]
+    assert events.Checkpoint.capture(log.state_at(len(log))) == events.Checkpoint.capture(state)
+
+    # Independent spells do not wait for the primary order, so Tax Collection takes the mana
+    casts = spells.run(state, Decimal(900))
+    assert [(c.elapsed, c.spell_id) for c in casts] == [
+        (300, spell.SpellId.TAX_COLLECTION), (700, spell.SpellId.TAX_COLLECTION)
+    ]
+    assert state.spells[spell.SpellId.FAIRY_CHANTING].casts == 1
+
+
+def test_hydrate_reads_autocast_settings():
+    records = default_records()
+    records['spells'] = [
+        serializer.Spell(1, 0, True, 2, 0, 0, 1, 0, 7.0, 0, 0, 0, 0, 0, 5),
+        serializer.Spell(5, 0, True, 0, 1, 3, 1, 0, 2.0, 0, 0, 0, 0, 0, 5),
+        serializer.Spell(999, 0, True, 1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 5),
+    ]
+    state = serializer.Serializer.hydrate(serializer.SaveData.from_sections(records))
+
+    settings = state.spells[spell.SpellId.CALL_TO_ARMS]
+    assert (settings.autocast, settings.primary_priority, settings.casts) == (True, 2, 7)
+    assert not settings.active
+    settings = state.spells[spell.SpellId.FAIRY_CHANTING]
+    assert (settings.secondary_priority, settings.independent_priority) == (1, 3)
+    assert not state.spells[spell.SpellId.TAX_COLLECTION].autocast
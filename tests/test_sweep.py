@@ -0,0 +1,78 @@
+import itertools
+import json
+import os
+
+import pytest
+
+from rgsim import cli, sweep
+from rgsim.entities import building, faction
+
+SPEC = {
+    'trophies': [0, 10],
+    'buildings': {'FARM': [0, 10, 50], 'INN': [0, 5]},
+    'upgrades': [[], ['CROP_ROTATION']],
+    'factions': ['NONE', 'FAIRY'],
+    'horizons': [3600, 86400],
+}
+
+
+def test_grid_numbers_every_combination():
+    grid = sweep.from_spec(SPEC)
+    combinations = list(itertools.product([0, 10], [0, 10, 50], [0, 5], [0, 1], [0, 1], [0, 1]))
+
+    assert len(grid) == len(combinations) == 96
+    for index in (0, 1, 37, 95):
+        trophies, farms, inns, _upgrades, faction_index, _horizon = combinations[index]
+        scenario = grid[index]
+        assert scenario.trophies == trophies
+        assert dict(scenario.buildings) == {
+            id_: count for id_, count in
+            ((building.BuildingId.FARM, farms), (building.BuildingId.INN, inns)) if count
+        }
+        assert scenario.faction == [faction.FactionId.NONE, faction.FactionId.FAIRY][faction_index]
+    assert sweep.from_spec(grid.spec()) == grid
+
+    sample = sweep.from_spec({**SPEC, 'sample': {'count': 1000, 'seed': 3}})
+    assert len(sample) == 1000
+    assert sample[999] == sweep.Sample(grid, 1000, 3)[999]
+
+
+def test_resumes_where_it_left_off(tmp_path):
+    grid = sweep.from_spec(SPEC)
+    directory = str(tmp_path)
+
+    # Interrupted after the first chunk
+    for _results in sweep.run(grid, directory, workers=1, chunk_size=10):
+        break
+    assert sweep.completed(directory, grid) == 10
+
+    resumed = [r for results in sweep.run(grid, directory, workers=1, chunk_size=10)
+               for r in results]
+    assert [r['index'] for r in resumed] == list(range(10, 96))
+    assert sweep.completed(directory, grid) == 96
+
+    with open(os.path.join(directory, 'results.jsonl'), encoding='utf-8') as file:
+        lines = [json.loads(line) for line in file]
+    assert sorted(r['index'] for r in lines) == list(range(96))
+    assert not list(sweep.run(grid, directory, workers=1))
+
+    with pytest.raises(ValueError):
+        list(sweep.run(sweep.from_spec({**SPEC, 'horizons': [60]}), directory))
+
+
+def test_parallel_npz_matches_serial(tmp_path):
+    grid = sweep.from_spec(SPEC)
+    serial = [r for results in sweep.run(grid, str(tmp_path / 'serial'), workers=1)
+              for r in results]
+
+    spec_path = tmp_path / 'spec.json'
+    spec_path.write_text(json.dumps(SPEC))
+    assert cli.main([
+        'sweep', str(spec_path), str(tmp_path / 'parallel'), '--workers', '2',
+        '--chunk-size', '7', '--format', 'npz'
+    ]) == 0
+
+    columns = sweep.load_npz(str(tmp_path / 'parallel'))
+    assert columns['index'].tolist() == list(range(96))
+    assert columns['gold'].tolist() == [r['gold'] for r in serial]
+    assert columns['faction'].tolist() == [r['faction'] for r in serial]
@@ -0,0 +1,103 @@
+import json
+import os
+from decimal import Decimal
+
+import pytest
+
+from rgsim import simulator
+from rgsim.entities import building, faction, modifier, table
+from rgsim.entities import upgrade as upgrade_
+
+
+def _write(path, buildings):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'version': 1, 'buildings': buildings}, file)
+
+
+def test_compiled_table_tracks_source(tmp_path):
+    source = str(tmp_path / 'entities.json')
+    _write(source, [{'id': 'FARM', 'price': 10}])
+
+    assert table.read(source)['buildings'] == [{'id': 'FARM', 'price': 10}]
+    assert os.path.exists(table.cache_path(source))
+
+    # Served from the compiled copy while the source's size and time are unchanged
+    stat = os.stat(source)
+    with open(source, 'w', encoding='utf-8') as file:
+        file.write('x' * stat.st_size)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert table.read(source)['buildings'] == [{'id': 'FARM', 'price': 10}]
+
+    _write(source, [{'id': 'INN', 'price': 125}, {'id': 'FARM', 'price': 10}])
+    assert [b['id'] for b in table.read(source)['buildings']] == ['INN', 'FARM']
+
+
+def test_corrupt_compiled_table_is_rebuilt(tmp_path):
+    source = str(tmp_path / 'entities.json')
+    _write(source, [{'id': 'FARM', 'price': 1e21}])
+    table.read(source)
+    with open(table.cache_path(source), 'wb') as file:
+        file.write(b'\x00garbage')
+
+    assert table.read(source)['buildings'] == [{'id': 'FARM', 'price': 1e21}]
+
+
+def test_definitions_from_table():
+    assert building.FARM is building.get(building.BuildingId.FARM)
+    assert building.HALL_OF_LEGENDS.name == 'Hall of Legends'
+    assert building.HELL_PORTAL.base_price == Decimal(3.2e9)
+    assert faction.DJINN.alignment is faction.alignment.CHAOS
+
+    farming_tools = upgrade_.get(upgrade_.UpgradeId.FARMING_TOOLS)
+    assert farming_tools.cost == Decimal(9.716e20)
+    assert farming_tools.effects[0].owner is farming_tools
+    assert upgrade_.scope(upgrade_.UpgradeId.GRINDING_DEDICATION).alignment \
+        == upgrade_.alignment.AlignmentId.NEUTRAL
+
+
+def test_identical_effects_share_callbacks():
+    crop_rotation = upgrade_.get(upgrade_.UpgradeId.CROP_ROTATION)
+    golden_spoon = upgrade_.get(upgrade_.UpgradeId.GOLDEN_SPOON)
+
+    assert crop_rotation.effects[0].amount is golden_spoon.effects[0].amount
+    assert crop_rotation.effects[0].amount is modifier.fixed(Decimal(2))
+    assert crop_rotation.effects[0].applies_to is golden_spoon.effects[0].applies_to
+
+    specs = {
+        tuple(effect['amount'].items())
+        for group in table.load()['upgrade_groups'] for entry in group['upgrades']
+        for effect in entry.get('effects', ())
+    }
+    assert len({id(m.amount) for u in upgrade_.all() for m in u.effects}) == len(specs)
+
+
+def test_table_entities_are_declared_for_type_checkers():
+    for module, ids, type_name in ((building, building.BuildingId, 'Building'),
+                                   (faction, faction.FactionId, 'Faction'),
+                                   (upgrade_, upgrade_.UpgradeId, 'Upgrade')):
+        declared = {n for n, t in module.__annotations__.items() if t == type_name}
+        assert declared == set(ids.__members__)
+
+
+def test_upgrade_conditions_from_table():
+    plow = upgrade_._upgrade({
+        'id': 'HEAVY_PLOW', 'cost': 300,
+        'unlocked': [{'owns': {'building': 'FARM', 'count': 10}}],
+        'available': [{'upgrade': 'CROP_ROTATION'}, {'owns': {'building': 'INN', 'count': 1}}],
+    })
+    assert plow.depends_on == {
+        upgrade_.building_dependency(building.BuildingId.FARM),
+        upgrade_.building_dependency(building.BuildingId.INN),
+        upgrade_.upgrade_dependency(upgrade_.UpgradeId.CROP_ROTATION),
+    }
+
+    state = simulator.GameState().purchase_building(building.FARM.id_, Decimal(10))
+    assert plow.unlocked(state) and not plow.available(state)
+    state.purchase_upgrade(upgrade_.CROP_ROTATION)
+    assert not plow.available(state)
+    state.purchase_building(building.INN.id_, Decimal(1))
+    assert plow.available(state)
+
+    assert upgrade_._upgrade({'id': 'HEAVY_PLOW', 'cost': 300}).depends_on == frozenset()
+    with pytest.raises(ValueError):
+        upgrade_._upgrade({'id': 'HEAVY_PLOW', 'cost': 300, 'unlocked': [{'gold': 10}]})
@@ -0,0 +1,106 @@
+import math
+from decimal import Decimal
+
+import pytest
+
+from rgsim import availability, cli, simulator, tournament
+from rgsim.entities import alignment, building
+
+
+def start():
+    return simulator.GameState(gold=Decimal(100))
+
+
+def test_play_is_deterministic_and_leaves_state_alone():
+    state = start()
+    strategy = tournament.Strategy('good', alignment=alignment.AlignmentId.GOOD)
+    outcome = tournament.play(state, strategy, 600)
+
+    assert outcome.purchases > 0 and outcome.earned > 0
+    assert outcome == tournament.play(state, strategy, 600)
+    # Played on a copy
+    assert state.gold == 100 and state.elapsed == 0
+
+
+def test_successive_halving():
+    strategies = tournament.default_strategies()
+    result = tournament.run(start(), strategies, 60, 240, eta=2, workers=1)
+
+    assert [r.horizon for r in result.rounds] == [60, 120, 240]
+    sizes = [len(r.outcomes) for r in result.rounds]
+    assert sizes == [len(strategies), math.ceil(len(strategies) / 2),
+                     math.ceil(len(strategies) / 4)]
+    for previous, round_ in zip(result.rounds, result.rounds[1:]):
+        kept = [o.strategy for o in previous.outcomes[:len(round_.outcomes)]]
+        assert {o.strategy for o in round_.outcomes} == set(kept)
+    for round_ in result.rounds:
+        assert [o.earned for o in round_.outcomes] == sorted(
+            (o.earned for o in round_.outcomes), reverse=True
+        )
+
+    ranking = result.ranking()
+    assert len(ranking) == len(strategies)
+    assert ranking[0].strategy == result.winner
+    assert ranking[0].horizon == 240
+
+
+def test_parallel_matches_serial():
+    strategies = tournament.default_strategies()[:3]
+    serial = tournament.run(start(), strategies, 60, 120, workers=1)
+    parallel = tournament.run(start(), strategies, 60, 120, workers=2)
+    assert parallel == serial
+
+
+def test_rejects_bad_arguments():
+    strategy = tournament.Strategy('a')
+    with pytest.raises(ValueError):
+        tournament.run(start(), [], 60, 600)
+    with pytest.raises(ValueError):
+        tournament.run(start(), [strategy, strategy], 60, 600)
+    with pytest.raises(ValueError):
+        tournament.run(start(), [strategy], 600, 60)
+    with pytest.raises(ValueError):
+        tournament.run(start(), [strategy], 60, 600, eta=1)
+
+
+def test_tournament_command(tmp_path, make_save, capsys):
+    save = tmp_path / 'save.txt'
+    save.write_text(make_save(buildings={9: 12}))
+
+    assert cli.main([
+        'tournament', str(save), '--min-horizon', '60', '--max-horizon', '120', '--workers', '1'
+    ]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == len(tournament.default_strategies())
+    assert [line.split()[0] for line in lines] == [str(i) for i in range(1, len(lines) + 1)]
+
+
+def test_choices_respect_the_alignment_and_leave_state_alone():
+    state = simulator.GameState(gold=Decimal(10 ** 9), alignment=alignment.AlignmentId.GOOD)
+    state.purchase_building(building.FARM.id_, Decimal(10))
+    index = availability.AvailabilityIndex(state)
+    received = []
+    state.listeners.append(received.append)
+    version = state.version
+
+    seen = set()
+    for policy in tournament.POLICIES:
+        option = tournament.Strategy(policy, policy).choose(state, index)
+        seen.add(option.purchase)
+    assert all(
+        building.get(p).buildable(alignment.AlignmentId.GOOD)
+        for p in seen if isinstance(p, building.BuildingId)
+    )
+    assert not received and state.version == version
+
+
+def test_alignment_strategies_pick_the_alignment():
+    good = tournament.Strategy('good', alignment=alignment.AlignmentId.GOOD)
+    unaligned = tournament.Strategy('unaligned')
+    state = simulator.GameState(gold=Decimal(10 ** 4))
+
+    assert tournament.play(state, good, 3600).earned \
+        > tournament.play(state, unaligned, 3600).earned
+    with pytest.raises(ValueError):
+        tournament.play(simulator.GameState(alignment=alignment.AlignmentId.EVIL), good, 60)
+    assert not any(s.alignment for s in tournament.default_strategies(alignment.AlignmentId.EVIL))